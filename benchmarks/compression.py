@@ -0,0 +1,98 @@
+"""
+Compares storing and reading back a csv, json and pdf file without
+compression and with gzip and zstd, reporting the time taken and the bytes
+stored.
+
+    python -m benchmarks.compression
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import typing
+
+from starlette_files.constants import MB
+from starlette_files.fields import FileAttachment
+from starlette_files.storages import FileSystemStorage
+
+
+def sample_files(size: int) -> typing.Dict[str, bytes]:
+    rows = size // 32
+    csv = "id,name,value\n" + "".join(
+        f"{i},name {i},{i * 3.14159:.3f}\n" for i in range(rows)
+    )
+    records = [
+        {"id": i, "name": f"name {i}", "active": i % 3 == 0} for i in range(rows)
+    ]
+    return {
+        "csv": csv.encode()[:size],
+        "json": json.dumps(records).encode()[:size],
+        # already compressed, so it is stored as it is
+        "pdf": b"%PDF-1.4\n" + os.urandom(size),
+    }
+
+
+def median(run: typing.Callable, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv: typing.List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compression")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--size", type=int, default=4, help="MB per file")
+    args = parser.parse_args(argv)
+
+    storage = FileSystemStorage(tempfile.mkdtemp())
+    encodings: typing.List[typing.Optional[str]] = [None, "gzip"]
+
+    try:
+        import zstandard  # noqa: F401
+
+        encodings.append("zstd")
+    except ImportError:
+        print("skipped zstd: zstandard is not installed", file=sys.stderr)
+
+    print("%-6s %-6s %10s %10s %10s" % ("file", "codec", "stored", "put ms", "read ms"))
+
+    for name, data in sample_files(args.size * MB).items():
+        for encoding in encodings:
+
+            class Upload(FileAttachment):
+                allowed_content_types = ["text/csv", "text/plain", "application/pdf"]
+                compression = encoding
+                max_length = args.size * MB * 2
+
+            Upload.storage = storage
+            attachments = []
+
+            def put():
+                attachments.append(Upload.create_from(io.BytesIO(data), f"a.{name}"))
+
+            def read():
+                with attachments[-1].open as f:
+                    f.read()
+
+            put_seconds = median(put, args.repeat)
+            read_seconds = median(read, args.repeat)
+            stored = os.path.getsize(storage.local_path(attachments[-1].path))
+
+            print(
+                "%-6s %-6s %10d %10.1f %10.1f"
+                % (name, encoding, stored, put_seconds * 1000, read_seconds * 1000)
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
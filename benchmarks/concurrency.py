@@ -0,0 +1,103 @@
+"""
+Renders a burst of large images from many threads at once, with and without
+a decode limiter, reporting the time taken and the peak memory.
+
+    python -m benchmarks.concurrency
+"""
+
+import argparse
+import io
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import typing
+
+from starlette_files.constants import MB
+from starlette_files.fields import ImageAttachment, ImageRenditionAttachment
+from starlette_files.image.limits import DecodeLimiter
+from starlette_files.storages import FileSystemStorage
+
+from . import corpus
+from .suite import read_rss, reset_peak_rss
+
+
+def burst(
+    rendition_class: typing.Type[ImageRenditionAttachment],
+    image: ImageAttachment,
+    threads: int,
+) -> float:
+    workers = [
+        threading.Thread(
+            target=rendition_class.create_from, args=(image, ["width-800"])
+        )
+        for _ in range(threads)
+    ]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+def run_case(args: argparse.Namespace) -> None:
+    width, height = (int(value) for value in args.resolution.split("x"))
+    root = tempfile.mkdtemp()
+
+    class ImageType(ImageAttachment):
+        storage = FileSystemStorage(root)
+        max_length = MB * 100
+
+    class ImageRenditionType(ImageRenditionAttachment):
+        storage = FileSystemStorage(root)
+
+    if args.case == "limited":
+        ImageRenditionType.decode_limiter = DecodeLimiter(args.max_memory * MB)
+
+    try:
+        data = corpus.encode(corpus.photo(width, height))
+        image = ImageType.create_from(io.BytesIO(data), "a.jpeg")
+
+        measured = reset_peak_rss()
+        baseline = read_rss("VmRSS")
+        seconds = burst(ImageRenditionType, image, args.threads)
+        peak = "%.1fMB" % ((read_rss("VmHWM") - baseline) / MB) if measured else "-"
+        print("%-20s %10.0f %10s" % (args.case, seconds * 1000, peak))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main(argv: typing.List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.concurrency")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--resolution", default="6000x4000")
+    parser.add_argument(
+        "--max-memory", type=int, default=256, help="the limiter's budget in MB"
+    )
+    parser.add_argument("--case", choices=["unlimited", "limited"])
+    args = parser.parse_args(argv)
+
+    if args.case:
+        run_case(args)
+        return 0
+
+    print("%-20s %10s %10s" % ("case", "ms", "peak rss"))
+    sys.stdout.flush()
+
+    # each case is run in a fresh process so the memory freed by one does not
+    # hide the peak of the other
+    for case in ["unlimited", "limited"]:
+        command = [sys.executable, "-m", "benchmarks.concurrency", "--case", case]
+        command += ["--threads", str(args.threads), "--resolution", args.resolution]
+        command += ["--max-memory", str(args.max_memory)]
+        subprocess.run(command, check=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
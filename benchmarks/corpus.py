@@ -0,0 +1,45 @@
+"""
+Generated images used by the benchmarks so results are reproducible without
+shipping sample files.
+"""
+
+import io
+import typing
+
+from PIL import Image, ImageDraw, ImageFilter
+
+RESOLUTIONS = [(640, 480), (1920, 1280)]
+
+
+def photo(width: int, height: int) -> Image.Image:
+    """a noisy gradient, compresses roughly like a photograph"""
+
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 48)
+    image = Image.merge("RGB", [gradient, noise, gradient.rotate(90)])
+    return image.filter(ImageFilter.GaussianBlur(1))
+
+
+def graphic(width: int, height: int) -> Image.Image:
+    """flat colours and text, compresses roughly like a screenshot or logo"""
+
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(0, width, 40):
+        draw.rectangle([i, 0, i + 20, height // 3], fill=(i % 255, 80, 160))
+        draw.text((i, height // 2), "starlette", fill="black")
+    return image
+
+
+def encode(image: Image.Image, fmt: str = "JPEG") -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, quality=90)
+    return buffer.getvalue()
+
+
+def build(
+    resolutions: typing.List[typing.Tuple[int, int]] = RESOLUTIONS,
+) -> typing.Dict[str, bytes]:
+    """returns jpeg photos keyed by their resolution, ie '640x480'"""
+
+    return {"%dx%d" % size: encode(photo(*size)) for size in resolutions}
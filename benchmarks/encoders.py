@@ -0,0 +1,81 @@
+"""
+Compares encode time against output size for each output format and
+encoder option supported by the image filters.
+
+    python -m benchmarks.encoders
+"""
+
+import io
+import statistics
+import time
+
+from PIL import Image
+
+from starlette_files.image.encoder import is_format_supported
+from starlette_files.image.filter import ImageFilter
+
+from .corpus import graphic, photo
+
+CASES = [
+    ["format-jpeg"],
+    ["format-jpeg", "quality-70"],
+    ["format-png"],
+    ["format-png", "compress-1"],
+    ["format-png", "compress-6"],
+    ["format-png", "compress-9"],
+    ["format-png8"],
+    ["format-png8", "compress-6"],
+    ["format-png", "colors-64"],
+    ["format-png", "colors-256-dither"],
+    ["format-webp"],
+    ["format-webp", "quality-70"],
+    ["format-webp", "quality-70", "effort-0"],
+    ["format-webp", "quality-70", "effort-6"],
+    ["format-avif"],
+    ["format-avif", "quality-60"],
+    ["format-avif", "quality-60", "effort-0"],
+]
+
+
+class Attachment:
+    focal_point = None
+
+
+def source(image: Image.Image) -> Image.Image:
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+def measure(image: Image.Image, specs, repeat: int = 3):
+    timings = []
+    for _ in range(repeat):
+        output = io.BytesIO()
+        start = time.perf_counter()
+        ImageFilter(specs=specs).run(Attachment(), image, output)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), output.tell()
+
+
+def main():
+    corpus = [("photo", photo(800, 600)), ("graphic", graphic(800, 600))]
+
+    print("%-8s %-40s %10s %12s" % ("image", "specs", "ms", "bytes"))
+
+    for name, image in corpus:
+        for specs in CASES:
+            fmt = specs[0].split("-")[1]
+            # a png quantized to a palette
+            fmt = "png" if fmt == "png8" else fmt
+            if not is_format_supported(fmt):
+                print("%-8s %-40s %s" % (name, "|".join(specs), "unsupported"))
+                continue
+            seconds, size = measure(source(image), specs)
+            print(
+                "%-8s %-40s %10.1f %12d" % (name, "|".join(specs), seconds * 1000, size)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures how long the package takes to import in a fresh interpreter and
+which of the heavy optional dependencies are loaded by the import alone.
+
+    python -m benchmarks.imports
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import typing
+
+MODULES = [
+    "starlette_files",
+    "starlette_files.storages",
+    "starlette_files.fields",
+]
+
+# dependencies that should only be loaded once they are first used
+DEFERRED = ["PIL.Image", "magic", "boto3", "multiprocessing"]
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import %s
+seconds = time.perf_counter() - start
+print(json.dumps([seconds, [name for name in %r if name in sys.modules]]))
+"""
+
+
+def measure(module: str, repeat: int) -> typing.Tuple[float, typing.List[str]]:
+    timings = []
+    loaded: typing.List[str] = []
+
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT % (module, DEFERRED)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        seconds, loaded = json.loads(output)
+        timings.append(seconds)
+
+    return statistics.median(timings), loaded
+
+
+def main(argv: typing.List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.imports")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    row = "%-30s %10s  %s"
+    print(row % ("module", "ms", "loaded"))
+
+    for module in MODULES:
+        seconds, loaded = measure(module, args.repeat)
+        print(row % (module, "%.1f" % (seconds * 1000), ", ".join(loaded) or "-"))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Compares finding the renditions of a page of images with a query for each
+one, as in the example app, against lookup_many on a RenditionIndex, read from
+its local database and then from memory. The latency is added to each query
+made per rendition to stand in for the round trip to the application's own
+database server.
+
+    python -m benchmarks.lookups
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import typing
+
+from starlette_files.image.cache import RenditionIndex
+
+
+class Original:
+    """Stands in for an image attachment with only what the cache key uses"""
+
+    def __init__(self, number: int):
+        self.path = f"images/{number}.jpeg"
+        self.cache_key = f"{number:08x}"
+
+    def get_filter_defaults(self) -> dict:
+        return {}
+
+
+def rendition(key: typing.Tuple[str, str, str]) -> dict:
+    return {
+        "cache_key": key[1],
+        "content_type": "image/jpeg",
+        "saved_filename": f"{key[1]}-{abs(hash(key[2]))}.jpeg",
+        "width": 320,
+        "height": 240,
+    }
+
+
+def per_rendition(
+    path: str, keys: typing.List[typing.Tuple[str, str, str]], latency: float
+) -> int:
+    found = 0
+    db = sqlite3.connect(path)
+    for key in keys:
+        time.sleep(latency)
+        row = db.execute(
+            "SELECT rendition FROM renditions "
+            "WHERE path = ? AND cache_key = ? AND specs = ?",
+            key,
+        ).fetchone()
+        found += row is not None
+    db.close()
+    return found
+
+
+def main(argv: typing.List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.lookups")
+    parser.add_argument("--images", type=int, default=50)
+    parser.add_argument("--sizes", type=int, default=3)
+    parser.add_argument("--stored", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="ms per query")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(tempfile.mkdtemp(), "renditions.db")
+    index = RenditionIndex(path)
+
+    # a database with many more renditions than are on the page
+    stored = [
+        (Original(i).path, Original(i).cache_key, f"width-{320 * (size + 1)}")
+        for i in range(args.stored // args.sizes)
+        for size in range(args.sizes)
+    ]
+    with index._connect() as db:
+        db.executemany(
+            "INSERT INTO renditions VALUES (?, ?, ?, '{}')", [key for key in stored]
+        )
+
+    page = stored[: args.images * args.sizes]
+    for key in page:
+        index.set(key, rendition(key))
+
+    cold = RenditionIndex(path)
+
+    def lookup_stored() -> int:
+        # emptied each time so every rendition is read from the database
+        cold._items.clear()
+        return sum(1 for found in cold.lookup_many(page) if found)
+
+    cases = [
+        ("query per rendition", lambda: per_rendition(path, page, args.latency / 1000)),
+        ("lookup_many, stored", lookup_stored),
+        ("lookup_many, memory", lambda: sum(1 for f in index.lookup_many(page) if f)),
+    ]
+
+    print("%-22s %8s %10s" % ("case", "found", "ms"))
+
+    for name, run in cases:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            found = run()
+            timings.append(time.perf_counter() - start)
+        print("%-22s %8d %10.2f" % (name, found, statistics.median(timings) * 1000))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
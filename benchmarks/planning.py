@@ -0,0 +1,73 @@
+"""
+Compares planning the fill crop boxes of many images one at a time against
+the vectorized planner.
+
+    python -m benchmarks.planning
+"""
+
+import random
+import statistics
+import sys
+import time
+import typing
+
+import numpy as np
+
+from starlette_files.image.planning import fill_crop_box, fill_crop_boxes
+from starlette_files.image.rect import Rect
+
+COUNT = 10000
+
+
+def build(count: int) -> typing.List[tuple]:
+    rows = []
+    generator = random.Random(0)
+
+    for _ in range(count):
+        width, height = generator.randint(100, 6000), generator.randint(100, 6000)
+        focal_point = None
+        if generator.random() < 0.5:
+            left, top = generator.randint(0, width - 1), generator.randint(
+                0, height - 1
+            )
+            right = generator.randint(left + 1, width)
+            bottom = generator.randint(top + 1, height)
+            focal_point = Rect(left, top, right, bottom)
+        rows.append(((width, height), focal_point))
+
+    return rows
+
+
+def timed(run: typing.Callable, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> int:
+    rows = build(COUNT)
+    target = (400, 300)
+
+    image_sizes = np.array([size for size, _ in rows])
+    focal_points = np.array([fp or (np.nan,) * 4 for _, fp in rows], dtype=float)
+
+    def scalar():
+        for size, focal_point in rows:
+            fill_crop_box(size, target, focal_point, 0.5)
+
+    def vectorized():
+        fill_crop_boxes(image_sizes, target, focal_points, 0.5)
+
+    print("%-12s %10s %12s" % ("planner", "ms", "us / image"))
+    for name, run in [("scalar", scalar), ("vectorized", vectorized)]:
+        seconds = timed(run)
+        print("%-12s %10.2f %12.3f" % (name, seconds * 1000, seconds / COUNT * 1e6))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
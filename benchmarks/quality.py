@@ -0,0 +1,80 @@
+"""
+Compares the size and SSIM of renditions saved at the default quality against
+those whose quality is searched for with quality-auto and maxbytes, and the
+time the search adds.
+
+    python -m benchmarks.quality
+"""
+
+import argparse
+import io
+import statistics
+import sys
+import time
+import typing
+
+from PIL import Image
+
+from starlette_files.image.adaptive import ssim
+from starlette_files.image.filter import ImageFilter
+
+from . import corpus
+
+SPECS = [
+    ["format-jpeg"],
+    ["format-jpeg", "quality-auto"],
+    ["format-jpeg", "quality-auto-95"],
+    ["format-jpeg", "maxbytes-100000"],
+    ["format-webp"],
+    ["format-webp", "quality-auto"],
+]
+
+
+def render(source: bytes, specs: typing.List[str]) -> typing.Tuple[bytes, float]:
+    output = io.BytesIO()
+    with Image.open(io.BytesIO(source)) as image:
+        start = time.perf_counter()
+        ImageFilter(specs).run(None, image, output)
+        seconds = time.perf_counter() - start
+    return output.getvalue(), seconds
+
+
+def main(argv: typing.List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.quality")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--resolution", default="1920x1280")
+    args = parser.parse_args(argv)
+
+    width, height = (int(value) for value in args.resolution.split("x"))
+
+    print("%-8s %-32s %10s %8s %8s" % ("image", "specs", "bytes", "ssim", "ms"))
+
+    for name in ["photo", "graphic"]:
+        image = getattr(corpus, name)(width, height)
+        source = corpus.encode(image, "PNG")
+
+        for specs in SPECS:
+            timings = []
+            for _ in range(args.repeat):
+                data, seconds = render(source, specs)
+                timings.append(seconds)
+
+            with Image.open(io.BytesIO(data)) as rendered:
+                score = ssim(image, rendered)
+
+            print(
+                "%-8s %-32s %10d %8.4f %8.0f"
+                % (
+                    name,
+                    " ".join(specs),
+                    len(data),
+                    score,
+                    statistics.median(timings) * 1000,
+                )
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Measures the overhead of the RenditionQueue itself: enqueueing jobs in
+batches and then draining them with several processes claiming and completing
+jobs without creating any renditions, so the rate is the most a set of
+workers could sustain on this host.
+
+    python -m benchmarks.queue --jobs 100000 --processes 1,4
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from starlette_files.image.queue import RenditionQueue
+
+
+class Original(dict):
+    """Stands in for an image attachment with only what the cache key uses"""
+
+    def __init__(self, number: int):
+        super().__init__(saved_filename=f"{number}.jpeg")
+        self.path = f"images/{number}.jpeg"
+        self.cache_key = f"{number:08x}"
+
+    def get_filter_defaults(self) -> dict:
+        return {}
+
+
+class Rendition:
+    pass
+
+
+SPECS = [["width-320"], ["width-640"], ["fill-80x80"]]
+
+
+def enqueue(queue: RenditionQueue, jobs: int, batch_size: int) -> float:
+    started = time.perf_counter()
+    originals = jobs // len(SPECS)
+
+    for first in range(0, originals, batch_size):
+        items = [
+            (Original(number), specs)
+            for number in range(first, min(first + batch_size, originals))
+            for specs in SPECS
+        ]
+        queue.enqueue_many(Rendition, items)  # type: ignore
+
+    return time.perf_counter() - started
+
+
+def drain(path: str, batch_size: int) -> None:
+    queue = RenditionQueue(path)
+
+    while True:
+        jobs = queue.claim(batch_size)
+        if not jobs:
+            break
+        queue.complete(jobs)
+
+
+def run(path: str, processes: int, batch_size: int) -> float:
+    started = time.perf_counter()
+    workers = [
+        multiprocessing.Process(target=drain, args=(path, batch_size))
+        for _ in range(processes)
+    ]
+
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return time.perf_counter() - started
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.queue")
+    parser.add_argument("--jobs", type=int, default=30000)
+    parser.add_argument("--processes", default="1,4")
+    parser.add_argument("--batch-size", type=int, default=30)
+    options = parser.parse_args(argv)
+
+    print(f"{'processes':<12}{'enqueue/s':>12}{'drain/s':>12}")
+
+    for processes in [int(value) for value in options.processes.split(",")]:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "queue.db")
+            queue = RenditionQueue(path)
+            enqueued = enqueue(queue, options.jobs, 1000)
+            drained = run(path, processes, options.batch_size)
+            stats = queue.stats()
+
+            if stats["done"] != options.jobs // len(SPECS) * len(SPECS):
+                sys.exit(f"only {stats['done']} jobs were completed")
+
+            print(
+                f"{processes:<12}{stats['done'] / enqueued:>12.0f}"
+                f"{stats['done'] / drained:>12.0f}"
+            )
+
+
+if __name__ == "__main__":
+    # run from the imported module so the workers can import its classes
+    from benchmarks.queue import main as run_main
+
+    run_main()
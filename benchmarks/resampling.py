@@ -0,0 +1,69 @@
+"""
+Compares the speed and quality of each resampling filter and reducing gap
+when downscaling, the quality is the SSIM against lanczos without a gap.
+
+    python -m benchmarks.resampling
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import typing
+
+from PIL import Image
+
+from starlette_files.image.adaptive import ssim
+from starlette_files.image.operations.resize import RESAMPLE_FILTERS
+
+from . import corpus
+
+GAPS = [None, 3.0, 2.0]
+
+
+def timed(run: typing.Callable, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv: typing.List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.resampling")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--resolution", default="4000x3000")
+    parser.add_argument("--width", type=int, default=800)
+    args = parser.parse_args(argv)
+
+    width, height = (int(value) for value in args.resolution.split("x"))
+    size = (args.width, int(height * args.width / width))
+
+    print("%-10s %-12s %-6s %10s %8s" % ("source", "filter", "gap", "ms", "ssim"))
+
+    for name, source in [
+        ("photo", corpus.photo(width, height)),
+        ("graphic", corpus.graphic(width, height)),
+    ]:
+        reference = source.resize(size, Image.LANCZOS)
+
+        for resample in RESAMPLE_FILTERS:
+            for gap in GAPS:
+                options = {"resample": getattr(Image, resample.upper())}
+                if gap:
+                    options["reducing_gap"] = gap
+
+                seconds = timed(lambda: source.resize(size, **options), args.repeat)
+                similarity = ssim(reference, source.resize(size, **options))
+
+                print(
+                    "%-10s %-12s %-6s %10.1f %8.4f"
+                    % (name, resample, gap or "-", seconds * 1000, similarity)
+                )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,419 @@
+"""
+Benchmarks the hot paths of uploading files and images, creating renditions
+and the storages. Reports the median time, peak memory and bytes copied for
+each case and can compare the results against a previous run or commit.
+
+    python -m benchmarks
+    python -m benchmarks --save before.json
+    python -m benchmarks --compare before.json
+    python -m benchmarks --ref HEAD~1
+"""
+
+import argparse
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+
+from starlette_files.constants import MB
+from starlette_files.fields import (
+    FileAttachment,
+    ImageAttachment,
+    ImageRenditionAttachment,
+)
+from starlette_files.image.filter import ImageFilter
+from starlette_files.storages import FileSystemStorage
+from starlette_files.storages.base import Storage
+
+from . import corpus
+from .s3stub import StubS3Storage
+
+# the filter specs used to benchmark each registered operation, any operation
+# added without a sample here is reported as skipped.
+SAMPLE_SPECS = {
+    "original": ["original"],
+    "width": ["width-400"],
+    "height": ["height-300"],
+    "min": ["min-400x300"],
+    "max": ["max-400x300"],
+    "fill": ["fill-300x300"],
+    "crop": ["crop-200x200x200x200"],
+    "scale": ["scale-50"],
+    "format": ["format-webp"],
+    "quality": ["quality-70"],
+    "maxbytes": ["maxbytes-50000"],
+    "compress": ["format-png", "compress-1"],
+    "colors": ["format-png", "colors-64"],
+    "effort": ["format-webp", "effort-0"],
+}
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+
+class CountingReader:
+    def __init__(self, stream: typing.IO, counter: Counter):
+        self.stream = stream
+        self.counter = counter
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.counter.count += len(data)
+        return data
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stream.close()
+
+
+class CountingWriter:
+    def __init__(self, writer, counter: Counter):
+        self.writer = writer
+        self.counter = counter
+
+    def write(self, data: bytes) -> int:
+        self.counter.count += len(data)
+        return self.writer.write(data)
+
+    def __getattr__(self, name: str):
+        return getattr(self.writer, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return self.writer.__exit__(*args)
+
+
+class CountingStorage(Storage):
+    """Wraps a storage counting the bytes read from and written to it"""
+
+    def __init__(self, storage: Storage, counter: Counter):
+        self.storage = storage
+        self.counter = counter
+
+    def put(self, filename: str, stream: typing.IO) -> int:
+        return self.storage.put(filename, CountingReader(stream, self.counter))
+
+    def open_writer(self, filename: str, content_type: str = None):
+        writer = self.storage.open_writer(filename, content_type)
+        return CountingWriter(writer, self.counter)
+
+    def open(self, filename: str, mode: str = "rb") -> typing.IO:
+        return CountingReader(self.storage.open(filename, mode), self.counter)
+
+    def copy(self, source: str, target: str, content_type: str = None) -> None:
+        self.storage.copy(source, target, content_type)
+
+    def delete(self, filename: str) -> None:
+        self.storage.delete(filename)
+
+    def locate(self, filename: str) -> str:
+        return self.storage.locate(filename)
+
+    def local_path(self, filename: str):
+        return self.storage.local_path(filename)
+
+    def __getattr__(self, name: str):
+        return getattr(self.storage, name)
+
+
+def reset_peak_rss() -> bool:
+    # linux allows the peak resident set size of a process to be reset
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def read_rss(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def measure(run: typing.Callable, counter: Counter, repeat: int) -> dict:
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    # memory is measured separately as tracing slows everything down
+    counter.count = 0
+    peak_rss = None
+
+    if reset_peak_rss():
+        baseline = read_rss("VmRSS")
+        tracemalloc.start()
+        run()
+        peak_rss = max(read_rss("VmHWM") - baseline, 0)
+    else:
+        tracemalloc.start()
+        run()
+
+    _, peak_python = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": statistics.median(timings),
+        "peak_rss": peak_rss,
+        "peak_python": peak_python,
+        "bytes_copied": counter.count,
+    }
+
+
+def build_cases(
+    root: str, images: typing.Dict[str, bytes], counter: Counter
+) -> typing.Dict[str, typing.Callable]:
+    storages = {
+        "filesystem": CountingStorage(FileSystemStorage(root), counter),
+        "s3": CountingStorage(StubS3Storage(), counter),
+    }
+
+    class FileType(FileAttachment):
+        storage = storages["filesystem"]
+        allowed_content_types = ["image/jpeg"]
+        max_length = MB * 100
+
+    class ImageType(ImageAttachment):
+        storage = storages["filesystem"]
+        max_length = MB * 100
+
+    class SmartImageType(ImageType):
+        smart_focal_point = True
+
+    class ImageRenditionType(ImageRenditionAttachment):
+        storage = storages["filesystem"]
+
+    def upload(cls, data):
+        return lambda: cls.create_from(CountingReader(io.BytesIO(data), counter), "a")
+
+    def rendition(image, specs):
+        return lambda: ImageRenditionType.create_from(image, specs)
+
+    def put(storage, data):
+        return lambda: storage.put("bench/file", io.BytesIO(data))
+
+    def read(storage):
+        def run():
+            with storage.open("bench/file") as f:
+                f.read()
+
+        return run
+
+    ImageFilter._search_for_operations()
+    operations = ImageFilter._registered_operations or {}
+
+    cases: typing.Dict[str, typing.Callable] = {}
+
+    for resolution, data in images.items():
+        cases[f"file.create_from/{resolution}"] = upload(FileType, data)
+        cases[f"image.create_from/{resolution}"] = upload(ImageType, data)
+        cases[f"image.create_from/smart/{resolution}"] = upload(SmartImageType, data)
+
+        image = ImageType.create_from(io.BytesIO(data), "a.jpeg")
+
+        for name in operations:
+            if name in SAMPLE_SPECS:
+                specs = SAMPLE_SPECS[name]
+                cases[f"rendition/{name}/{resolution}"] = rendition(image, specs)
+            else:
+                print("skipped rendition/%s: no sample spec" % name, file=sys.stderr)
+
+        for backend, storage in storages.items():
+            storage.put("bench/file", io.BytesIO(data))
+            cases[f"storage.put/{backend}/{resolution}"] = put(storage, data)
+            cases[f"storage.open/{backend}/{resolution}"] = read(storage)
+
+    return cases
+
+
+def run_suite(
+    resolutions: typing.List[typing.Tuple[int, int]],
+    repeat: int,
+    selected: typing.Optional[str] = None,
+) -> typing.Dict[str, dict]:
+    images = corpus.build(resolutions)
+    counter = Counter()
+    root = tempfile.mkdtemp()
+    results = {}
+
+    try:
+        for name, run in build_cases(root, images, counter).items():
+            if selected and selected not in name:
+                continue
+            try:
+                results[name] = measure(run, counter, repeat)
+            except Exception as e:
+                # older commits may not support every case when comparing
+                print("failed %s: %r" % (name, e), file=sys.stderr)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return results
+
+
+def format_bytes(value: typing.Optional[int]) -> str:
+    if value is None:
+        return "-"
+    return "%.1fMB" % (value / MB)
+
+
+def report(results: typing.Dict[str, dict]) -> None:
+    row = "%-40s %10s %10s %10s %10s"
+    print(row % ("case", "ms", "peak rss", "peak py", "copied"))
+
+    for name, result in results.items():
+        print(
+            row
+            % (
+                name,
+                "%.2f" % (result["seconds"] * 1000),
+                format_bytes(result["peak_rss"]),
+                format_bytes(result["peak_python"]),
+                format_bytes(result["bytes_copied"]),
+            )
+        )
+
+
+def compare(
+    baseline: typing.Dict[str, dict], results: typing.Dict[str, dict], threshold: float
+) -> int:
+    """prints the change of each case and returns the number of regressions"""
+
+    regressions = 0
+    row = "%-40s %10s %10s %8s %s"
+    print(row % ("case", "before ms", "after ms", "change", ""))
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        before = baseline[name]
+        ratio = result["seconds"] / before["seconds"] if before["seconds"] else 1
+        copied_more = result["bytes_copied"] > before["bytes_copied"]
+        regressed = ratio > threshold or copied_more
+        regressions += regressed
+
+        print(
+            row
+            % (
+                name,
+                "%.2f" % (before["seconds"] * 1000),
+                "%.2f" % (result["seconds"] * 1000),
+                "%+.0f%%" % ((ratio - 1) * 100),
+                (
+                    ("REGRESSED" + (" (more bytes copied)" if copied_more else ""))
+                    if regressed
+                    else ""
+                ),
+            )
+        )
+
+    return regressions
+
+
+def run_ref(ref: str, args: argparse.Namespace) -> typing.Dict[str, dict]:
+    """
+    runs these benchmarks against the package as it was at the given commit,
+    checked out into a temporary git worktree.
+    """
+
+    benchmarks_path = os.path.dirname(os.path.abspath(__file__))
+    worktree = tempfile.mkdtemp()
+    runner = tempfile.mkdtemp()
+    output = os.path.join(runner, "results.json")
+
+    subprocess.run(
+        ["git", "worktree", "add", "--detach", worktree, ref],
+        check=True,
+        cwd=benchmarks_path,
+    )
+
+    try:
+        # run from a directory containing only the benchmarks so the package
+        # is imported from the worktree
+        os.symlink(benchmarks_path, os.path.join(runner, "benchmarks"))
+        env = dict(os.environ, PYTHONPATH=worktree)
+        command = [sys.executable, "-m", "benchmarks", "--save", output]
+        command += ["--repeat", str(args.repeat), "--resolutions", args.resolutions]
+        if args.filter:
+            command += ["--filter", args.filter]
+        subprocess.run(command, check=True, cwd=runner, env=env)
+
+        with open(output) as f:
+            return json.load(f)
+    finally:
+        subprocess.run(
+            ["git", "worktree", "remove", "--force", worktree], cwd=benchmarks_path
+        )
+        shutil.rmtree(runner, ignore_errors=True)
+
+
+def parse_resolutions(value: str) -> typing.List[typing.Tuple[int, int]]:
+    resolutions = []
+    for size in value.split(","):
+        width, height = size.split("x")
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+
+def main(argv: typing.List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--resolutions",
+        default=",".join("%dx%d" % size for size in corpus.RESOLUTIONS),
+        help="comma separated sizes of the generated images, ie 640x480,1920x1280",
+    )
+    parser.add_argument("--filter", help="only run cases containing this text")
+    parser.add_argument("--save", help="save the results as json to this file")
+    parser.add_argument("--compare", help="compare against results saved before")
+    parser.add_argument("--ref", help="compare against this git commit")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="the slowdown ratio reported as a regression, default 1.25",
+    )
+    args = parser.parse_args(argv)
+
+    baseline = None
+
+    if args.ref:
+        baseline = run_ref(args.ref, args)
+    elif args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    results = run_suite(parse_resolutions(args.resolutions), args.repeat, args.filter)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is None:
+        report(results)
+        return 0
+
+    return 1 if compare(baseline, results, args.threshold) else 0
@@ -0,0 +1,102 @@
+"""
+Compares building a deep zoom tile pyramid with build_tiles, where each level
+is halved from the one above it, against resizing every level from the
+original, and the effect of more workers when each write has a round trip.
+
+    python -m benchmarks.tiles
+"""
+
+import argparse
+import sys
+import time
+import typing
+
+from PIL import Image
+
+from starlette_files.image import encoder
+from starlette_files.image.tiles import TilePyramid, build_tiles
+from starlette_files.storages import Storage
+
+from . import corpus
+
+
+class MemoryStorage(Storage):
+    """Keeps the files in memory, waiting for the latency on each write"""
+
+    def __init__(self, latency: float = 0):
+        self.latency = latency
+        self.files: typing.Dict[str, bytes] = {}
+
+    def put(self, filename: str, stream: typing.IO) -> int:
+        time.sleep(self.latency)
+        stream.seek(0)
+        self.files[filename] = stream.read()
+        return len(self.files[filename])
+
+
+def build_from_original(
+    image: Image.Image, pyramid: TilePyramid, storage: Storage, base: str
+) -> int:
+    count = 0
+
+    for level in reversed(pyramid.levels):
+        level_image = image.resize(pyramid.level_size(level), Image.LANCZOS)
+        columns, rows = pyramid.level_tiles(level)
+
+        for row in range(rows):
+            for column in range(columns):
+                tile = level_image.crop(pyramid.tile_box(level, column, row))
+                path = pyramid.tile_path(base, level, column, row)
+                with storage.open_writer(path) as writer:
+                    encoder.save(tile, writer, pyramid.format, {})
+                count += 1
+
+    return count
+
+
+def main(argv: typing.List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.tiles")
+    parser.add_argument("--resolution", default="6000x4000")
+    parser.add_argument("--latency", type=float, default=20, help="ms per write")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    width, height = (int(value) for value in args.resolution.split("x"))
+    image = corpus.photo(width, height)
+    pyramid = TilePyramid(width, height)
+
+    cases = [
+        (
+            "from original",
+            0,
+            lambda storage: build_from_original(image, pyramid, storage, "a"),
+        ),
+        ("build_tiles", 0, lambda storage: build_tiles(image, pyramid, storage, "a")),
+        (
+            "build_tiles",
+            args.latency,
+            lambda storage: build_tiles(image, pyramid, storage, "a"),
+        ),
+        (
+            f"build_tiles x{args.workers}",
+            args.latency,
+            lambda storage: build_tiles(
+                image, pyramid, storage, "a", workers=args.workers
+            ),
+        ),
+    ]
+
+    print("%-20s %10s %8s %10s" % ("case", "latency", "tiles", "ms"))
+
+    for name, latency, run in cases:
+        storage = MemoryStorage(latency / 1000)
+        start = time.perf_counter()
+        count = run(storage)
+        seconds = time.perf_counter() - start
+        print("%-20s %10s %8d %10.0f" % (name, latency, count, seconds * 1000))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Compares storing an upload with request.form() and create_from against
+parse_upload, for a file that is stored and for one rejected for being larger
+than max_length.
+
+    python -m benchmarks.uploads
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+import typing
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import Response
+from starlette.routing import Route
+
+from starlette_files.constants import KB, MB
+from starlette_files.exceptions import MaximumAllowedFileLengthError
+from starlette_files.fields import FileAttachment
+from starlette_files.storages import FileSystemStorage
+from starlette_files.uploads import parse_upload
+
+
+class Upload(FileAttachment):
+    storage = FileSystemStorage(tempfile.mkdtemp())
+    allowed_content_types = ["application/pdf"]
+    max_length = 16 * MB
+
+
+async def form_endpoint(request):
+    form = await request.form()
+    try:
+        Upload.create_from(form["file"].file, form["file"].filename)
+    except MaximumAllowedFileLengthError:
+        return Response(status_code=413)
+    return Response(status_code=201)
+
+
+async def stream_endpoint(request):
+    try:
+        await parse_upload(request, {"file": Upload})
+    except MaximumAllowedFileLengthError:
+        return Response(status_code=413)
+    return Response(status_code=201)
+
+
+app = Starlette(
+    routes=[
+        Route("/form", form_endpoint, methods=["POST"]),
+        Route("/stream", stream_endpoint, methods=["POST"]),
+    ]
+)
+
+
+def encode_form(data: bytes) -> typing.Tuple[bytes, str]:
+    boundary = "benchmark-boundary"
+    body = (
+        (
+            f"--{boundary}\r\n"
+            'Content-Disposition: form-data; name="file"; filename="a.pdf"\r\n'
+            "Content-Type: application/pdf\r\n\r\n"
+        ).encode()
+        + data
+        + f"\r\n--{boundary}--\r\n".encode()
+    )
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+async def post(
+    url: str, data: bytes, chunk_size: int, repeat: int
+) -> typing.Tuple[int, float]:
+    body, content_type = encode_form(data)
+
+    # sent in chunks the size a server such as uvicorn receives them in
+    async def chunks():
+        for i in range(0, len(body), chunk_size):
+            yield body[i : i + chunk_size]
+
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://x") as client:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await client.post(
+                url, content=chunks(), headers={"content-type": content_type}
+            )
+            timings.append(time.perf_counter() - start)
+
+    return response.status_code, statistics.median(timings)
+
+
+def main(argv: typing.List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.uploads")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--size", type=int, default=8, help="MB stored")
+    parser.add_argument("--rejected", type=int, default=64, help="MB rejected")
+    parser.add_argument("--chunk", type=int, default=64, help="KB per chunk")
+    args = parser.parse_args(argv)
+
+    print("%-10s %-8s %8s %8s" % ("body", "endpoint", "status", "ms"))
+
+    for name, megabytes in [("stored", args.size), ("rejected", args.rejected)]:
+        data = b"%PDF-1.4\n" + b"0" * (megabytes * MB)
+
+        for url in ["/form", "/stream"]:
+            status, seconds = asyncio.run(post(url, data, args.chunk * KB, args.repeat))
+            print("%-10s %-8s %8d %8.1f" % (name, url, status, seconds * 1000))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,7 @@ from starlette_core.templating import Jinja2Templates
 from starlette_files.constants import MB
 from starlette_files.fields import ImageAttachment, ImageRenditionAttachment
 from starlette_files.storages import FileSystemStorage
+from starlette_files.uploads import parse_upload
 
 root_directory = "/tmp/starlette"
 dir_path = os.path.dirname(os.path.realpath(__file__))
@@ -82,10 +83,10 @@ class Homepage(HTTPEndpoint):
         return templates.TemplateResponse("home.html", {"request": request})
 
     async def post(self, request):
-        form = await request.form()
+        # the file is written to the storage as it arrives, not spooled first
+        form = await parse_upload(request, {"file": MyImage})
 
-        saved_file = MyImage.create_from(form["file"].file, form["file"].filename)
-        image = MyImageModel(file=saved_file)
+        image = MyImageModel(file=form["file"])
         image.save()
         
         return templates.TemplateResponse("image.html", {"request": request, "image": image})
@@ -79,7 +79,21 @@ setup(
         ],
         "image": [
             "Pillow",
-        ]
+        ],
+        "numpy": [
+            "numpy",
+        ],
+        "upload": [
+            "python-multipart",
+        ],
+        "zstd": [
+            "zstandard",
+        ],
+    },
+    entry_points={
+        "console_scripts": [
+            "starlette-files-worker = starlette_files.worker:main",
+        ],
     },
     classifiers=[
         "Development Status :: 3 - Alpha",
@@ -0,0 +1,179 @@
+import contextlib
+import gzip
+import typing
+import zlib
+
+from .exceptions import MissingDependencyError
+from .helpers import iter_stream
+from .image.negotiation import parse_accept
+from .storages.base import StorageWriter
+
+ENCODINGS = ["gzip", "zstd"]
+
+# the content types compressed by default, those that are already compressed
+# such as images, video and zip files would only get larger
+COMPRESSIBLE_CONTENT_TYPES = [
+    "text/*",
+    "application/json",
+    "application/ld+json",
+    "application/x-ndjson",
+    "application/xml",
+    "application/javascript",
+    "application/sql",
+    "application/x-sh",
+    "image/svg+xml",
+]
+
+
+def is_compressible(
+    content_type: str, content_types: typing.List[str] = COMPRESSIBLE_CONTENT_TYPES
+) -> bool:
+    """whether the content type matches one of the content types, ie 'text/*'"""
+
+    for pattern in content_types:
+        if pattern.endswith("/*"):
+            if content_type.startswith(pattern[:-1]):
+                return True
+        elif content_type == pattern:
+            return True
+
+    return False
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:  # pragma: no cover
+        raise MissingDependencyError(
+            "zstandard must be installed to use 'zstd' compression."
+        )
+
+    return zstandard
+
+
+def get_compressor(encoding: str, level: typing.Optional[int] = None):
+    """an object with compress and flush, the level is the codec's own"""
+
+    if encoding == "gzip":
+        # a wbits of 31 writes the gzip header and trailer
+        return zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+
+    if encoding == "zstd":
+        zstandard = _import_zstandard()
+        return zstandard.ZstdCompressor(
+            level=3 if level is None else level
+        ).compressobj()
+
+    raise ValueError("Encoding must be one of: %s" % ", ".join(ENCODINGS))
+
+
+class _GzipReader(gzip.GzipFile):
+    # the gzip file does not close a file object it is given
+    def __init__(self, source: typing.IO) -> None:
+        super().__init__(fileobj=source, mode="rb")
+        self.source = source
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self.source.close()
+
+
+def open_decompressed(source: typing.IO, encoding: str) -> typing.BinaryIO:
+    """
+    a file-like object reading the decompressed content of the source a chunk
+    at a time, closing it closes the source.
+    """
+
+    if encoding == "gzip":
+        return typing.cast(typing.BinaryIO, _GzipReader(source))
+
+    if encoding == "zstd":
+        zstandard = _import_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(source, closefd=True)
+
+    raise ValueError("Encoding must be one of: %s" % ", ".join(ENCODINGS))
+
+
+class CompressingWriter(StorageWriter):
+    """
+    Compresses the bytes written as they arrive and writes them to the
+    storage's writer, so the file is never held in memory uncompressed. The
+    bytes written are those before compression.
+    """
+
+    def __init__(
+        self, writer: StorageWriter, encoding: str, level: typing.Optional[int] = None
+    ) -> None:
+        super().__init__()
+        self.writer = writer
+        self.compressor = get_compressor(encoding, level)
+
+    def write(self, data: bytes) -> int:
+        compressed = self.compressor.compress(data)
+        if compressed:
+            self.writer.write(compressed)
+        return super().write(data)
+
+    def close(self) -> None:
+        super().close()
+
+        try:
+            self.writer.write(self.compressor.flush())
+            self.writer.close()
+        except BaseException:
+            # the file is not left part written, ie an s3 multipart upload. a
+            # writer may have aborted itself already, the original is raised
+            with contextlib.suppress(Exception):
+                self.writer.abort()
+            raise
+
+    def abort(self) -> None:
+        super().abort()
+        self.writer.abort()
+
+
+def accepts_encoding(accept_encoding: typing.Optional[str], encoding: str) -> bool:
+    """whether an accept-encoding header allows the encoding, ie 'gzip, br'"""
+
+    accepted = parse_accept(accept_encoding)
+
+    if encoding in accepted:
+        return accepted[encoding] > 0
+
+    return accepted.get("*", 0) > 0
+
+
+def file_response(request, attachment):
+    """
+    a starlette response streaming the attachment. a compressed file is sent
+    as it is stored, with the 'Content-Encoding' header, to clients that
+    accept its encoding and is decompressed for those that do not.
+    """
+
+    try:
+        from starlette.responses import StreamingResponse
+    except ImportError:  # pragma: no cover
+        raise MissingDependencyError(
+            "starlette must be installed to use 'file_response'."
+        )
+
+    encoding = attachment.content_encoding
+
+    if not encoding:
+        return StreamingResponse(
+            iter_stream(attachment.open), media_type=attachment.content_type
+        )
+
+    headers = {"Vary": "Accept-Encoding"}
+
+    if accepts_encoding(request.headers.get("accept-encoding"), encoding):
+        headers["Content-Encoding"] = encoding
+        source = attachment.open_stored
+    else:
+        source = attachment.open
+
+    return StreamingResponse(
+        iter_stream(source), media_type=attachment.content_type, headers=headers
+    )
@@ -27,3 +27,38 @@ class MaximumAllowedFileLengthError(Exception):
 
 class MissingDependencyError(Exception):
     pass
+
+
+class RenditionTimeoutError(Exception):
+    def __init__(self, timeout: float):
+        super().__init__("Rendition was not created within: %s seconds" % timeout)
+
+
+class MaximumAllowedPixelsError(Exception):
+    def __init__(self, max_pixels: int):
+        super().__init__("Cannot process images larger than: %d pixels" % max_pixels)
+
+
+class DecodeTimeoutError(Exception):
+    def __init__(self, timeout: float):
+        super().__init__("Image could not be decoded within: %s seconds" % timeout)
+
+
+class MultipartParseError(Exception):
+    pass
+
+
+class UploadNotFoundError(Exception):
+    def __init__(self, upload_id: str):
+        super().__init__("Upload not found: %s" % upload_id)
+
+
+class UploadOffsetError(Exception):
+    def __init__(self, offset: int):
+        super().__init__("Upload is at offset: %d" % offset)
+        self.offset = offset
+
+
+class UploadLockedError(Exception):
+    def __init__(self, upload_id: str):
+        super().__init__("Upload is being written by another request: %s" % upload_id)
@@ -1,27 +1,45 @@
+import contextlib
 import hashlib
-import io
 import time
 import typing
 import uuid
 
 from sqlalchemy.ext.mutable import MutableDict
 
-from .constants import MB
+from .compression import (
+    COMPRESSIBLE_CONTENT_TYPES,
+    CompressingWriter,
+    is_compressible,
+    open_decompressed,
+)
+from .constants import KB, MB
 from .exceptions import (
     ContentTypeValidationError,
     MaximumAllowedFileLengthError,
     MissingDependencyError,
 )
-from .helpers import get_length
+from .helpers import copy_stream, get_length_and_digest
+from .image import encoder, preview, saliency
+from .image.cache import RenditionCache, get_rendition_key, get_specs_key
 from .image.filter import ImageFilter
+from .image.limits import DecodeLimiter, check_pixels, estimate_memory
+from .image.queue import RenditionQueue
 from .image.rect import Rect
-from .mimetypes import guess_extension, magic_mime_from_buffer
+from .image.tiles import TilePyramid, build_tiles
+from .ingest import ImageIngest, Ingest, ResumableIngest
+from .instrumentation import timed
+from .mimetypes import (
+    guess_extension,
+    libmagic_mime_from_buffer,
+    signature_mime_from_buffer,
+)
 from .storages import Storage
+from .storages.base import StorageWriter
 
-try:
+if typing.TYPE_CHECKING:  # pragma: no cover
     from PIL import Image
-except ImportError:  # pragma: no cover
-    Image = None
+
+    from .image.executors import RenditionExecutor
 
 
 class FileAttachment(MutableDict):
@@ -30,9 +48,25 @@ class FileAttachment(MutableDict):
     directory: str = "files"
     allowed_content_types: typing.List[str] = []
     max_length = MB * 2
+    # called in order with the start of the file until one returns the type
+    mime_detectors: typing.List[typing.Callable[[bytes], typing.Optional[str]]] = [
+        signature_mime_from_buffer,
+        libmagic_mime_from_buffer,
+    ]
+    # used to store files arriving a chunk at a time, see ingest
+    ingest_class: typing.Type[Ingest] = Ingest
+    # used to store files uploaded over many requests, None when unsupported
+    resumable_ingest_class: typing.Optional[typing.Type[ResumableIngest]] = (
+        ResumableIngest
+    )
+    # 'gzip' or 'zstd' to store files of the compressible content types
+    # compressed, they are decompressed when opened. the level is the codec's
+    compression: typing.Optional[str] = None
+    compression_level: typing.Optional[int] = None
+    compressible_content_types: typing.List[str] = COMPRESSIBLE_CONTENT_TYPES
 
-    @staticmethod
-    def _guess_content_type(file: typing.IO) -> str:
+    @classmethod
+    def _guess_content_type(cls, file: typing.IO) -> str:
         content = file.read(1024)
 
         if isinstance(content, str):
@@ -40,7 +74,12 @@ class FileAttachment(MutableDict):
 
         file.seek(0)
 
-        return magic_mime_from_buffer(content)
+        for detector in cls.mime_detectors:
+            content_type = detector(content)
+            if content_type:
+                return content_type
+
+        return "application/octet-stream"
 
     def set_defaults(self, file: typing.IO, original_filename: str) -> None:
         unique_name = str(uuid.uuid4())
@@ -48,13 +87,21 @@ class FileAttachment(MutableDict):
         self.original_filename = original_filename
         self.uploaded_on = int(time.time())
 
-        # use python magic to get the content type
-        content_type = self._guess_content_type(file)
+        # use the magic numbers, or python magic, to get the content type
+        with timed("file.content_type") as timer:
+            content_type = self._guess_content_type(file)
+            timer.set(content_type=content_type)
+
         extension = guess_extension(content_type)
 
         self.content_type = content_type
         self.extension = extension
-        self.file_size = get_length(file)
+
+        # hashed in the same read as the size is measured
+        with timed("file.size") as timer:
+            self.file_size, self.content_digest = get_length_and_digest(file)
+            timer.set(bytes=self.file_size)
+
         self.saved_filename = f"{unique_name}{extension}"
 
     def validate(self) -> None:
@@ -70,12 +117,49 @@ class FileAttachment(MutableDict):
         instance = cls()
 
         instance.set_defaults(file, original_filename)
-        instance.validate()
 
-        instance.storage.put(instance.path, file)
+        with timed("file.validate", content_type=instance.content_type):
+            instance.validate()
+
+        if instance.should_compress:
+            file.seek(0)
+            with instance.open_writer() as writer:
+                copy_stream(file, writer, chunk_size=64 * KB)
+        else:
+            instance.storage.put(instance.path, file)
 
         return instance
 
+    @property
+    def should_compress(self) -> bool:
+        return bool(self.compression) and is_compressible(
+            self.content_type, self.compressible_content_types
+        )
+
+    def open_writer(self) -> StorageWriter:
+        """
+        opens a writer to store the file in the storage, compressing it when
+        it is one of the compressible content types.
+        """
+
+        writer = self.storage.open_writer(self.path, self.content_type)
+        compression = self.compression
+
+        if compression is None or not self.should_compress:
+            return writer
+
+        self.content_encoding = compression
+        return CompressingWriter(writer, compression, self.compression_level)
+
+    @classmethod
+    def ingest(cls, original_filename: str) -> Ingest:
+        """
+        returns an ingest to store a file as it arrives, ie from a request's
+        body, without it being spooled to a temporary file first.
+        """
+
+        return cls.ingest_class(cls, original_filename)
+
     @property
     def original_filename(self) -> str:
         return self.get("original_filename")
@@ -108,6 +192,24 @@ class FileAttachment(MutableDict):
     def file_size(self, value: int):
         self["file_size"] = value
 
+    @property
+    def content_digest(self) -> typing.Optional[str]:
+        """the sha256 of the file, None for files stored before it was added"""
+        return self.get("content_digest")
+
+    @content_digest.setter
+    def content_digest(self, value: str) -> None:
+        self["content_digest"] = value
+
+    @property
+    def content_encoding(self) -> typing.Optional[str]:
+        """the compression the file is stored with, None when stored as it is"""
+        return self.get("content_encoding")
+
+    @content_encoding.setter
+    def content_encoding(self, value: str) -> None:
+        self["content_encoding"] = value
+
     @property
     def content_type(self) -> str:
         return self.get("content_type")
@@ -134,6 +236,19 @@ class FileAttachment(MutableDict):
 
     @property
     def open(self) -> typing.IO:
+        """the file's content, decompressed as it is read if it was compressed"""
+
+        stream = self.storage.open(self.path)
+
+        if self.content_encoding:
+            return open_decompressed(stream, self.content_encoding)
+
+        return stream
+
+    @property
+    def open_stored(self) -> typing.IO:
+        """the bytes as stored, compressed with the content_encoding if set"""
+
         return self.storage.open(self.path)
 
 
@@ -141,10 +256,39 @@ class ImageAttachment(FileAttachment):
 
     directory: str = "images"
     allowed_content_types: typing.List[str] = ["image/jpeg", "image/png"]
+    rendition_class: typing.Optional[typing.Type["ImageRenditionAttachment"]] = None
+    ingest_class: typing.Type[Ingest] = ImageIngest
+    # the whole image is needed to set its size and placeholder
+    resumable_ingest_class = None
+    # images with more pixels are rejected before they are decoded
+    max_pixels: typing.Optional[int] = 100 * 1000 * 1000
+    # limits the memory used by the uploads and tiles decoded at the same time
+    decode_limiter: typing.Optional[DecodeLimiter] = None
+    # the resampling filter, ie 'bilinear', and reducing gap used when resizing
+    # renditions unless set in the filter spec, None for each operation's default
+    resample: typing.Optional[str] = None
+    reducing_gap: typing.Optional[float] = None
+    # the largest side of the inline placeholder, None to skip the placeholder
+    # and dominant colour when the image is uploaded
+    placeholder_size: typing.Optional[int] = 16
+    # only jpegs can be decoded reduced, other formats are decoded in full so
+    # are left out unless added here, ie ["JPEG", "PNG", "WEBP"]
+    placeholder_formats: typing.List[str] = ["JPEG"]
+    # when uploaded without a focal point one is found from the detail in a
+    # copy of the image this size, fill and crop then keep it in view
+    smart_focal_point: bool = False
+    smart_focal_point_size: int = 256
+    # the deep zoom tiles made by build_tiles
+    tile_size: int = 256
+    tile_overlap: int = 0
+    tile_format: str = "JPEG"
+    tile_workers: int = 1
 
     @classmethod
     def create_from(cls, file: typing.IO, original_filename: str) -> "ImageAttachment":
-        if Image is None:
+        try:
+            from PIL import Image
+        except ImportError:  # pragma: no cover
             raise MissingDependencyError(
                 "pillow must be installed to use the 'ImageAttachment' class."
             )
@@ -152,15 +296,207 @@ class ImageAttachment(FileAttachment):
         instance = cls()
 
         instance.set_defaults(file, original_filename)
-        instance.validate()
+
+        with timed("file.validate", content_type=instance.content_type):
+            instance.validate()
 
         with Image.open(file) as image:
-            instance.width, instance.height = image.size
+            instance.set_image_details(image)
 
         instance.storage.put(instance.path, file)
 
         return instance
 
+    def set_image_details(self, image: "Image.Image") -> None:
+        """
+        sets the size, focal point, placeholder and dominant colour from the
+        opened image, the size is checked using only the header before
+        anything is decoded.
+        """
+
+        check_pixels(image.size, self.max_pixels)
+        self.width, self.height = image.size
+
+        sizes = []
+
+        find_focal_point = self.smart_focal_point and self.get_focal_point() is None
+        if find_focal_point:
+            sizes.append(self.smart_focal_point_size)
+
+        placeholder_size = self.placeholder_size
+        if image.format not in self.placeholder_formats:
+            placeholder_size = None
+        if placeholder_size:
+            sizes.append(placeholder_size * 4)
+
+        if not sizes:
+            return
+
+        # jpegs are decoded reduced to the larger of the sizes, once for both,
+        # and the memory reserved is for the reduced size
+        image.draft("RGB", (max(sizes), max(sizes)))
+
+        with self._reserve_decode(image.size, image.mode):
+            if find_focal_point:
+                with timed("image.focal_point", format=image.format):
+                    self.set_smart_focal_point(image)
+
+            if placeholder_size:
+                with timed("image.placeholder", format=image.format):
+                    reduced = preview.reduce(image, placeholder_size * 4)
+                    self.dominant_color = preview.dominant_color(reduced)
+                    self.placeholder = preview.placeholder(reduced, placeholder_size)
+
+    def _reserve_decode(
+        self, size: typing.Tuple[int, int], mode: str = "RGB"
+    ) -> typing.ContextManager:
+        check_pixels(size, self.max_pixels)
+
+        if self.decode_limiter is None:
+            return contextlib.nullcontext()
+
+        return self.decode_limiter.reserve(estimate_memory(size, mode))
+
+    def set_smart_focal_point(self, image: "Image.Image") -> None:
+        """sets the focal point to the area of the image with the most detail"""
+
+        reduced = preview.reduce(image, self.smart_focal_point_size)
+        found = saliency.find_focal_point(reduced)
+
+        scale_x = self.width / reduced.width
+        scale_y = self.height / reduced.height
+
+        self.focal_point_x = int(found.left * scale_x)
+        self.focal_point_y = int(found.top * scale_y)
+        self.focal_point_width = int(found.width * scale_x)
+        self.focal_point_height = int(found.height * scale_y)
+
+    def srcset(
+        self,
+        widths: typing.List[int],
+        base_spec: typing.List[str] = [],
+        rendition_class: typing.Optional[
+            typing.Type["ImageRenditionAttachment"]
+        ] = None,
+    ) -> str:
+        """
+        returns a srcset attribute value for the image at each of the widths,
+        ie: '/renditions/a.jpeg 320w, /renditions/b.jpeg 640w'
+
+        widths larger than the original image are skipped as they cannot be
+        upscaled. all renditions are got or created in one batch using the
+        rendition_class given or the one set on the attachment.
+        """
+
+        rendition_class = rendition_class or self.rendition_class
+
+        if rendition_class is None:
+            raise ValueError(
+                "A rendition_class must be provided or set on the attachment."
+            )
+
+        ladder = sorted({width for width in widths if width <= self.width})
+
+        if not ladder:
+            ladder = [self.width]
+
+        renditions = rendition_class.get_or_create_many(
+            self, [[f"width-{width}"] + list(base_spec) for width in ladder]
+        )
+
+        return ", ".join(
+            f"{rendition.locate} {rendition.width}w" for rendition in renditions
+        )
+
+    def get_filter_defaults(self) -> dict:
+        """the options the filters creating renditions of the image start with"""
+
+        defaults: typing.Dict[str, typing.Any] = {}
+
+        if self.resample:
+            defaults["resample"] = self.resample
+        if self.reducing_gap:
+            defaults["reducing-gap"] = self.reducing_gap
+
+        return defaults
+
+    def build_tiles(self) -> TilePyramid:
+        """
+        builds a deep zoom tile pyramid of the image in its storage so viewers
+        only fetch the tiles in view, with a .dzi descriptor next to the tiles.
+        the original is decoded once and each level is made from the one
+        above it.
+        """
+
+        from PIL import Image
+
+        pyramid = TilePyramid(
+            self.width, self.height, self.tile_size, self.tile_overlap, self.tile_format
+        )
+
+        with self.open as original_file:
+            with Image.open(original_file) as image, self._reserve_decode(
+                image.size, image.mode
+            ):
+                build_tiles(
+                    image,
+                    pyramid,
+                    self.storage,
+                    self.tiles_base,
+                    workers=self.tile_workers,
+                )
+
+        with self.storage.open_writer(
+            f"{self.tiles_base}.dzi", "application/xml"
+        ) as writer:
+            writer.write(pyramid.descriptor().encode("utf-8"))
+
+        self["tiles"] = {
+            "tile_size": pyramid.tile_size,
+            "overlap": pyramid.overlap,
+            "format": pyramid.format,
+        }
+
+        return pyramid
+
+    @property
+    def tile_pyramid(self) -> typing.Optional[TilePyramid]:
+        """the layout of the tiles, None until build_tiles has been run"""
+
+        tiles = self.get("tiles")
+
+        if not tiles:
+            return None
+
+        return TilePyramid(
+            self.width,
+            self.height,
+            tiles["tile_size"],
+            tiles["overlap"],
+            tiles["format"],
+        )
+
+    @property
+    def tiles_base(self) -> str:
+        return f"{self.directory}/{self.saved_filename.rsplit('.', 1)[0]}"
+
+    def tile_path(self, level: int, column: int, row: int) -> str:
+        pyramid = self.tile_pyramid
+
+        if pyramid is None:
+            raise ValueError("The tiles have not been built, see 'build_tiles'.")
+
+        return pyramid.tile_path(self.tiles_base, level, column, row)
+
+    def locate_tile(self, level: int, column: int, row: int) -> str:
+        return self.storage.locate(self.tile_path(level, column, row))
+
+    @property
+    def locate_tiles(self) -> str:
+        """locates the .dzi descriptor viewers are given to open the tiles"""
+
+        return self.storage.locate(f"{self.tiles_base}.dzi")
+
     def get_focal_point(self) -> typing.Union[Rect, None]:
         if None in [
             self.focal_point_x,
@@ -193,6 +529,22 @@ class ImageAttachment(FileAttachment):
     def height(self, value: int) -> None:
         self["height"] = value
 
+    @property
+    def placeholder(self) -> typing.Optional[str]:
+        return self.get("placeholder")
+
+    @placeholder.setter
+    def placeholder(self, value: str) -> None:
+        self["placeholder"] = value
+
+    @property
+    def dominant_color(self) -> typing.Optional[str]:
+        return self.get("dominant_color")
+
+    @dominant_color.setter
+    def dominant_color(self, value: str) -> None:
+        self["dominant_color"] = value
+
     @property
     def focal_point_x(self) -> int:
         return self.get("focal_point_x")
@@ -230,11 +582,14 @@ class ImageAttachment(FileAttachment):
         """
         can be used in renditions to check if the original image has changed
         since the rendition was created to determine whether the rendition
-        needs to be recreated. 
+        needs to be recreated. renditions are named after it so their urls
+        change whenever the image or its focal point does.
         """
 
+        # images stored before the digest was added keep the key made from
+        # their size so their renditions are still used
         vary_fields = [
-            str(self.file_size),
+            self.content_digest or str(self.file_size),
             str(self.focal_point_x),
             str(self.focal_point_y),
             str(self.focal_point_width),
@@ -246,39 +601,335 @@ class ImageAttachment(FileAttachment):
 
 class ImageRenditionAttachment(FileAttachment):
     directory: str = "image-renditions"
-    focal_point = None
+    focal_point: typing.Optional[Rect] = None
+    cache: typing.Optional[RenditionCache] = None
+    executor: typing.Optional["RenditionExecutor"] = None
+    # renditions enqueued are created by worker processes taking from it
+    queue: typing.Optional[RenditionQueue] = None
+    # renditions that would be identical to the original are copied from it
+    # rather than decoded and encoded again, off by default as a copy keeps
+    # the original's metadata, ie the exif gps location
+    copy_unchanged: bool = False
+    # originals with more pixels are not decoded
+    max_pixels: typing.Optional[int] = 100 * 1000 * 1000
+    # limits the memory used by the originals decoded at the same time
+    decode_limiter: typing.Optional[DecodeLimiter] = None
 
     @classmethod
     def create_from(  # type: ignore
         cls, attachment: "ImageAttachment", filter_specs: typing.List[str] = []
+    ) -> "ImageRenditionAttachment":
+        return cls.create_many(attachment, [filter_specs])[0]
+
+    @classmethod
+    def create_many(
+        cls,
+        attachment: "ImageAttachment",
+        filter_specs_list: typing.List[typing.List[str]],
+    ) -> typing.List["ImageRenditionAttachment"]:
+        """
+        creates a rendition for each of the filter specs, the original image is
+        only opened and decoded once for all of them.
+        """
+
+        from PIL import Image
+
+        image_filters = [
+            ImageFilter(specs=filter_specs) for filter_specs in filter_specs_list
+        ]
+        renditions: typing.List[typing.Any] = [None] * len(image_filters)
+        pending = []
+        focal_point = attachment.get_focal_point()
+
+        for i, image_filter in enumerate(image_filters):
+            instance = cls()
+            instance.focal_point = focal_point
+
+            if cls._is_unchanged(attachment, instance, image_filter):
+                renditions[i] = cls._create_copy(attachment, instance, image_filter)
+            else:
+                pending.append(i)
+
+        if not pending:
+            return renditions
+
+        if cls.executor is not None:
+            size = (attachment.width or 0, attachment.height or 0)
+            with cls._reserve_decode(size):
+                created = cls._create_many_with_executor(
+                    attachment, [image_filters[i] for i in pending]
+                )
+        else:
+            with attachment.open as original_file:
+                with Image.open(original_file) as original_image:
+                    with cls._reserve_decode(original_image.size, original_image.mode):
+                        created = [
+                            cls._create_from_image(
+                                attachment, original_image, image_filters[i]
+                            )
+                            for i in pending
+                        ]
+
+        for i, instance in zip(pending, created):
+            renditions[i] = instance
+
+        return renditions
+
+    @classmethod
+    def _reserve_decode(
+        cls, size: typing.Tuple[int, int], mode: str = "RGB"
+    ) -> typing.ContextManager:
+        # checked from the header, or the stored size, before decoding
+        check_pixels(size, cls.max_pixels)
+
+        if cls.decode_limiter is None:
+            return contextlib.nullcontext()
+
+        return cls.decode_limiter.reserve(estimate_memory(size, mode))
+
+    @classmethod
+    def _is_unchanged(
+        cls,
+        attachment: "ImageAttachment",
+        instance: "ImageRenditionAttachment",
+        image_filter: ImageFilter,
+    ) -> bool:
+        # planned from the stored size and content type without opening the
+        # original, which older attachments may not have
+        if not cls.copy_unchanged or not attachment.width or not attachment.height:
+            return False
+
+        original_format = attachment.content_type.split("/")[-1].upper()
+        size = (attachment.width, attachment.height)
+
+        return image_filter.is_noop(
+            instance, size, original_format, attachment.get_filter_defaults()
+        )
+
+    @classmethod
+    def _create_copy(
+        cls,
+        attachment: "ImageAttachment",
+        instance: "ImageRenditionAttachment",
+        image_filter: ImageFilter,
+    ) -> "ImageRenditionAttachment":
+        original_format = attachment.content_type.split("/")[-1].upper()
+        size = (attachment.width, attachment.height)
+
+        instance.set_rendition_defaults(
+            attachment, original_format, size, image_filter.specs
+        )
+
+        if instance.storage is attachment.storage:
+            instance.storage.copy(attachment.path, instance.path, instance.content_type)
+        else:
+            with attachment.open as original_file:
+                with instance.storage.open_writer(
+                    instance.path, instance.content_type
+                ) as writer:
+                    copy_stream(original_file, writer, chunk_size=64 * KB)
+
+        instance.file_size = attachment.file_size
+
+        return instance
+
+    @classmethod
+    def _create_from_image(
+        cls,
+        attachment: "ImageAttachment",
+        original_image,
+        image_filter: ImageFilter,
     ) -> "ImageRenditionAttachment":
         instance = cls()
 
         instance.focal_point = attachment.get_focal_point()
 
-        filter_cls = ImageFilter(specs=filter_specs)
-
-        with attachment.open as original_file:
-            with Image.open(original_file) as original_image:
-                unique_name = str(uuid.uuid4())
-                generated_bytes = filter_cls.run(instance, original_image, io.BytesIO())
-                instance.cache_key = attachment.cache_key
-                instance.file_size = get_length(generated_bytes)
+        image, output_format, env = image_filter.process(
+            instance, original_image, attachment.get_filter_defaults()
+        )
 
-                with Image.open(generated_bytes) as generated_image:
-                    image_format = generated_image.format.lower()
-                    content_type = f"image/{image_format}"
-                    extension = guess_extension(content_type)
+        instance.set_rendition_defaults(
+            attachment, output_format, image.size, image_filter.specs
+        )
 
-                    instance.content_type = content_type
-                    instance.extension = extension
-                    instance.saved_filename = f"{unique_name}{extension}"
-                    instance.width, instance.height = generated_image.size
+        # encode straight into the storage rather than an intermediate buffer
+        with instance.storage.open_writer(
+            instance.path, instance.content_type
+        ) as writer:
+            encoder.save(image, writer, output_format, env)
 
-                    instance.storage.put(instance.path, generated_bytes)
+        instance.file_size = writer.bytes_written
 
         return instance
 
+    @classmethod
+    def _create_many_with_executor(
+        cls,
+        attachment: "ImageAttachment",
+        image_filters: typing.List[ImageFilter],
+    ) -> typing.List["ImageRenditionAttachment"]:
+        # send the path when the storage has one to save copying the bytes
+        source = attachment.storage.local_path(attachment.path)
+
+        if source is None:
+            with attachment.open as original_file:
+                source = original_file.read()
+
+        results = cls.executor.render_many(  # type: ignore
+            source,
+            image_filters,
+            attachment.get_focal_point(),
+            attachment.get_filter_defaults(),
+        )
+
+        renditions = []
+
+        for image_filter, result in zip(image_filters, results):
+            instance = cls()
+            instance.set_rendition_defaults(
+                attachment,
+                result.format,
+                (result.width, result.height),
+                image_filter.specs,
+            )
+
+            with instance.storage.open_writer(
+                instance.path, instance.content_type
+            ) as writer:
+                writer.write(result.data)
+
+            instance.file_size = writer.bytes_written
+            renditions.append(instance)
+
+        return renditions
+
+    def set_rendition_defaults(
+        self,
+        attachment: "ImageAttachment",
+        output_format: str,
+        size: typing.Tuple[int, int],
+        filter_specs: typing.Optional[typing.List[str]] = None,
+    ) -> None:
+        content_type = f"image/{output_format.lower()}"
+        extension = guess_extension(content_type)
+
+        if filter_specs is None:
+            name = str(uuid.uuid4())
+        else:
+            name = self.get_rendition_name(attachment, filter_specs)
+
+        self.cache_key = attachment.cache_key
+        self.content_type = content_type
+        self.extension = extension
+        self.saved_filename = f"{name}{extension}"
+        self.width, self.height = size
+
+    @classmethod
+    def get_rendition_name(
+        cls, attachment: "ImageAttachment", filter_specs: typing.List[str]
+    ) -> str:
+        """
+        returns the name the rendition is saved as, which is the same each time
+        it is created from the same image, focal point and filter specs. any
+        change to them gives a new name, so the rendition's url never serves
+        different content and can be cached as immutable.
+        """
+
+        original_name = attachment.saved_filename.rsplit(".", 1)[0]
+        # the same specs and defaults the rendition is cached against
+        vary_string = get_specs_key(attachment, filter_specs)
+        specs_key = hashlib.sha1(vary_string.encode("utf-8")).hexdigest()[:8]
+
+        return f"{original_name}-{attachment.cache_key}-{specs_key}"
+
+    @classmethod
+    def get_or_create(
+        cls, attachment: "ImageAttachment", filter_specs: typing.List[str] = []
+    ) -> "ImageRenditionAttachment":
+        """
+        returns the rendition from the cache when one has already been created
+        for the attachment and filter specs, otherwise creates it.
+        """
+
+        return cls.get_or_create_many(attachment, [filter_specs])[0]
+
+    @classmethod
+    def get_or_create_many(
+        cls,
+        attachment: "ImageAttachment",
+        filter_specs_list: typing.List[typing.List[str]],
+    ) -> typing.List["ImageRenditionAttachment"]:
+        """
+        same as get_or_create for each of the filter specs, any that are not
+        cached are created together using create_many.
+        """
+
+        return cls.lookup_many([(attachment, specs) for specs in filter_specs_list])
+
+    @classmethod
+    def lookup_many(
+        cls,
+        items: typing.List[typing.Tuple["ImageAttachment", typing.List[str]]],
+    ) -> typing.List["ImageRenditionAttachment"]:
+        """
+        same as get_or_create for each of the attachment and filter specs
+        pairs, so all of a page's renditions are found in the cache in one
+        call, ie:
+
+            renditions = ImageRenditionType.lookup_many(
+                [(image.file, ["width-320"]) for image in images]
+            )
+
+        those not cached are created with create_many, once per attachment.
+        """
+
+        if cls.cache is None:
+            cached: typing.List[typing.Optional[dict]] = [None] * len(items)
+            keys = []
+        else:
+            keys = [get_rendition_key(attachment, specs) for attachment, specs in items]
+            cached = cls.cache.lookup_many(keys)
+
+        renditions = [cls(rendition) if rendition else None for rendition in cached]
+
+        # the missing renditions of each original are created together
+        missing: typing.Dict[int, typing.List[int]] = {}
+        for i, rendition in enumerate(cached):
+            if rendition is None:
+                missing.setdefault(id(items[i][0]), []).append(i)
+
+        for indexes in missing.values():
+            attachment = items[indexes[0]][0]
+            created = cls.create_many(attachment, [items[i][1] for i in indexes])
+
+            for i, instance in zip(indexes, created):
+                if cls.cache is not None:
+                    cls.cache.set(keys[i], dict(instance))
+                renditions[i] = instance
+
+        return renditions  # type: ignore
+
+    @classmethod
+    def enqueue(
+        cls,
+        attachment: "ImageAttachment",
+        filter_specs_list: typing.List[typing.List[str]],
+    ) -> int:
+        """
+        queues a rendition of the attachment for each of the filter specs to be
+        created by a worker, ie when the image is uploaded. those already
+        queued are skipped.
+
+        :return: the number queued.
+        """
+
+        if cls.queue is None:
+            raise ValueError("%s has no queue to enqueue to" % cls.__name__)
+
+        return cls.queue.enqueue_many(
+            cls, [(attachment, specs) for specs in filter_specs_list]
+        )
+
     @property
     def width(self) -> int:
         return self.get("width")
@@ -1,10 +1,18 @@
+import hashlib
 import typing
 from io import BytesIO
 
 from .constants import KB
 
+if typing.TYPE_CHECKING:  # pragma: no cover
 
-def copy_stream(source, target: typing.IO, *, chunk_size: int = 16 * KB) -> int:
+    class Writable(typing.Protocol):
+        """a file, or a storage writer, the bytes are written to"""
+
+        def write(self, data: bytes) -> int: ...
+
+
+def copy_stream(source, target: "Writable", *, chunk_size: int = 16 * KB) -> int:
     length = 0
     while 1:
         buf = source.read(chunk_size)
@@ -18,3 +26,32 @@ def copy_stream(source, target: typing.IO, *, chunk_size: int = 16 * KB) -> int:
 def get_length(source: typing.IO) -> int:
     buffer = BytesIO()
     return copy_stream(source, buffer)
+
+
+def get_length_and_digest(
+    source: typing.IO, *, chunk_size: int = 64 * KB
+) -> typing.Tuple[int, str]:
+    """reads the stream once returning its length and sha256 hex digest"""
+
+    length = 0
+    digest = hashlib.sha256()
+    while 1:
+        buf = source.read(chunk_size)
+        if not buf:
+            break
+        if isinstance(buf, str):
+            buf = buf.encode()
+        length += len(buf)
+        digest.update(buf)
+    return length, digest.hexdigest()
+
+
+def iter_stream(
+    source: typing.IO, *, chunk_size: int = 64 * KB
+) -> typing.Iterator[bytes]:
+    with source:
+        while 1:
+            buf = source.read(chunk_size)
+            if not buf:
+                break
+            yield buf
@@ -0,0 +1,230 @@
+import io
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from ..exceptions import MissingDependencyError
+from ..instrumentation import timed
+from .encoder import DEFAULT_QUALITY, get_save_options
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from PIL import Image
+
+# the qualities tried, the lowest that meets the target is used
+SEARCH_QUALITIES = list(range(30, 100, 5))
+
+# the number of trial encodes run at once
+SEARCH_WORKERS = 4
+
+# the probe is a grid of patches taken from across the image at full size,
+# a downscaled copy has more detail per pixel and so compresses differently
+PROBE_GRID = 6
+PROBE_PATCH = 64
+
+# the constants from the SSIM paper for 8 bit images
+C1 = (0.01 * 255) ** 2
+C2 = (0.03 * 255) ** 2
+
+
+def _luminance(image: "Image.Image"):
+    try:
+        import numpy as np
+    except ImportError:  # pragma: no cover
+        raise MissingDependencyError("numpy must be installed to use 'quality-auto'.")
+
+    return np.asarray(image.convert("L"), dtype=np.float64)
+
+
+def _window_mean(values, size: int):
+    """the mean of each size x size window, using a summed area table"""
+
+    import numpy as np
+
+    table = values.cumsum(axis=0).cumsum(axis=1)
+    table = np.pad(table, ((1, 0), (1, 0)))
+    total = (
+        table[size:, size:]
+        - table[:-size, size:]
+        - table[size:, :-size]
+        + table[:-size, :-size]
+    )
+    return total / (size * size)
+
+
+def _moments(values, window: int):
+    mean = _window_mean(values, window)
+    return mean, _window_mean(values * values, window) - mean**2
+
+
+def _ssim(a, moments_a, b, window: int) -> float:
+    # the moments of the original are worked out once for all the trials
+    mean_a, var_a = moments_a
+    mean_b, var_b = _moments(b, window)
+    covariance = _window_mean(a * b, window) - mean_a * mean_b
+
+    similarity = ((2 * mean_a * mean_b + C1) * (2 * covariance + C2)) / (
+        (mean_a**2 + mean_b**2 + C1) * (var_a + var_b + C2)
+    )
+
+    return float(similarity.mean())
+
+
+def ssim(first: "Image.Image", second: "Image.Image", window: int = 7) -> float:
+    """
+    the mean structural similarity of the luminance of two images the same
+    size, 1 when they are identical.
+    """
+
+    a = _luminance(first)
+    return _ssim(a, _moments(a, window), _luminance(second), window)
+
+
+def is_adaptive(output_format: str, env: dict) -> bool:
+    """whether the quality should be searched for rather than set"""
+
+    if output_format not in DEFAULT_QUALITY:
+        return False
+
+    return "output-quality-target" in env or "output-max-bytes" in env
+
+
+def probe(image: "Image.Image") -> "Image.Image":
+    """a small image made of patches spread evenly over the image"""
+
+    from PIL import Image
+
+    size = PROBE_GRID * PROBE_PATCH
+
+    if image.width <= size and image.height <= size:
+        return image
+
+    patch_width = min(PROBE_PATCH, image.width)
+    patch_height = min(PROBE_PATCH, image.height)
+    result = Image.new(
+        image.mode, (PROBE_GRID * patch_width, PROBE_GRID * patch_height)
+    )
+
+    for row in range(PROBE_GRID):
+        for column in range(PROBE_GRID):
+            # aligned to the 16px blocks jpeg and webp are encoded in
+            left = (image.width - patch_width) * column // (PROBE_GRID - 1) // 16 * 16
+            top = (image.height - patch_height) * row // (PROBE_GRID - 1) // 16 * 16
+            patch = image.crop((left, top, left + patch_width, top + patch_height))
+            result.paste(patch, (column * patch_width, row * patch_height))
+
+    return result
+
+
+def _encode(image: "Image.Image", output_format: str, env: dict, quality: int):
+    output = io.BytesIO()
+    options = get_save_options(output_format, dict(env, **{"output-quality": quality}))
+    image.save(output, output_format, **options)
+    return output.getvalue()
+
+
+def _boundaries(
+    qualities: typing.List[int],
+    results: typing.Dict[int, typing.Any],
+    predicate: typing.Callable[[int], bool],
+) -> typing.Set[int]:
+    """the qualities between two tried either side of where predicate changes"""
+
+    tried = sorted(results)
+    between: typing.Set[int] = set()
+
+    for lower, upper in zip(tried, tried[1:]):
+        if predicate(lower) != predicate(upper):
+            between.update(value for value in qualities if lower < value < upper)
+
+    return between
+
+
+def choose_quality(image: "Image.Image", output_format: str, env: dict) -> int:
+    """
+    the lowest quality whose encode of the probe has an SSIM of at least the
+    target, that is also estimated to be no larger than the max bytes. with
+    only a max bytes it is the highest up to the quality that would otherwise
+    be used.
+
+    every third quality is tried first and then those where the result
+    changes. the trials are run in a thread pool as pillow releases the gil.
+    """
+
+    from PIL import Image
+
+    target = env.get("output-quality-target")
+    max_bytes = env.get("output-max-bytes")
+
+    qualities = SEARCH_QUALITIES
+    if target is None:
+        ceiling = env.get("output-quality", DEFAULT_QUALITY[output_format])
+        qualities = sorted({q for q in qualities if q < ceiling} | {ceiling})
+
+    sample = probe(image)
+    scale = (image.width * image.height) / (sample.width * sample.height)
+
+    if target is not None:
+        reference = _luminance(sample)
+        moments = _moments(reference, 7)
+
+    def trial(quality: int) -> typing.Tuple[int, float]:
+        data = _encode(sample, output_format, env, quality)
+        score = 1.0
+        if target is not None:
+            with Image.open(io.BytesIO(data)) as decoded:
+                score = _ssim(reference, moments, _luminance(decoded), 7)
+        return len(data), score
+
+    # the size and score of each quality tried
+    results: typing.Dict[int, typing.Tuple[int, float]] = {}
+
+    predicates = []
+    if target is not None:
+        predicates.append(lambda quality: results[quality][1] >= target)
+    if max_bytes is not None:
+        predicates.append(lambda quality: results[quality][0] * scale <= max_bytes)
+
+    with ThreadPoolExecutor(SEARCH_WORKERS) as executor:
+        first = sorted(set(qualities[::3]) | {qualities[-1]})
+        results.update(zip(first, executor.map(trial, first)))
+
+        between: typing.Set[int] = set()
+        for predicate in predicates:
+            between |= _boundaries(qualities, results, predicate)
+
+        results.update(zip(between, executor.map(trial, between)))
+
+    tried = sorted(results)
+    chosen = tried[-1]
+
+    if target is not None:
+        chosen = next((q for q in tried if predicates[0](q)), chosen)
+
+    if max_bytes is not None:
+        fits = [q for q in tried if predicates[-1](q)]
+        chosen = min(chosen, max(fits, default=tried[0]))
+
+    return chosen
+
+
+def encode(image: "Image.Image", output_format: str, env: dict) -> bytes:
+    """
+    encodes the image at the quality chosen from the probe. when there is a
+    max bytes and the estimate was too high the quality is lowered until it
+    fits, or the lowest quality is reached.
+    """
+
+    with timed("image.quality_search", format=output_format) as timer:
+        quality = choose_quality(image, output_format, env)
+        timer.set(quality=quality)
+
+    data = _encode(image, output_format, env, quality)
+    max_bytes = env.get("output-max-bytes")
+
+    while max_bytes is not None and len(data) > max_bytes:
+        lower = [value for value in SEARCH_QUALITIES if value < quality]
+        if not lower:
+            break
+        quality = lower[-1]
+        data = _encode(image, output_format, env, quality)
+
+    return data
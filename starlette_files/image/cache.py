@@ -0,0 +1,189 @@
+import contextlib
+import json
+import sqlite3
+import threading
+import typing
+from collections import OrderedDict
+
+from .filter import normalise_specs
+
+RenditionKey = typing.Tuple[str, str, str]
+
+
+def get_specs_key(attachment, filter_specs: typing.List[str]) -> str:
+    """
+    the filter specs as run and the defaults of the image, ie the resampling
+    filter, as both change the rendition created.
+    """
+
+    defaults = sorted(attachment.get_filter_defaults().items())
+    return "|".join(normalise_specs(filter_specs)) + repr(defaults)
+
+
+def get_rendition_key(attachment, filter_specs: typing.List[str]) -> RenditionKey:
+    """
+    the key a rendition is stored against, made up of the path of the
+    original image, its cache key and the specs key.
+    """
+
+    return (
+        attachment.path,
+        attachment.cache_key,
+        get_specs_key(attachment, filter_specs),
+    )
+
+
+class RenditionCache:
+    """
+    An in-process least recently used cache of renditions so a rendition
+    that has already been created for an image is not created again.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._items: "OrderedDict[RenditionKey, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: RenditionKey) -> typing.Optional[dict]:
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, key: RenditionKey, rendition: dict) -> None:
+        with self._lock:
+            self._items[key] = rendition
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key: RenditionKey) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def lookup_many(
+        self, keys: typing.List[RenditionKey]
+    ) -> typing.List[typing.Optional[dict]]:
+        """returns the rendition for each of the keys, None for those not cached"""
+
+        return [self.get(key) for key in keys]
+
+
+class RenditionIndex(RenditionCache):
+    """
+    Keeps the renditions in a sqlite database as well as the in-process cache,
+    so they are found after a restart and by every process on the host without
+    a query against the application's own database for each one. Use a
+    separate database for each rendition class.
+
+    :param path: the path of the database file.
+    :param max_size: the number of renditions kept in memory.
+    """
+
+    # sqlite allows 999 parameters in a query
+    batch_size = 900
+
+    def __init__(self, path: str, max_size: int = 1024) -> None:
+        super().__init__(max_size)
+        self.path = path
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS renditions ("
+                "path TEXT NOT NULL, "
+                "cache_key TEXT NOT NULL, "
+                "specs TEXT NOT NULL, "
+                "rendition TEXT NOT NULL, "
+                "PRIMARY KEY (path, cache_key, specs))"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> typing.Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get(self, key: RenditionKey) -> typing.Optional[dict]:
+        return self.lookup_many([key])[0]
+
+    def set(self, key: RenditionKey, rendition: dict) -> None:
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO renditions "
+                "(path, cache_key, specs, rendition) VALUES (?, ?, ?, ?)",
+                (*key, json.dumps(rendition)),
+            )
+
+        super().set(key, rendition)
+
+    def delete(self, key: RenditionKey) -> None:
+        with self._connect() as db:
+            db.execute(
+                "DELETE FROM renditions WHERE path = ? AND cache_key = ? AND specs = ?",
+                key,
+            )
+
+        super().delete(key)
+
+    def delete_stale(self, path: str, cache_key: str) -> int:
+        """
+        removes the renditions of the original at path made before its cache
+        key changed, ie when its focal point was moved.
+
+        :return: the number removed.
+        """
+
+        with self._connect() as db:
+            deleted = db.execute(
+                "DELETE FROM renditions WHERE path = ? AND cache_key != ?",
+                (path, cache_key),
+            ).rowcount
+
+        with self._lock:
+            for key in [key for key in self._items if key[0] == path]:
+                if key[1] != cache_key:
+                    del self._items[key]
+
+        return deleted
+
+    def lookup_many(
+        self, keys: typing.List[RenditionKey]
+    ) -> typing.List[typing.Optional[dict]]:
+        """
+        returns the rendition for each of the keys, those not in memory are
+        read from the database together in as few queries as possible.
+        """
+
+        found = [RenditionCache.get(self, key) for key in keys]
+        missing = list({keys[i] for i, rendition in enumerate(found) if not rendition})
+
+        if not missing:
+            return found
+
+        wanted = set(missing)
+        paths = list({key[0] for key in missing})
+        stored: typing.Dict[RenditionKey, dict] = {}
+
+        # every rendition of the originals is read using the primary key and
+        # those not wanted, ie other specs, are skipped
+        with self._connect() as db:
+            for i in range(0, len(paths), self.batch_size):
+                batch = paths[i : i + self.batch_size]
+                rows = db.execute(
+                    "SELECT path, cache_key, specs, rendition FROM renditions "
+                    "WHERE path IN (%s)" % ", ".join("?" * len(batch)),
+                    batch,
+                )
+                for path, cache_key, specs, rendition in rows:
+                    if (path, cache_key, specs) in wanted:
+                        stored[(path, cache_key, specs)] = json.loads(rendition)
+
+        for key, rendition in stored.items():
+            RenditionCache.set(self, key, rendition)
+
+        return [rendition or stored.get(key) for key, rendition in zip(keys, found)]
@@ -0,0 +1,125 @@
+import typing
+
+from ..instrumentation import timed
+from . import utils
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from PIL import Image
+
+    from ..helpers import Writable
+
+
+# the default quality used for each lossy format when not set by the filter
+DEFAULT_QUALITY = {"JPEG": 85, "WEBP": 80, "AVIF": 75}
+
+
+def is_format_supported(fmt: str) -> bool:
+    """
+    checks the installed pillow can save the format, avif needs either
+    pillow built with libavif or the pillow-avif-plugin installed.
+    """
+
+    try:
+        from PIL import Image
+    except ImportError:  # pragma: no cover
+        return False
+
+    if fmt.upper() == "AVIF":
+        try:
+            import pillow_avif  # noqa: F401
+        except ImportError:
+            pass
+
+    Image.init()
+
+    return fmt.upper() in Image.SAVE
+
+
+def get_save_options(output_format: str, env: dict) -> dict:
+    """
+    builds the keyword arguments passed to pillow's save from the options
+    set by the filter operations.
+    """
+
+    quality = env.get("output-quality", DEFAULT_QUALITY.get(output_format))
+
+    if output_format == "JPEG":
+        return {"quality": quality, "progressive": True, "optimize": True}
+
+    if output_format == "PNG":
+        if "output-compress-level" in env:
+            return {"compress_level": env["output-compress-level"]}
+        return {"optimize": True}
+
+    if output_format == "WEBP":
+        options = {"quality": quality}
+        if "output-effort" in env:
+            options["method"] = min(env["output-effort"], 6)
+        return options
+
+    if output_format == "AVIF":
+        options = {"quality": quality}
+        if "output-effort" in env:
+            options["speed"] = 10 - env["output-effort"]
+        return options
+
+    return {}
+
+
+def prepare(image: "Image.Image", output_format: str) -> "Image.Image":
+    """converts the image to a mode the output format can be saved in"""
+
+    if output_format == "JPEG":
+        return utils.flatten(utils.to_rgb(image))
+
+    if output_format in ["WEBP", "AVIF"] and image.mode not in ["RGB", "RGBA"]:
+        return image.convert("RGBA" if utils.has_alpha(image) else "RGB")
+
+    return image
+
+
+def quantize(image: "Image.Image", env: dict) -> "Image.Image":
+    """
+    reduces the image to a palette of the colours set by the filter, keeping
+    any transparency. dithering is only applied to images without alpha as
+    pillow can only dither to a palette in rgb.
+    """
+
+    from PIL import Image, features
+
+    colors = env["output-colors"]
+
+    if features.check("libimagequant"):
+        method = Image.Quantize.LIBIMAGEQUANT
+    else:
+        # much faster than median cut on photos for a similar size
+        method = Image.Quantize.FASTOCTREE
+
+    if utils.has_alpha(image):
+        return image.convert("RGBA").quantize(colors, method=method)
+
+    image = image.convert("RGB")
+    quantized = image.quantize(colors, method=method)
+
+    if not env.get("output-dither"):
+        return quantized
+
+    return image.quantize(palette=quantized, dither=Image.Dither.FLOYDSTEINBERG)
+
+
+def save(
+    image: "Image.Image", output: "Writable", output_format: str, env: dict
+) -> None:
+    from . import adaptive
+
+    with timed("image.encode", format=output_format) as timer:
+        image = prepare(image, output_format)
+        if output_format == "PNG" and "output-colors" in env:
+            image = quantize(image, env)
+        if adaptive.is_adaptive(output_format, env):
+            output.write(adaptive.encode(image, output_format, env))
+        else:
+            # pillow only writes to it, and flushes and tells where supported
+            fp = typing.cast(typing.IO[bytes], output)
+            image.save(fp, output_format, **get_save_options(output_format, env))
+        timer.set(width=image.width, height=image.height)
@@ -0,0 +1,254 @@
+import io
+import itertools
+import multiprocessing
+import multiprocessing.pool
+import queue
+import threading
+import time
+import typing
+
+from ..exceptions import RenditionTimeoutError
+from . import encoder
+from .filter import ImageFilter
+from .rect import Rect
+
+# either the bytes of the original image or a path to it on the file system
+Source = typing.Union[bytes, str]
+
+
+class RenditionResult:
+    """The encoded bytes of a rendition and its details"""
+
+    def __init__(self, data: bytes, image_format: str, width: int, height: int):
+        self.data = data
+        self.format = image_format
+        self.width = width
+        self.height = height
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+class RenditionTarget:
+    """Stands in for the rendition attachment when running the operations"""
+
+    def __init__(self, focal_point: typing.Optional[Rect]):
+        self.focal_point = focal_point
+
+
+def render(
+    source: Source,
+    image_filter: ImageFilter,
+    focal_point: typing.Optional[Rect],
+    defaults: dict = None,
+) -> RenditionResult:
+    """runs the filter on the source and returns the encoded result"""
+
+    from PIL import Image
+
+    fp = io.BytesIO(source) if isinstance(source, bytes) else source
+
+    with Image.open(fp) as original_image:
+        image, output_format, env = image_filter.process(
+            RenditionTarget(focal_point), original_image, defaults
+        )
+        output = io.BytesIO()
+        encoder.save(image, output, output_format, env)
+
+    return RenditionResult(output.getvalue(), output_format, *image.size)
+
+
+# set in each worker of a pool, the ids of the tasks are sent on it with the
+# time they start so the time spent queued is not counted
+_started: typing.Optional["multiprocessing.Queue"] = None
+
+
+def _init_worker(started: "multiprocessing.Queue") -> None:
+    global _started
+    _started = started
+
+
+def _render_task(task_id: int, *args) -> RenditionResult:
+    if _started is not None:
+        _started.put((task_id, time.time()))
+    return render(*args)
+
+
+class RenditionExecutor:
+    """
+    The base class for executors which create the renditions somewhere other
+    than the calling thread.
+    """
+
+    def render_many(
+        self,
+        source: Source,
+        image_filters: typing.List[ImageFilter],
+        focal_point: typing.Optional[Rect],
+        defaults: dict = None,
+    ) -> typing.List[RenditionResult]:
+        """
+        Should be overridden in inherited class and runs each of the filters on
+        the source returning the results in the same order.
+
+        :param source: the original image's bytes or path on the file system.
+        :param image_filters: the filters to run.
+        :param focal_point: the focal point of the original image.
+        :param defaults: the options the filters start with.
+        """
+        raise NotImplementedError()
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ProcessPoolRenditionExecutor(RenditionExecutor):
+    """
+    Creates renditions in a pool of worker processes so they are not limited
+    to the one core the calling process can use.
+
+    :param processes: the number of workers, defaults to the number of cores.
+    :param max_tasks_per_child: workers are replaced after this many renditions
+        to release any memory they have built up.
+    :param timeout: the seconds to wait for the renditions to start, and for
+        each to finish once it has started.
+    """
+
+    def __init__(
+        self,
+        processes: int = None,
+        max_tasks_per_child: int = 100,
+        timeout: float = 30,
+    ) -> None:
+        self.processes = processes
+        self.max_tasks_per_child = max_tasks_per_child
+        self.timeout = timeout
+        self._pool: typing.Optional[multiprocessing.pool.Pool] = None
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._started_queue: typing.Optional["multiprocessing.Queue"] = None
+        # the time each task waited on started, 0 while it is queued
+        self._started: typing.Dict[int, float] = {}
+
+    def _get_pool(self) -> multiprocessing.pool.Pool:
+        with self._lock:
+            if self._pool is None:
+                self._started_queue = multiprocessing.Queue()
+                self._pool = multiprocessing.Pool(
+                    self.processes,
+                    initializer=_init_worker,
+                    initargs=(self._started_queue,),
+                    maxtasksperchild=self.max_tasks_per_child,
+                )
+            return self._pool
+
+    def _started_on(self, task_ids: typing.List[int]) -> typing.Dict[int, float]:
+        """the times the tasks started in a worker, those queued are left out"""
+
+        with self._lock:
+            while self._started_queue is not None:
+                try:
+                    task_id, started_on = self._started_queue.get_nowait()
+                except queue.Empty:
+                    break
+                # tasks that are no longer waited on are not kept
+                if task_id in self._started:
+                    self._started[task_id] = started_on
+
+            return {
+                task_id: self._started[task_id]
+                for task_id in task_ids
+                if self._started.get(task_id)
+            }
+
+    def _recycle_pool(self, pool: multiprocessing.pool.Pool) -> None:
+        # replaces the pool when a rendition has timed out. other renditions
+        # still running are given the timeout to finish before the workers,
+        # including the one stuck on the rendition, are killed.
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+
+        pool.close()
+        timer = threading.Timer(self.timeout, pool.terminate)
+        timer.daemon = True
+        timer.start()
+
+    def render_many(
+        self,
+        source: Source,
+        image_filters: typing.List[ImageFilter],
+        focal_point: typing.Optional[Rect],
+        defaults: dict = None,
+    ) -> typing.List[RenditionResult]:
+        # building the operations validates the specs before anything is sent
+        for image_filter in image_filters:
+            image_filter.operations
+
+        pool = self._get_pool()
+        task_ids = [next(self._task_ids) for _ in image_filters]
+
+        with self._lock:
+            self._started.update((task_id, 0.0) for task_id in task_ids)
+
+        sent_on = time.time()
+        pending = [
+            pool.apply_async(
+                _render_task, (task_id, source, image_filter, focal_point, defaults)
+            )
+            for task_id, image_filter in zip(task_ids, image_filters)
+        ]
+
+        try:
+            for task_id, task in zip(task_ids, pending):
+                self._wait(pool, task_ids, task_id, task, sent_on)
+        finally:
+            with self._lock:
+                for task_id in task_ids:
+                    self._started.pop(task_id, None)
+
+        return [task.get() for task in pending]
+
+    def _wait(
+        self,
+        pool: multiprocessing.pool.Pool,
+        task_ids: typing.List[int],
+        task_id: int,
+        task,
+        sent_on: float,
+    ) -> None:
+        """
+        waits for the task. the renditions are given the timeout to start from
+        when they were sent, or from when the last of them started, and each
+        is given the timeout to finish once it has started.
+        """
+
+        while not task.ready():
+            started = self._started_on(task_ids)
+            now = time.time()
+
+            if task_id in started:
+                deadline = started[task_id] + self.timeout
+                if now >= deadline:
+                    # the rendition is stuck, the workers are replaced
+                    self._recycle_pool(pool)
+                    raise RenditionTimeoutError(self.timeout)
+            else:
+                deadline = max([sent_on, *started.values()]) + self.timeout
+                if now >= deadline:
+                    # still queued behind other renditions, the workers are
+                    # busy rather than stuck so the pool is left running
+                    raise RenditionTimeoutError(self.timeout)
+
+            # checked often enough to see when a queued rendition starts
+            task.wait(min(deadline - now, 0.1))
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+
+        if pool is not None:
+            pool.close()
+            pool.join()
@@ -1,7 +1,14 @@
 import typing
 
 from ..exceptions import InvalidImageOperationError
-from . import operations, utils
+from ..instrumentation import get_sink, timed
+from . import encoder, operations
+
+
+def normalise_specs(filter_specs: typing.List[str]) -> typing.List[str]:
+    """the specs without surrounding whitespace or empty specs"""
+
+    return [spec.strip() for spec in filter_specs if spec.strip()]
 
 
 class ImageFilter:
@@ -9,10 +16,19 @@ class ImageFilter:
     _registered_operations = None
 
     def __init__(self, specs: typing.List[str]):
-        self.specs = specs
+        # specs that differ only by whitespace create the same rendition
+        self.specs = normalise_specs(specs)
+        self._operations = None
 
     @property
     def operations(self):
+        # the operations are only built once so the filter can be compiled
+        # up front and sent elsewhere, ie to another process
+        if self._operations is None:
+            self._operations = self._build_operations()
+        return self._operations
+
+    def _build_operations(self):
         # search for operations
         self._search_for_operations()
 
@@ -32,27 +48,62 @@ class ImageFilter:
 
         return ops
 
-    def run(self, attachment, image, output):
+    def process(self, attachment, image, defaults: dict = None):
+        """
+        runs the operations on the image and returns the resulting image, the
+        format it should be saved in and the options set by the operations.
+        the defaults, ie the attachment's resampling filter, start the options.
+        """
+
         original_format = image.format
 
-        env = {"original-format": original_format}
+        env = dict(defaults or {}, **{"original-format": original_format})
+
+        # only decoded up front to time it apart from the operations, which
+        # otherwise decode the image when it is first needed
+        if get_sink() is not None:
+            with timed("image.decode", format=original_format) as timer:
+                image.load()
+                timer.set(width=image.width, height=image.height)
 
         for operation in self.operations:
-            image = operation.run(image, attachment, env) or image
+            with timed("image.operation", operation=operation.method) as timer:
+                image = operation.run(image, attachment, env) or image
+                timer.set(width=image.width, height=image.height)
 
         if "output-format" in env:
             output_format = env["output-format"].upper()
         else:
             output_format = original_format
 
-        if output_format == "JPEG":
-            image = utils.to_rgb(image)
-            image.save(
-                output, output_format, quality=85, progressive=True, optimize=True
-            )
+        return image, output_format, env
+
+    def is_noop(
+        self, attachment, size, original_format: str, defaults: dict = None
+    ) -> bool:
+        """
+        returns True if running the operations on an image of the given size
+        would leave it unchanged and it would be saved in its original format
+        with the default options, so the original can be used as it is.
+        """
+
+        defaults = defaults or {}
+        env = dict(defaults, **{"original-format": original_format})
+
+        for operation in self.operations:
+            if not operation.noop(size, attachment, env):
+                return False
+
+        output_format = env.pop("output-format", original_format).upper()
+        env.pop("original-format")
+
+        # any other options change how the image is encoded
+        return output_format == original_format and env == defaults
+
+    def run(self, attachment, image, output, defaults: dict = None):
+        image, output_format, env = self.process(attachment, image, defaults)
 
-        elif output_format == "PNG":
-            image.save(output, output_format, optimize=True)
+        encoder.save(image, output, output_format, env)
 
         return output
 
@@ -71,6 +122,11 @@ class ImageFilter:
             ("crop", operations.CropOperation),
             ("scale", operations.ScaleOperation),
             ("format", operations.FormatOperation),
+            ("quality", operations.QualityOperation),
+            ("maxbytes", operations.MaxBytesOperation),
+            ("compress", operations.CompressOperation),
+            ("colors", operations.ColorsOperation),
+            ("effort", operations.EffortOperation),
         ]
 
         cls._registered_operations = dict(registered)
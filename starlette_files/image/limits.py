@@ -0,0 +1,94 @@
+import collections
+import contextlib
+import threading
+import typing
+
+from ..exceptions import DecodeTimeoutError, MaximumAllowedPixelsError
+from ..instrumentation import timed
+
+# the bytes pillow uses for each pixel of the modes it stores in a single
+# byte or two, every other mode uses four.
+MODE_BYTES = {"1": 1, "L": 1, "P": 1, "I;16": 2, "I;16B": 2, "I;16L": 2}
+
+
+def check_pixels(
+    size: typing.Tuple[int, int], max_pixels: typing.Optional[int]
+) -> None:
+    """raises an error if an image of the size is over the maximum pixels"""
+
+    if max_pixels is not None and size[0] * size[1] > max_pixels:
+        raise MaximumAllowedPixelsError(max_pixels)
+
+
+def estimate_memory(size: typing.Tuple[int, int], mode: str = "RGB") -> int:
+    """returns the bytes an image of the size and mode takes once decoded"""
+
+    return size[0] * size[1] * MODE_BYTES.get(mode, 4)
+
+
+class DecodeLimiter:
+    """
+    Limits the memory used by the images being decoded at the same time. Each
+    decode reserves the memory it is estimated to need and waits, in the order
+    they arrived, until that much is free.
+
+    A single image needing more than the maximum is allowed once nothing else
+    is being decoded so it does not wait forever.
+
+    :param max_memory: the bytes that can be reserved at the same time.
+    :param timeout: the seconds to wait before giving up, default forever.
+    """
+
+    def __init__(self, max_memory: int, timeout: typing.Optional[float] = None):
+        self.max_memory = max_memory
+        self.timeout = timeout
+        self.reserved = 0
+        self._condition = threading.Condition()
+        self._waiting: typing.Deque[object] = collections.deque()
+
+    def _can_reserve(self, ticket: object, memory: int) -> bool:
+        if self._waiting[0] is not ticket:
+            return False
+        return self.reserved == 0 or self.reserved + memory <= self.max_memory
+
+    def acquire(self, memory: int) -> None:
+        ticket = object()
+
+        with timed("image.decode_wait", bytes=memory), self._condition:
+            self._waiting.append(ticket)
+
+            reserved = self._condition.wait_for(
+                lambda: self._can_reserve(ticket, memory), self.timeout
+            )
+
+            self._waiting.remove(ticket)
+
+            if reserved:
+                self.reserved += memory
+
+            # the next in line may now be able to reserve its memory
+            self._condition.notify_all()
+
+        # only given up on when there is a timeout
+        if not reserved and self.timeout is not None:
+            raise DecodeTimeoutError(self.timeout)
+
+    def release(self, memory: int) -> None:
+        with self._condition:
+            self.reserved -= memory
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def reserve(self, memory: int) -> typing.Iterator[None]:
+        """
+        reserves the memory for the block:
+
+            with limiter.reserve(estimate_memory(image.size, image.mode)):
+                image.load()
+        """
+
+        self.acquire(memory)
+        try:
+            yield
+        finally:
+            self.release(memory)
@@ -0,0 +1,168 @@
+import typing
+
+from ..exceptions import MissingDependencyError
+from ..helpers import iter_stream
+from .encoder import is_format_supported
+
+# formats in order of preference, smallest output first
+NEGOTIABLE_FORMATS = ["avif", "webp"]
+
+# a rendition's name changes with its content, so it is never revalidated
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def parse_accept(accept: typing.Optional[str]) -> typing.Dict[str, float]:
+    """
+    parses an accept header into a dict of media type to quality, ie:
+    'image/webp,image/*;q=0.8' gives {'image/webp': 1.0, 'image/*': 0.8}
+    """
+
+    accepted: typing.Dict[str, float] = {}
+
+    for part in (accept or "").split(","):
+        media_type, *params = [p.strip() for p in part.split(";")]
+
+        if not media_type:
+            continue
+
+        quality = 1.0
+
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        accepted[media_type.lower()] = quality
+
+    return accepted
+
+
+def choose_format(
+    accept: typing.Optional[str], formats: typing.List[str] = NEGOTIABLE_FORMATS
+) -> typing.Optional[str]:
+    """
+    returns the first of the formats the client explicitly accepts and
+    pillow is able to save. wildcards such as 'image/*' are ignored as
+    browsers only list the modern formats they actually support.
+    """
+
+    accepted = parse_accept(accept)
+
+    for fmt in formats:
+        if accepted.get(f"image/{fmt}", 0) > 0 and is_format_supported(fmt):
+            return fmt
+
+    return None
+
+
+def negotiate_specs(
+    filter_specs: typing.List[str],
+    accept: typing.Optional[str],
+    formats: typing.List[str] = NEGOTIABLE_FORMATS,
+) -> typing.List[str]:
+    """
+    returns the filter specs with the output format replaced by the best
+    format for the client. when the client accepts none of the formats the
+    specs are returned unchanged so the output is the format the specs
+    would otherwise produce, usually jpeg.
+    """
+
+    fmt = choose_format(accept, formats)
+
+    if fmt is None:
+        return list(filter_specs)
+
+    specs = [spec for spec in filter_specs if not spec.startswith("format-")]
+    specs.append(f"format-{fmt}")
+    return specs
+
+
+def negotiate_rendition(
+    rendition_cls,
+    attachment,
+    filter_specs: typing.List[str],
+    accept: typing.Optional[str],
+    formats: typing.List[str] = NEGOTIABLE_FORMATS,
+):
+    """
+    gets or creates the rendition of the attachment in the best format for
+    the client. any response using it should include the 'Vary: Accept' header.
+    """
+
+    specs = negotiate_specs(filter_specs, accept, formats)
+    return rendition_cls.get_or_create(attachment, specs)
+
+
+def matches_etag(if_none_match: typing.Optional[str], etag: str) -> bool:
+    """
+    whether an if-none-match header, a list of etags or '*', includes the
+    etag. weak etags, ie 'W/"abc"', match as only the name is compared.
+    """
+
+    for value in (if_none_match or "").split(","):
+        value = value.strip()
+        if value == "*":
+            return True
+        if value.startswith("W/"):
+            value = value[2:]
+        if value == etag:
+            return True
+
+    return False
+
+
+async def rendition_response(
+    request,
+    rendition_cls,
+    attachment,
+    filter_specs: typing.List[str],
+    formats: typing.List[str] = NEGOTIABLE_FORMATS,
+    cache_control: typing.Optional[str] = IMMUTABLE_CACHE_CONTROL,
+):
+    """
+    a starlette response streaming the negotiated rendition with the
+    'Vary: Accept' header set so caches store each format separately. the
+    rendition's name is sent as its etag, a request that already has it is
+    answered with a 304 before the rendition is looked up or created.
+
+    the response is cached as immutable by default, pass a shorter
+    cache_control, or None, when the url stays the same as the image changes.
+
+    the rendition is looked up, or created, in a thread so the event loop is
+    not blocked. without a cache on the rendition class it is created again
+    for every request that is not answered with a 304.
+    """
+
+    try:
+        from starlette.concurrency import run_in_threadpool
+        from starlette.responses import Response, StreamingResponse
+    except ImportError:  # pragma: no cover
+        raise MissingDependencyError(
+            "starlette must be installed to use 'rendition_response'."
+        )
+
+    specs = negotiate_specs(filter_specs, request.headers.get("accept"), formats)
+
+    # the name changes with the original, the focal point and the specs, and
+    # is known without creating the rendition
+    etag = f'"{rendition_cls.get_rendition_name(attachment, specs)}"'
+    headers = {"Vary": "Accept", "ETag": etag}
+
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+
+    if matches_etag(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    def open_rendition():
+        rendition = rendition_cls.get_or_create(attachment, specs)
+        return rendition, rendition.open
+
+    rendition, stream = await run_in_threadpool(open_rendition)
+
+    return StreamingResponse(
+        iter_stream(stream), media_type=rendition.content_type, headers=headers
+    )
@@ -1,7 +1,13 @@
+from .colors import ColorsOperation
+from .compress import CompressOperation
 from .crop import CropOperation
 from .do_nothing import DoNothingOperation
+from .effort import EffortOperation
 from .fill import FillOperation
 from .format import FormatOperation
+from .max_bytes import MaxBytesOperation
 from .min_max import MinMaxOperation
+from .quality import QualityOperation
+from .resize import ResizeOperation
 from .scale import ScaleOperation
 from .width_height import WidthHeightOperation
@@ -1,11 +1,10 @@
 import inspect
+import typing
 
 from ...exceptions import InvalidFilterSpecError
 
-try:
+if typing.TYPE_CHECKING:  # pragma: no cover
     from PIL import Image
-except ImportError:  # pragma: no cover
-    Image = None
 
 
 class Operation:
@@ -28,5 +27,13 @@ class Operation:
     def construct(self, *args):
         raise NotImplementedError()
 
-    def run(self, pillow, attachment, env: dict) -> Image:
+    def run(self, pillow, attachment, env: dict) -> "Image.Image":
         raise NotImplementedError()
+
+    def noop(self, size: typing.Tuple[int, int], attachment, env: dict) -> bool:
+        """
+        Can be overridden in inherited class and returns True if running on an
+        image of the given size would leave its pixels unchanged, any options
+        the operation sets on env should still be set.
+        """
+        return False
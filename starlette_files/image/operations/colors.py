@@ -0,0 +1,25 @@
+from .base import Operation
+
+
+class ColorsOperation(Operation):
+
+    dithers = ["dither", "nodither"]
+
+    def construct(self, colors, dither="nodither"):
+        self.colors = int(colors)
+
+        if not 2 <= self.colors <= 256:
+            raise ValueError("Colors must be a number between 2 and 256")
+
+        if dither not in self.dithers:
+            raise ValueError("Dither must be one of: %s" % ", ".join(self.dithers))
+
+        self.dither = dither == "dither"
+
+    def run(self, pillow, attachment, env):
+        env["output-colors"] = self.colors
+        env["output-dither"] = self.dither
+
+    def noop(self, size, attachment, env):
+        self.run(None, attachment, env)
+        return True
@@ -0,0 +1,16 @@
+from .base import Operation
+
+
+class CompressOperation(Operation):
+    def construct(self, level):
+        self.level = int(level)
+
+        if not 0 <= self.level <= 9:
+            raise ValueError("Compress level must be a number between 0 and 9")
+
+    def run(self, pillow, attachment, env):
+        env["output-compress-level"] = self.level
+
+    def noop(self, size, attachment, env):
+        self.run(None, attachment, env)
+        return True
@@ -33,3 +33,6 @@ class CropOperation(Operation):
             pillow = pillow.crop(focal_point)
 
         return pillow
+
+    def noop(self, size, attachment, env):
+        return not hasattr(self, "left") and attachment.focal_point is None
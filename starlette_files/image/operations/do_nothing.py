@@ -7,3 +7,6 @@ class DoNothingOperation(Operation):
 
     def run(self, pillow, attachment, env):
         pass
+
+    def noop(self, size, attachment, env):
+        return True
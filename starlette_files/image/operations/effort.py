@@ -0,0 +1,16 @@
+from .base import Operation
+
+
+class EffortOperation(Operation):
+    def construct(self, effort):
+        self.effort = int(effort)
+
+        if not 0 <= self.effort <= 10:
+            raise ValueError("Effort must be a number between 0 and 10")
+
+    def run(self, pillow, attachment, env):
+        env["output-effort"] = self.effort
+
+    def noop(self, size, attachment, env):
+        self.run(None, attachment, env)
+        return True
@@ -1,12 +1,28 @@
+from ..encoder import is_format_supported
 from .base import Operation
 
 
 class FormatOperation(Operation):
+
+    formats = ["jpeg", "png", "png8", "webp", "avif"]
+
     def construct(self, fmt):
-        self.format = fmt
+        if fmt not in self.formats:
+            raise ValueError("Format must be one of: %s" % ", ".join(self.formats))
+
+        # png8 is a png quantized to 256 colours unless set by colors
+        self.format = "png" if fmt == "png8" else fmt
+        self.colors = 256 if fmt == "png8" else None
 
-        if self.format not in ["jpeg", "png"]:
-            raise ValueError("Format must be either 'jpeg' or 'png'")
+        if not is_format_supported(self.format):
+            raise ValueError("Format '%s' is not supported by pillow" % self.format)
 
     def run(self, pillow, attachment, env):
         env["output-format"] = self.format
+
+        if self.colors:
+            env.setdefault("output-colors", self.colors)
+
+    def noop(self, size, attachment, env):
+        self.run(None, attachment, env)
+        return True
@@ -0,0 +1,16 @@
+from .base import Operation
+
+
+class MaxBytesOperation(Operation):
+    def construct(self, max_bytes):
+        self.max_bytes = int(max_bytes)
+
+        if self.max_bytes < 1:
+            raise ValueError("Max bytes must be a number greater than 0")
+
+    def run(self, pillow, attachment, env):
+        env["output-max-bytes"] = self.max_bytes
+
+    def noop(self, size, attachment, env):
+        self.run(None, attachment, env)
+        return True
@@ -1,18 +1,16 @@
 from ..utils import to_rgb
-from .base import Operation
+from .resize import ResizeOperation
 
-try:
-    from PIL import Image
-except ImportError:  # pragma: no cover
-    Image = None
 
-
-class MinMaxOperation(Operation):
-    def construct(self, size):
+class MinMaxOperation(ResizeOperation):
+    def construct(self, size, *extra):
         width_str, height_str = size.split("x")
         self.width = int(width_str)
         self.height = int(height_str)
 
+        for extra_part in self.construct_resize_options(extra):
+            raise ValueError("Unrecognised filter spec part: %s" % extra_part)
+
     def run(self, pillow, attachment, env):
         image_width, image_height = pillow.size
 
@@ -48,4 +46,15 @@ class MinMaxOperation(Operation):
         # convert 1 and P images to RGB to improve resize quality
         pillow = to_rgb(pillow)
 
-        return pillow.resize((width, height), Image.ANTIALIAS)
+        return self.resize(pillow, (width, height), env)
+
+    def noop(self, size, attachment, env):
+        image_width, image_height = size
+
+        if self.method == "min":
+            return image_width <= self.width or image_height <= self.height
+
+        if self.method == "max":
+            return image_width <= self.width and image_height <= self.height
+
+        return True
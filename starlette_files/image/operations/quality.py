@@ -0,0 +1,33 @@
+from .base import Operation
+
+# the SSIM the probe must reach with quality-auto when no target is given
+DEFAULT_QUALITY_TARGET = 97
+
+
+class QualityOperation(Operation):
+    def construct(self, quality, target=None):
+        if quality == "auto":
+            self.quality = None
+            self.target = int(target or DEFAULT_QUALITY_TARGET)
+
+            if not 1 <= self.target <= 100:
+                raise ValueError("Quality target must be a number between 1 and 100")
+            return
+
+        if target is not None:
+            raise ValueError("A target can only be given with quality-auto")
+
+        self.quality = int(quality)
+
+        if not 1 <= self.quality <= 100:
+            raise ValueError("Quality must be a number between 1 and 100")
+
+    def run(self, pillow, attachment, env):
+        if self.quality is None:
+            env["output-quality-target"] = self.target / 100
+        else:
+            env["output-quality"] = self.quality
+
+    def noop(self, size, attachment, env):
+        self.run(None, attachment, env)
+        return True
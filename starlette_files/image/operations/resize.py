@@ -0,0 +1,58 @@
+import typing
+
+from .base import Operation
+
+# the resampling filters that can be chosen with -r<filter>
+RESAMPLE_FILTERS = ["nearest", "box", "bilinear", "hamming", "bicubic", "lanczos"]
+
+
+class ResizeOperation(Operation):
+    """
+    The base class for operations that resize the image. The resampling filter
+    and pillow's reducing gap can be set with the spec parts -r<filter> and
+    -gap<n>, ie 'width-400-rbilinear-gap2', otherwise the defaults in env are
+    used, set from the attachment.
+    """
+
+    # the filter used when not set by the spec or env, None for pillow's default
+    default_resample: typing.Optional[str] = "lanczos"
+
+    def construct_resize_options(self, extra: typing.Sequence[str]) -> typing.List[str]:
+        """parses the resize options and returns the parts left over"""
+
+        self.resample = None
+        self.reducing_gap = None
+
+        remaining = []
+
+        for extra_part in extra:
+            if extra_part.startswith("gap"):
+                self.reducing_gap = float(extra_part[3:])
+                if self.reducing_gap < 1:
+                    raise ValueError("Reducing gap must be 1 or more")
+            elif extra_part.startswith("r"):
+                self.resample = extra_part[1:]
+                if self.resample not in RESAMPLE_FILTERS:
+                    raise ValueError(
+                        "Resample filter must be one of: %s"
+                        % ", ".join(RESAMPLE_FILTERS)
+                    )
+            else:
+                remaining.append(extra_part)
+
+        return remaining
+
+    def resize(self, pillow, size: typing.Tuple[int, int], env: dict):
+        from PIL import Image
+
+        resample = self.resample or env.get("resample") or self.default_resample
+        reducing_gap = self.reducing_gap or env.get("reducing-gap")
+
+        options: typing.Dict[str, typing.Any] = {}
+
+        if resample:
+            options["resample"] = getattr(Image, resample.upper())
+        if reducing_gap:
+            options["reducing_gap"] = reducing_gap
+
+        return pillow.resize(size, **options)
@@ -1,10 +1,17 @@
-from .base import Operation
+from .resize import ResizeOperation
 
 
-class ScaleOperation(Operation):
-    def construct(self, percent):
+class ScaleOperation(ResizeOperation):
+
+    # uses pillow's default filter unless one is chosen
+    default_resample = None
+
+    def construct(self, percent, *extra):
         self.percent = float(percent)
 
+        for extra_part in self.construct_resize_options(extra):
+            raise ValueError("Unrecognised filter spec part: %s" % extra_part)
+
     def run(self, pillow, attachment, env):
         image_width, image_height = pillow.size
 
@@ -12,4 +19,7 @@ class ScaleOperation(Operation):
         width = int(image_width * scale)
         height = int(image_height * scale)
 
-        return pillow.resize((width, height))
+        return self.resize(pillow, (width, height), env)
+
+    def noop(self, size, attachment, env):
+        return self.percent == 100
@@ -1,16 +1,14 @@
 from ..utils import to_rgb
-from .base import Operation
+from .resize import ResizeOperation
 
-try:
-    from PIL import Image
-except ImportError:  # pragma: no cover
-    Image = None
 
-
-class WidthHeightOperation(Operation):
-    def construct(self, size):
+class WidthHeightOperation(ResizeOperation):
+    def construct(self, size, *extra):
         self.size = int(size)
 
+        for extra_part in self.construct_resize_options(extra):
+            raise ValueError("Unrecognised filter spec part: %s" % extra_part)
+
     def run(self, pillow, attachment, env):
         image_width, image_height = pillow.size
 
@@ -39,4 +37,15 @@ class WidthHeightOperation(Operation):
         # convert 1 and P images to RGB to improve resize quality
         pillow = to_rgb(pillow)
 
-        return pillow.resize((width, height), Image.ANTIALIAS)
+        return self.resize(pillow, (width, height), env)
+
+    def noop(self, size, attachment, env):
+        image_width, image_height = size
+
+        if self.method == "width":
+            return image_width <= self.size
+
+        if self.method == "height":
+            return image_height <= self.size
+
+        return True
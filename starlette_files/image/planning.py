@@ -0,0 +1,217 @@
+import typing
+
+from ..exceptions import MissingDependencyError
+from .rect import Rect, clamp_box, cover_box, round_box
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    import numpy
+
+
+def fill_crop_box(
+    image_size: typing.Tuple[int, int],
+    target_size: typing.Tuple[int, int],
+    focal_point: typing.Optional[Rect] = None,
+    crop_closeness: float = 0,
+) -> Rect:
+    """
+    returns the box to crop from an image so it fills the target size, zoomed
+    in towards the focal point by the crop closeness between 0 and 1.
+    """
+
+    image_width, image_height = image_size
+    width, height = target_size
+
+    # Get crop aspect ratio
+    crop_aspect_ratio = width / height
+
+    # Get crop max
+    crop_max_scale = min(image_width, image_height * crop_aspect_ratio)
+    crop_max_width = crop_max_scale
+    crop_max_height = crop_max_scale / crop_aspect_ratio
+
+    # Initialise crop width and height to max
+    crop_width = crop_max_width
+    crop_height = crop_max_height
+
+    # Use crop closeness to zoom in
+    if focal_point is not None:
+        # Get crop min
+        crop_min_scale = max(focal_point.width, focal_point.height * crop_aspect_ratio)
+        crop_min_width = crop_min_scale
+        crop_min_height = crop_min_scale / crop_aspect_ratio
+
+        # Sometimes, the focal point may be bigger than the image...
+        if not crop_min_scale >= crop_max_scale:
+            # Calculate max crop closeness to prevent upscaling
+            max_crop_closeness = max(
+                1 - (width - crop_min_width) / (crop_max_width - crop_min_width),
+                1 - (height - crop_min_height) / (crop_max_height - crop_min_height),
+            )
+
+            # Apply max crop closeness
+            crop_closeness = min(crop_closeness, max_crop_closeness)
+
+            if 1 >= crop_closeness >= 0:
+                # Get crop width and height
+                crop_width = (
+                    crop_max_width + (crop_min_width - crop_max_width) * crop_closeness
+                )
+                crop_height = (
+                    crop_max_height
+                    + (crop_min_height - crop_max_height) * crop_closeness
+                )
+
+        fp_x, fp_y = focal_point.centroid
+    else:
+        # Fall back to positioning in the centre
+        fp_x = image_width / 2
+        fp_y = image_height / 2
+
+    fp_u = fp_x / image_width
+    fp_v = fp_y / image_height
+
+    # Position crop box based on focal point UV
+    crop_x = fp_x - (fp_u - 0.5) * crop_width
+    crop_y = fp_y - (fp_v - 0.5) * crop_height
+
+    # Convert crop box into a box, a plain tuple until it is returned
+    box = (
+        crop_x - crop_width / 2,
+        crop_y - crop_height / 2,
+        crop_x + crop_width / 2,
+        crop_y + crop_height / 2,
+    )
+
+    # Make sure the entire focal point is in the crop box
+    if focal_point is not None:
+        box = cover_box(box, focal_point.as_tuple())
+
+    # Don't allow the crop box to go over the image boundary
+    box = clamp_box(box, (0, 0, image_width, image_height))
+
+    return Rect(*round_box(box))
+
+
+def fill_crop_boxes(
+    image_sizes: "numpy.ndarray",
+    target_sizes: "numpy.ndarray",
+    focal_points: typing.Optional["numpy.ndarray"] = None,
+    crop_closeness: typing.Union[float, "numpy.ndarray"] = 0,
+) -> "numpy.ndarray":
+    """
+    the same as :func:`fill_crop_box` for many images at once, returning the
+    boxes as an (n, 4) array of left, top, right and bottom.
+
+    :param image_sizes: an (n, 2) array of the image widths and heights.
+    :param target_sizes: an (n, 2) array, or a single (2,) size for all.
+    :param focal_points: an (n, 4) array of left, top, right and bottom, with
+        a row of nan for images without a focal point.
+    :param crop_closeness: between 0 and 1, either one for all or one each.
+    """
+
+    try:
+        import numpy as np
+    except ImportError:  # pragma: no cover
+        raise MissingDependencyError(
+            "numpy must be installed to use 'fill_crop_boxes'."
+        )
+
+    image_sizes = np.asarray(image_sizes, dtype=np.float64).reshape(-1, 2)
+    count = len(image_sizes)
+    target_sizes = np.broadcast_to(
+        np.asarray(target_sizes, dtype=np.float64), (count, 2)
+    )
+    if focal_points is None:
+        focal_points = np.full((count, 4), np.nan)
+    focal_points = np.asarray(focal_points, dtype=np.float64).reshape(-1, 4)
+
+    image_width, image_height = image_sizes.T
+    width, height = target_sizes.T
+    fp_left, fp_top, fp_right, fp_bottom = focal_points.T
+    has_focal_point = ~np.isnan(focal_points).any(axis=1)
+
+    crop_aspect_ratio = width / height
+
+    crop_max_scale = np.minimum(image_width, image_height * crop_aspect_ratio)
+    crop_max_width = crop_max_scale
+    crop_max_height = crop_max_scale / crop_aspect_ratio
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crop_min_scale = np.maximum(
+            fp_right - fp_left, (fp_bottom - fp_top) * crop_aspect_ratio
+        )
+        crop_min_width = crop_min_scale
+        crop_min_height = crop_min_scale / crop_aspect_ratio
+
+        max_crop_closeness = np.maximum(
+            1 - (width - crop_min_width) / (crop_max_width - crop_min_width),
+            1 - (height - crop_min_height) / (crop_max_height - crop_min_height),
+        )
+        closeness = np.minimum(crop_closeness, max_crop_closeness)
+
+        zoom = (
+            has_focal_point
+            & (crop_min_scale < crop_max_scale)
+            & (closeness >= 0)
+            & (closeness <= 1)
+        )
+
+        crop_width = np.where(
+            zoom,
+            crop_max_width + (crop_min_width - crop_max_width) * closeness,
+            crop_max_width,
+        )
+        crop_height = np.where(
+            zoom,
+            crop_max_height + (crop_min_height - crop_max_height) * closeness,
+            crop_max_height,
+        )
+
+    fp_x = np.where(has_focal_point, (fp_left + fp_right) / 2, image_width / 2)
+    fp_y = np.where(has_focal_point, (fp_top + fp_bottom) / 2, image_height / 2)
+
+    crop_x = fp_x - (fp_x / image_width - 0.5) * crop_width
+    crop_y = fp_y - (fp_y / image_height - 0.5) * crop_height
+
+    left = crop_x - crop_width / 2
+    top = crop_y - crop_height / 2
+    right = crop_x + crop_width / 2
+    bottom = crop_y + crop_height / 2
+
+    # move to cover the focal point, see cover_box
+    move = has_focal_point & (left > fp_left)
+    right = np.where(move, right - (left - fp_left), right)
+    left = np.where(move, fp_left, left)
+
+    move = has_focal_point & (top > fp_top)
+    bottom = np.where(move, bottom - (top - fp_top), bottom)
+    top = np.where(move, fp_top, top)
+
+    move = has_focal_point & (right < fp_right)
+    left = np.where(move, left + (fp_right - right), left)
+    right = np.where(move, fp_right, right)
+
+    move = has_focal_point & (bottom < fp_bottom)
+    top = np.where(move, top + (fp_bottom - bottom), top)
+    bottom = np.where(move, fp_bottom, bottom)
+
+    # clamp to the image, see clamp_box
+    move = left < 0
+    right = np.where(move, right - left, right)
+    left = np.where(move, 0, left)
+
+    move = top < 0
+    bottom = np.where(move, bottom - top, bottom)
+    top = np.where(move, 0, top)
+
+    move = right > image_width
+    left = np.where(move, left - (right - image_width), left)
+    right = np.where(move, image_width, right)
+
+    move = bottom > image_height
+    top = np.where(move, top - (bottom - image_height), top)
+    bottom = np.where(move, image_height, bottom)
+
+    return np.stack(
+        [np.floor(left), np.floor(top), np.ceil(right), np.ceil(bottom)], axis=1
+    ).astype(np.int64)
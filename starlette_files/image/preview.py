@@ -0,0 +1,69 @@
+import base64
+import io
+import typing
+
+from . import encoder, utils
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from PIL import Image
+
+
+def reduce(image: "Image.Image", size: int) -> "Image.Image":
+    """
+    decodes the opened image reduced to fit within size x size. jpegs are
+    decoded in draft mode at up to an eighth of their size so the full image
+    is never held in memory.
+    """
+
+    # only has an effect on jpegs and must be called before the image is loaded
+    image.draft("RGB", (size, size))
+
+    reduced = image.convert("RGBA" if utils.has_alpha(image) else "RGB")
+    reduced.thumbnail((size, size))
+
+    return reduced
+
+
+def dominant_color(image: "Image.Image", colors: int = 8) -> str:
+    """
+    returns the most common colour of the reduced image as hex, ie '#a0b1c2',
+    after it has been quantized to a few colours. transparent pixels are only
+    used when the image has nothing else.
+    """
+
+    from PIL import Image
+
+    quantized = image.quantize(colors, method=Image.Quantize.FASTOCTREE)
+    palette = quantized.getpalette("RGBA")
+    counts = quantized.getcolors(colors)
+
+    # a quantized image always has a palette of no more than the colours
+    if palette is None or counts is None:  # pragma: no cover
+        raise ValueError("The image could not be quantized.")
+
+    for _, index in sorted(counts, reverse=True):
+        offset = typing.cast(int, index) * 4
+        red, green, blue, alpha = palette[offset : offset + 4]
+        if alpha >= 128:
+            break
+
+    return "#%02x%02x%02x" % (red, green, blue)
+
+
+def placeholder(image: "Image.Image", size: int) -> str:
+    """
+    returns a data uri of the reduced image scaled to fit within size x size,
+    small enough to inline in the page and blur while the rendition loads.
+    webp is used when supported as it is a fraction of the size of a jpeg.
+    """
+
+    image = image.copy()
+    image.thumbnail((size, size))
+
+    output_format = "WEBP" if encoder.is_format_supported("webp") else "PNG"
+    output = io.BytesIO()
+    image.save(output, output_format, quality=50)
+
+    data = base64.b64encode(output.getvalue()).decode("ascii")
+
+    return f"data:image/{output_format.lower()};base64,{data}"
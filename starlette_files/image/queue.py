@@ -0,0 +1,442 @@
+import contextlib
+import importlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import typing
+
+from ..instrumentation import get_sink, timed
+from .cache import get_rendition_key
+from .filter import ImageFilter
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from ..fields import ImageAttachment, ImageRenditionAttachment
+
+logger = logging.getLogger("starlette_files")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STATUSES = [QUEUED, RUNNING, DONE, FAILED]
+
+
+def class_path(cls: type) -> str:
+    """the path a worker imports the class from, ie 'myapp.models:MyImage'"""
+
+    if "<locals>" in cls.__qualname__ or cls.__module__ == "__main__":
+        raise ValueError(
+            "%s must be defined at the top level of an importable module to be queued"
+            % cls.__qualname__
+        )
+
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def import_class(path: str) -> type:
+    module_name, _, qualname = path.partition(":")
+    value: typing.Any = importlib.import_module(module_name)
+
+    for name in qualname.split("."):
+        value = getattr(value, name)
+
+    return value
+
+
+class Job:
+    """A claimed job, the rendition of an original for the filter specs"""
+
+    def __init__(self, row: sqlite3.Row) -> None:
+        self.id = row["id"]
+        self.rendition = row["rendition"]
+        self.path = row["path"]
+        self.cache_key = row["cache_key"]
+        self.filter_specs = json.loads(row["filter_specs"])
+        self.original = json.loads(row["original"])
+        self.attempts = row["attempts"]
+        self.enqueued_on = row["enqueued_on"]
+
+    @property
+    def group(self) -> typing.Tuple[str, str, str]:
+        # the jobs of an original are created together, decoding it once
+        return self.rendition, self.path, self.cache_key
+
+
+class RenditionQueue:
+    """
+    A durable queue of renditions to create, kept in a sqlite database so no
+    broker is needed. Any number of worker processes on the host can take
+    jobs from it. A rendition is only queued once for each original, cache
+    key and filter specs, failed jobs are retried with a backoff that doubles
+    each time.
+
+    :param path: the path of the database file.
+    :param max_attempts: the times a job is tried before it is failed.
+    :param backoff: the seconds before the first retry.
+    :param max_backoff: the most seconds between retries.
+    :param lock_timeout: the seconds a job is held by a worker for at most,
+        after which a job left by a worker that died is tried again.
+    :param busy_timeout: the seconds to wait for another process writing to
+        the database before raising.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = 5,
+        backoff: float = 10,
+        max_backoff: float = 3600,
+        lock_timeout: float = 600,
+        busy_timeout: float = 30,
+    ) -> None:
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lock_timeout = lock_timeout
+        self.busy_timeout = busy_timeout
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id INTEGER PRIMARY KEY, "
+                "rendition TEXT NOT NULL, "
+                "path TEXT NOT NULL, "
+                "cache_key TEXT NOT NULL, "
+                "specs TEXT NOT NULL, "
+                "filter_specs TEXT NOT NULL, "
+                "original TEXT NOT NULL, "
+                "status TEXT NOT NULL DEFAULT 'queued', "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "available_on REAL NOT NULL, "
+                "enqueued_on REAL NOT NULL, "
+                "finished_on REAL, "
+                "error TEXT, "
+                "UNIQUE (rendition, path, cache_key, specs))"
+            )
+            # only the jobs still to run are indexed, so claiming the next jobs
+            # reads them in order however many millions are queued or done
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_available ON jobs (available_on) "
+                "WHERE status IN ('queued', 'running')"
+            )
+            # the number of jobs with each status is kept up to date by
+            # triggers, counting them would read every job
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS counts ("
+                "status TEXT PRIMARY KEY, count INTEGER NOT NULL DEFAULT 0)"
+            )
+            db.executemany(
+                "INSERT OR IGNORE INTO counts (status) VALUES (?)",
+                [(status,) for status in STATUSES],
+            )
+            db.execute(
+                "CREATE TRIGGER IF NOT EXISTS jobs_inserted AFTER INSERT ON jobs "
+                "BEGIN UPDATE counts SET count = count + 1 "
+                "WHERE status = NEW.status; END"
+            )
+            db.execute(
+                "CREATE TRIGGER IF NOT EXISTS jobs_updated "
+                "AFTER UPDATE OF status ON jobs WHEN OLD.status != NEW.status "
+                "BEGIN UPDATE counts SET count = count - 1 "
+                "WHERE status = OLD.status; UPDATE counts SET count = count + 1 "
+                "WHERE status = NEW.status; END"
+            )
+            db.execute(
+                "CREATE TRIGGER IF NOT EXISTS jobs_deleted AFTER DELETE ON jobs "
+                "BEGIN UPDATE counts SET count = count - 1 "
+                "WHERE status = OLD.status; END"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> typing.Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=self.busy_timeout)
+        db.row_factory = sqlite3.Row
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def enqueue_many(
+        self,
+        rendition_class: typing.Type["ImageRenditionAttachment"],
+        items: typing.List[typing.Tuple["ImageAttachment", typing.List[str]]],
+    ) -> int:
+        """
+        queues a rendition for each of the attachment and filter specs pairs
+        in one transaction, skipping those already queued. the specs are
+        checked first so an unknown operation raises here rather than in the
+        worker.
+
+        :return: the number queued.
+        """
+
+        now = time.time()
+        rendition = class_path(rendition_class)
+        rows = []
+        checked: typing.Set[typing.Tuple[str, ...]] = set()
+
+        for attachment, filter_specs in items:
+            if tuple(filter_specs) not in checked:
+                ImageFilter(filter_specs).operations
+                checked.add(tuple(filter_specs))
+
+            path, cache_key, specs = get_rendition_key(attachment, filter_specs)
+            original = {"class": class_path(type(attachment)), "data": dict(attachment)}
+            rows.append(
+                (
+                    rendition,
+                    path,
+                    cache_key,
+                    specs,
+                    json.dumps(filter_specs),
+                    json.dumps(original),
+                    now,
+                    now,
+                )
+            )
+
+        with self._connect() as db:
+            # the rows changed by the triggers are not counted
+            return db.executemany(
+                "INSERT OR IGNORE INTO jobs (rendition, path, cache_key, specs, "
+                "filter_specs, original, available_on, enqueued_on) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            ).rowcount
+
+    def claim(self, limit: int = 10) -> typing.List[Job]:
+        """
+        takes up to limit jobs that are ready, oldest first, including those
+        held by a worker for longer than the lock timeout.
+        """
+
+        now = time.time()
+        db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        db.row_factory = sqlite3.Row
+
+        try:
+            # taken under the write lock so two workers never claim a job
+            db.execute("BEGIN IMMEDIATE")
+            rows = db.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') "
+                "AND available_on <= ? ORDER BY available_on, id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            db.executemany(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, "
+                "available_on = ? WHERE id = ?",
+                [(now + self.lock_timeout, row["id"]) for row in rows],
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            # begin itself fails when the write lock is not released in time
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+            raise
+        finally:
+            db.close()
+
+        jobs = [Job(row) for row in rows]
+        for job in jobs:
+            job.attempts += 1
+        return jobs
+
+    def complete(self, jobs: typing.List[Job]) -> None:
+        now = time.time()
+
+        with self._connect() as db:
+            db.executemany(
+                "UPDATE jobs SET status = 'done', finished_on = ?, error = NULL "
+                "WHERE id = ?",
+                [(now, job.id) for job in jobs],
+            )
+
+    def fail(self, job: Job, error: str) -> None:
+        """retries the job after the backoff, or fails it after max_attempts"""
+
+        now = time.time()
+
+        if job.attempts >= self.max_attempts:
+            status, available_on = FAILED, now
+        else:
+            delay = min(self.backoff * 2 ** (job.attempts - 1), self.max_backoff)
+            status, available_on = QUEUED, now + delay
+
+        with self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = ?, available_on = ?, finished_on = ?, "
+                "error = ? WHERE id = ?",
+                (status, available_on, now, error, job.id),
+            )
+
+    def stats(self) -> typing.Dict[str, float]:
+        """
+        the number of jobs with each status and the seconds the job that has
+        been ready the longest has waited.
+        """
+
+        now = time.time()
+
+        with self._connect() as db:
+            counts = dict(db.execute("SELECT status, count FROM counts"))
+            # read in order from the index of the jobs still to run
+            oldest = db.execute(
+                "SELECT available_on FROM jobs "
+                "WHERE status IN ('queued', 'running') AND status = 'queued' "
+                "ORDER BY available_on LIMIT 1"
+            ).fetchone()
+
+        result = {status: counts.get(status, 0) for status in STATUSES}
+        result["oldest"] = max(0, now - oldest[0]) if oldest else 0
+        return result
+
+    def retry_failed(self) -> int:
+        """queues the failed jobs again, ie once the cause has been fixed"""
+
+        with self._connect() as db:
+            return db.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, available_on = ? "
+                "WHERE status = 'failed'",
+                (time.time(),),
+            ).rowcount
+
+    def purge(self, older_than: float = 0) -> int:
+        """
+        deletes the jobs done more than older_than seconds ago. once deleted
+        the same rendition can be queued again.
+        """
+
+        with self._connect() as db:
+            return db.execute(
+                "DELETE FROM jobs WHERE status = 'done' AND finished_on < ?",
+                (time.time() - older_than,),
+            ).rowcount
+
+
+class RenditionWorker:
+    """
+    Takes jobs from the queue and creates their renditions with the rendition
+    class's get_or_create, so a cache such as a RenditionIndex on the class
+    records them. The jobs of an original claimed together are created with
+    one decode.
+
+    :param queue: the queue to take jobs from.
+    :param batch_size: the jobs claimed at a time.
+    :param poll_interval: the seconds to wait when there are no jobs.
+    :param stats_interval: the seconds between recording the queue's depth.
+    """
+
+    def __init__(
+        self,
+        queue: RenditionQueue,
+        batch_size: int = 10,
+        poll_interval: float = 1,
+        stats_interval: float = 60,
+    ) -> None:
+        self.queue = queue
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.stats_interval = stats_interval
+        self.stopped = False
+        self._stats_recorded = 0.0
+
+    def stop(self) -> None:
+        """stops once the jobs already claimed are finished"""
+        self.stopped = True
+
+    def run(self, until_empty: bool = False) -> int:
+        """
+        runs jobs until stopped, or until there are none ready.
+
+        :return: the number of jobs run.
+        """
+
+        count = 0
+
+        while not self.stopped:
+            self.record_stats()
+            jobs = self.queue.claim(self.batch_size)
+
+            if not jobs:
+                if until_empty:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+
+            self.run_jobs(jobs)
+            count += len(jobs)
+
+        return count
+
+    def run_jobs(self, jobs: typing.List[Job]) -> None:
+        groups: typing.Dict[typing.Tuple[str, str, str], typing.List[Job]] = {}
+
+        for job in jobs:
+            groups.setdefault(job.group, []).append(job)
+
+        for group in groups.values():
+            self.run_group(group)
+
+    def run_group(self, jobs: typing.List[Job]) -> None:
+        started = time.time()
+        sink = get_sink()
+
+        try:
+            with timed("queue.run", jobs=len(jobs), attempts=jobs[0].attempts):
+                rendition_class = typing.cast(
+                    typing.Type["ImageRenditionAttachment"],
+                    import_class(jobs[0].rendition),
+                )
+                original_class = import_class(jobs[0].original["class"])
+                attachment = original_class(jobs[0].original["data"])
+                rendition_class.lookup_many(
+                    [(attachment, job.filter_specs) for job in jobs]
+                )
+        except Exception as e:
+            if len(jobs) > 1:
+                # one bad job would fail the rest, so each is run on its own and
+                # only those that fail again are retried
+                for job in jobs:
+                    self.run_group([job])
+                return
+
+            logger.exception("rendition of %s failed", jobs[0].path)
+            self.queue.fail(jobs[0], f"{type(e).__name__}: {e}")
+            return
+
+        self.queue.complete(jobs)
+
+        if sink is not None:
+            finished = time.time()
+            for job in jobs:
+                # from being queued to the rendition being stored
+                sink.record("queue.latency", finished - job.enqueued_on)
+
+        logger.debug(
+            "created %d renditions of %s in %.2fs",
+            len(jobs),
+            jobs[0].path,
+            time.time() - started,
+        )
+
+    def record_stats(self) -> None:
+        sink = get_sink()
+        now = time.monotonic()
+
+        if sink is None or now - self._stats_recorded < self.stats_interval:
+            return
+
+        self._stats_recorded = now
+        stats = self.queue.stats()
+        # recorded as the wait of the job ready the longest with the counts
+        sink.record(
+            "queue.depth",
+            stats.pop("oldest"),
+            pid=os.getpid(),
+            **stats,
+        )
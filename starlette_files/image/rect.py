@@ -1,10 +1,88 @@
 import math
+import typing
+
+Box = typing.Tuple[float, float, float, float]
+
+# attributes are set with this as the classes below are immutable
+_set = object.__setattr__
+
+
+def round_box(box: Box) -> typing.Tuple[int, int, int, int]:
+    left, top, right, bottom = box
+    # Round down left and top, round up right and bottom
+    return (
+        int(math.floor(left)),
+        int(math.floor(top)),
+        int(math.ceil(right)),
+        int(math.ceil(bottom)),
+    )
+
+
+def clamp_box(box: Box, other: Box) -> Box:
+    """moves the box so it is completely covered by the other"""
+
+    left, top, right, bottom = box
+    other_left, other_top, other_right, other_bottom = other
+
+    if left < other_left:
+        right -= left - other_left
+        left = other_left
+
+    if top < other_top:
+        bottom -= top - other_top
+        top = other_top
+
+    if right > other_right:
+        left -= right - other_right
+        right = other_right
+
+    if bottom > other_bottom:
+        top -= bottom - other_bottom
+        bottom = other_bottom
+
+    return left, top, right, bottom
+
+
+def cover_box(box: Box, other: Box) -> Box:
+    """moves the box so it completely covers the other"""
+
+    left, top, right, bottom = box
+    other_left, other_top, other_right, other_bottom = other
+
+    if left > other_left:
+        right -= left - other_left
+        left = other_left
+
+    if top > other_top:
+        bottom -= top - other_top
+        top = other_top
+
+    if right < other_right:
+        left += other_right - right
+        right = other_right
+
+    if bottom < other_bottom:
+        top += other_bottom - bottom
+        bottom = other_bottom
+
+    return left, top, right, bottom
 
 
 class Vector:
-    def __init__(self, x: int, y: int):
-        self.x = x
-        self.y = y
+    __slots__ = ("x", "y")
+
+    x: float
+    y: float
+
+    def __init__(self, x: float, y: float):
+        _set(self, "x", x)
+        _set(self, "y", y)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Vector is immutable")
+
+    def __reduce__(self):
+        return type(self), (self.x, self.y)
 
     def __iter__(self):
         return iter((self.x, self.y))
@@ -12,31 +90,55 @@ class Vector:
     def __getitem__(self, key):
         return (self.x, self.y)[key]
 
+    def __len__(self):
+        return 2
+
     def __eq__(self, other):
         return tuple(self) == tuple(other)
 
+    def __hash__(self):
+        return hash((self.x, self.y))
+
     def __repr__(self):
         return "Vector(x: %d, y: %d)" % (self.x, self.y)
 
 
 class Rect:
+    """
+    An immutable rectangle, the size and centroid are only calculated once
+    when first used. Methods that move or resize it return a new Rect.
+    """
+
+    __slots__ = ("left", "top", "right", "bottom", "_size", "_centroid")
+
+    # declared for type checkers, the slots are set with object.__setattr__
+    left: int
+    top: int
+    right: int
+    bottom: int
+    _size: Vector
+    _centroid: Vector
+
     def __init__(self, left: int, top: int, right: int, bottom: int):
-        self.left = left
-        self.top = top
-        self.right = right
-        self.bottom = bottom
+        _set(self, "left", left)
+        _set(self, "top", top)
+        _set(self, "right", right)
+        _set(self, "bottom", bottom)
 
-    def _get_size(self):
-        return Vector(self.right - self.left, self.bottom - self.top)
+    def __setattr__(self, name, value):
+        raise AttributeError("Rect is immutable, use the methods returning a new Rect")
 
-    def _set_size(self, new_size):
-        centroid = self.centroid
-        self.left = centroid[0] - new_size[0] / 2
-        self.right = centroid[0] + new_size[0] / 2
-        self.top = centroid[1] - new_size[1] / 2
-        self.bottom = centroid[1] + new_size[1] / 2
+    def __reduce__(self):
+        return type(self), (self.left, self.top, self.right, self.bottom)
 
-    size = property(_get_size, _set_size)
+    @property
+    def size(self) -> Vector:
+        try:
+            return self._size
+        except AttributeError:
+            size = Vector(self.right - self.left, self.bottom - self.top)
+            _set(self, "_size", size)
+            return size
 
     @property
     def width(self):
@@ -46,17 +148,16 @@ class Rect:
     def height(self):
         return self.size.y
 
-    def _get_centroid(self):
-        return Vector((self.left + self.right) / 2, (self.top + self.bottom) / 2)
-
-    def _set_centroid(self, new_centroid):
-        size = self.size
-        self.left = new_centroid[0] - size[0] / 2
-        self.right = new_centroid[0] + size[0] / 2
-        self.top = new_centroid[1] - size[1] / 2
-        self.bottom = new_centroid[1] + size[1] / 2
-
-    centroid = property(_get_centroid, _set_centroid)
+    @property
+    def centroid(self) -> Vector:
+        try:
+            return self._centroid
+        except AttributeError:
+            centroid = Vector(
+                (self.left + self.right) / 2, (self.top + self.bottom) / 2
+            )
+            _set(self, "_centroid", centroid)
+            return centroid
 
     @property
     def x(self):
@@ -84,73 +185,37 @@ class Rect:
     def clone(self):
         return type(self)(self.left, self.top, self.right, self.bottom)
 
-    def round(self):
+    def with_size(self, new_size):
         """
-        Returns a new rect with all attributes rounded to integers
+        Returns a new rect of the given size with the same centroid
         """
-        clone = self.clone()
-
-        # Round down left and top
-        clone.left = int(math.floor(clone.left))
-        clone.top = int(math.floor(clone.top))
+        return type(self).from_point(*self.centroid, *new_size)
 
-        # Round up right and bottom
-        clone.right = int(math.ceil(clone.right))
-        clone.bottom = int(math.ceil(clone.bottom))
+    def with_centroid(self, new_centroid):
+        """
+        Returns a new rect of the same size moved to the given centroid
+        """
+        return type(self).from_point(*new_centroid, *self.size)
 
-        return clone
+    def round(self):
+        """
+        Returns a new rect with all attributes rounded to integers
+        """
+        return type(self)(*round_box(self.as_tuple()))
 
     def move_to_clamp(self, other):
         """
         Moves this rect so it is completely covered by the rect in "other" and
         returns a new Rect instance.
         """
-        other = Rect(*other)
-        clone = self.clone()
-
-        if clone.left < other.left:
-            clone.right -= clone.left - other.left
-            clone.left = other.left
-
-        if clone.top < other.top:
-            clone.bottom -= clone.top - other.top
-            clone.top = other.top
-
-        if clone.right > other.right:
-            clone.left -= clone.right - other.right
-            clone.right = other.right
-
-        if clone.bottom > other.bottom:
-            clone.top -= clone.bottom - other.bottom
-            clone.bottom = other.bottom
-
-        return clone
+        return type(self)(*clamp_box(self.as_tuple(), tuple(other)))
 
     def move_to_cover(self, other):
         """
         Moves this rect so it completely covers the rect specified in the
         "other" parameter and returns a new Rect instance.
         """
-        other = Rect(*other)
-        clone = self.clone()
-
-        if clone.left > other.left:
-            clone.right -= clone.left - other.left
-            clone.left = other.left
-
-        if clone.top > other.top:
-            clone.bottom -= clone.top - other.top
-            clone.top = other.top
-
-        if clone.right < other.right:
-            clone.left += other.right - clone.right
-            clone.right = other.right
-
-        if clone.bottom < other.bottom:
-            clone.top += other.bottom - clone.bottom
-            clone.bottom = other.bottom
-
-        return clone
+        return type(self)(*cover_box(self.as_tuple(), tuple(other)))
 
     def __iter__(self):
         return iter((self.left, self.top, self.right, self.bottom))
@@ -158,9 +223,15 @@ class Rect:
     def __getitem__(self, key):
         return (self.left, self.top, self.right, self.bottom)[key]
 
+    def __len__(self):
+        return 4
+
     def __eq__(self, other):
         return tuple(self) == tuple(other)
 
+    def __hash__(self):
+        return hash((self.left, self.top, self.right, self.bottom))
+
     def __repr__(self):
         return "Rect(left: %d, top: %d, right: %d, bottom: %d)" % (
             self.left,
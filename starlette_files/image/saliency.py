@@ -0,0 +1,113 @@
+import typing
+
+from ..exceptions import MissingDependencyError
+from .rect import Rect
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from PIL import Image
+
+# the grey levels the local entropy is counted in
+ENTROPY_LEVELS = 16
+
+# how much more a box at the centre is preferred to one at the edge
+CENTRE_BIAS = 0.25
+
+
+def _import_numpy():
+    try:
+        import numpy as np
+    except ImportError:  # pragma: no cover
+        raise MissingDependencyError(
+            "numpy must be installed to use 'smart_focal_point'."
+        )
+
+    return np
+
+
+def _window_sums(values, height: int, width: int):
+    """the sum of each height x width window, using a summed area table"""
+
+    np = _import_numpy()
+
+    table = values.cumsum(axis=0, dtype=values.dtype).cumsum(axis=1)
+    table = np.pad(table, ((1, 0), (1, 0)))
+
+    return (
+        table[height:, width:]
+        - table[:-height, width:]
+        - table[height:, :-width]
+        + table[:-height, :-width]
+    )
+
+
+def _normalise(values):
+    spread = values.max() - values.min()
+    if not spread:
+        return values * 0
+    return (values - values.min()) / spread
+
+
+def saliency_map(image: "Image.Image", window: int = 8):
+    """
+    scores each pixel of a small image by how much detail is around it, the
+    sum of its edge energy and the entropy of the grey levels in the window
+    centred on it. flat areas such as sky or a plain background score low.
+    """
+
+    np = _import_numpy()
+
+    grey = np.asarray(image.convert("L"), dtype=np.float64)
+    height, width = grey.shape
+
+    edges = np.zeros_like(grey)
+    edges[:, 1:] += np.abs(np.diff(grey, axis=1))
+    edges[1:, :] += np.abs(np.diff(grey, axis=0))
+
+    window = max(1, min(window, height, width))
+    pad = [(window // 2, window - 1 - window // 2)] * 2
+
+    energy = _window_sums(np.pad(edges, pad, mode="edge"), window, window)
+
+    levels = np.pad((grey * ENTROPY_LEVELS / 256).astype(np.intp), pad, mode="edge")
+    entropy = np.zeros_like(energy)
+
+    # one level at a time, for every window at once, to keep the arrays small
+    for level in range(ENTROPY_LEVELS):
+        counts = _window_sums((levels == level).astype(np.int32), window, window)
+        probabilities = counts / (window * window)
+        # levels not in the window add nothing, log2(1) is 0
+        entropy -= probabilities * np.log2(np.where(counts, probabilities, 1))
+
+    return _normalise(energy) + _normalise(entropy)
+
+
+def find_focal_point(image: "Image.Image", box: float = 1 / 3) -> Rect:
+    """
+    returns the box, box times the width and height of the image, covering
+    the most detail with a slight preference for the centre. run on a small
+    copy of the image, ie 256px, and scale the result up.
+    """
+
+    np = _import_numpy()
+
+    scores = saliency_map(image)
+    height, width = scores.shape
+    box_width = max(1, round(width * box))
+    box_height = max(1, round(height * box))
+
+    # the total score of the box at every position
+    totals = _window_sums(scores, box_height, box_width)
+
+    rows, columns = totals.shape
+    y = np.linspace(-1, 1, rows)[:, None] if rows > 1 else np.zeros((1, 1))
+    x = np.linspace(-1, 1, columns)[None, :] if columns > 1 else np.zeros((1, 1))
+    weights = 1 - CENTRE_BIAS * (x * x + y * y) / 2
+
+    # a flat image has no detail anywhere so the box is kept at the centre
+    totals = (
+        totals * weights if totals.any() else np.broadcast_to(weights, totals.shape)
+    )
+
+    top, left = np.unravel_index(np.argmax(totals), totals.shape)
+
+    return Rect(int(left), int(top), int(left + box_width), int(top + box_height))
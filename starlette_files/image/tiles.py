@@ -0,0 +1,175 @@
+import math
+import typing
+from concurrent.futures import ThreadPoolExecutor
+
+from ..instrumentation import timed
+from . import encoder, utils
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from PIL import Image
+
+    from ..storages import Storage
+
+
+class TilePyramid:
+    """
+    The layout of a deep zoom (dzi) tile pyramid. Level 0 is the image scaled
+    to a single pixel and each level after it doubles in size, up to the last
+    which is the full image. Each level is cut into tiles of tile_size with
+    the overlap added to the sides shared with their neighbours.
+
+    The tiles of an image are stored next to its descriptor, ie:
+
+        images/abc.dzi
+        images/abc_files/12/0_0.jpeg
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        tile_size: int = 256,
+        overlap: int = 0,
+        image_format: str = "JPEG",
+    ) -> None:
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.format = image_format.upper()
+
+    @property
+    def max_level(self) -> int:
+        return math.ceil(math.log2(max(self.width, self.height, 1)))
+
+    @property
+    def levels(self) -> range:
+        return range(self.max_level + 1)
+
+    @property
+    def extension(self) -> str:
+        return "jpeg" if self.format == "JPEG" else self.format.lower()
+
+    def level_size(self, level: int) -> typing.Tuple[int, int]:
+        """returns the width and height of the image at the level"""
+
+        scale = 2 ** (self.max_level - level)
+        return math.ceil(self.width / scale), math.ceil(self.height / scale)
+
+    def level_tiles(self, level: int) -> typing.Tuple[int, int]:
+        """returns the number of columns and rows of tiles at the level"""
+
+        width, height = self.level_size(level)
+        return math.ceil(width / self.tile_size), math.ceil(height / self.tile_size)
+
+    def tile_box(
+        self, level: int, column: int, row: int
+    ) -> typing.Tuple[int, int, int, int]:
+        """returns the box of the level's image the tile is cut from"""
+
+        width, height = self.level_size(level)
+        left = column * self.tile_size
+        top = row * self.tile_size
+
+        return (
+            max(left - self.overlap, 0),
+            max(top - self.overlap, 0),
+            min(left + self.tile_size + self.overlap, width),
+            min(top + self.tile_size + self.overlap, height),
+        )
+
+    def visible_tiles(
+        self, level: int, box: typing.Tuple[float, float, float, float]
+    ) -> typing.List[typing.Tuple[int, int]]:
+        """
+        returns the column and row of each tile at the level that overlaps the
+        box, given as left, top, right and bottom of the full size image.
+        """
+
+        scale = 2 ** (self.max_level - level)
+        columns, rows = self.level_tiles(level)
+        left, top, right, bottom = (value / scale for value in box)
+
+        first_column = max(int(left // self.tile_size), 0)
+        first_row = max(int(top // self.tile_size), 0)
+        last_column = min(math.ceil(right / self.tile_size), columns)
+        last_row = min(math.ceil(bottom / self.tile_size), rows)
+
+        return [
+            (column, row)
+            for row in range(first_row, last_row)
+            for column in range(first_column, last_column)
+        ]
+
+    def tile_path(self, base: str, level: int, column: int, row: int) -> str:
+        return f"{base}_files/{level}/{column}_{row}.{self.extension}"
+
+    def descriptor(self) -> str:
+        """returns the .dzi xml read by viewers such as openseadragon"""
+
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+            f'Format="{self.extension}" Overlap="{self.overlap}" '
+            f'TileSize="{self.tile_size}">'
+            f'<Size Width="{self.width}" Height="{self.height}"/>'
+            "</Image>\n"
+        )
+
+
+def build_tiles(
+    image: "Image.Image",
+    pyramid: TilePyramid,
+    storage: "Storage",
+    base: str,
+    env: dict = None,
+    workers: int = 1,
+) -> int:
+    """
+    writes every tile of the pyramid to the storage and returns how many there
+    are. the levels are built from the full image down, each one halving the
+    level before it, so every level is only made once and only one is held in
+    memory at a time. with more than one worker the tiles of each level are
+    encoded and written from a pool of threads, which mostly helps storages
+    with a round trip per file such as s3.
+    """
+
+    env = env or {}
+    content_type = f"image/{pyramid.extension}"
+    count = 0
+
+    def write_tile(level_image, level: int, column: int, row: int) -> None:
+        tile = level_image.crop(pyramid.tile_box(level, column, row))
+        path = pyramid.tile_path(base, level, column, row)
+
+        with storage.open_writer(path, content_type) as writer:
+            encoder.save(tile, writer, pyramid.format, env)
+
+    # reduce cannot be used on palette images, and it is loaded here as it
+    # cannot be loaded by the first crop from each thread at once
+    level_image = utils.to_rgb(encoder.prepare(image, pyramid.format))
+    level_image.load()
+
+    pool = ThreadPoolExecutor(workers) if workers > 1 else None
+    run = pool.map if pool else map
+
+    try:
+        for level in reversed(pyramid.levels):
+            if level_image.size != pyramid.level_size(level):
+                level_image = level_image.reduce(2)
+
+            columns, rows = pyramid.level_tiles(level)
+            tiles = [(column, row) for row in range(rows) for column in range(columns)]
+
+            with timed("image.tiles", level=level, tiles=len(tiles)):
+                # consumed so errors are raised and the level is done before
+                # it is reduced for the next
+                for _ in run(lambda tile: write_tile(level_image, level, *tile), tiles):
+                    pass
+
+            count += len(tiles)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return count
@@ -1,17 +1,31 @@
-try:
+import typing
+
+if typing.TYPE_CHECKING:  # pragma: no cover
     from PIL import Image
-except ImportError:  # pragma: no cover
-    Image = None
 
 
-def has_alpha(image: Image) -> bool:
+def has_alpha(image: "Image.Image") -> bool:
     return image.mode in ("RGBA", "LA") or (
         image.mode == "P" and "transparency" in image.info
     )
 
 
-def to_rgb(image: Image) -> Image:
+def to_rgb(image: "Image.Image") -> "Image.Image":
     # convert 1 and P images to RGB to improve resize quality
     if image.mode in ["1", "P"]:
         image = image.convert("RGBA") if has_alpha(image) else image.convert("RGB")
     return image
+
+
+def flatten(
+    image: "Image.Image", background: typing.Tuple[int, int, int] = (255, 255, 255)
+) -> "Image.Image":
+    # paste images with alpha onto the background for formats without it
+    if image.mode not in ("RGBA", "LA"):
+        return image
+
+    from PIL import Image
+
+    flattened = Image.new("RGB", image.size, background)
+    flattened.paste(image.convert("RGBA"), mask=image.getchannel("A"))
+    return flattened
@@ -0,0 +1,219 @@
+import base64
+import hashlib
+import io
+import typing
+
+from .exceptions import MaximumAllowedFileLengthError
+from .image.limits import check_pixels
+from .instrumentation import timed
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from .fields import FileAttachment, ImageAttachment
+    from .storages.base import ResumableStorageWriter, StorageWriter
+
+# the start of the file used to detect the content type, as in create_from
+SNIFF_LENGTH = 1024
+
+
+class Ingest:
+    """
+    Stores a file in an attachment's storage as it arrives a chunk at a time,
+    rather than from a complete file-like object like create_from. The content
+    type is detected and validated from the first chunk and the length as each
+    chunk is written, so an invalid file is rejected without reading the rest
+    of it. Nothing is stored unless it is closed:
+
+        ingest = MyFile.ingest("report.pdf")
+        try:
+            for chunk in chunks:
+                ingest.write(chunk)
+            attachment = ingest.close()
+        except Exception:
+            ingest.abort()
+            raise
+    """
+
+    def __init__(
+        self, attachment_class: typing.Type["FileAttachment"], original_filename: str
+    ) -> None:
+        self.attachment = attachment_class()
+        self.original_filename = original_filename
+        self.bytes_written = 0
+        self.writer: typing.Optional["StorageWriter"] = None
+        self.head = bytearray()
+        # hashed as it arrives rather than read back once stored
+        self.digest: typing.Optional["hashlib._Hash"] = hashlib.sha256()
+
+    def write(self, data: bytes) -> None:
+        self.bytes_written += len(data)
+
+        if self.bytes_written > self.attachment.max_length:
+            raise MaximumAllowedFileLengthError(self.attachment.max_length)
+
+        if self.digest is not None:
+            self.digest.update(data)
+
+        if self.writer is not None:
+            self.writer.write(data)
+            return
+
+        self.head += data
+
+        if len(self.head) >= SNIFF_LENGTH:
+            self.start()
+
+    def start(self) -> None:
+        """detects and validates the content type then opens the writer"""
+
+        attachment = self.attachment
+
+        # the size is set from the first chunk here and corrected once closed
+        attachment.set_defaults(io.BytesIO(self.head), self.original_filename)
+
+        with timed("file.validate", content_type=attachment.content_type):
+            attachment.validate()
+
+        self.writer = self.open_writer()
+        self.writer.write(bytes(self.head))
+        self.head = bytearray()
+
+    def open_writer(self) -> "StorageWriter":
+        return self.attachment.open_writer()
+
+    def finish(self) -> None:
+        """
+        Can be overridden in inherited class to read the details of the whole
+        file before it is stored, raising to reject it.
+        """
+        pass
+
+    def close(self) -> "FileAttachment":
+        """stores the file and returns the attachment"""
+
+        if self.writer is None:
+            self.start()
+
+        self.attachment.file_size = self.bytes_written
+
+        if self.digest is not None:
+            self.attachment.content_digest = self.digest.hexdigest()
+        else:
+            self.attachment.pop("content_digest", None)
+
+        self.finish()
+        self.writer.__exit__(None, None, None)  # type: ignore
+
+        return self.attachment
+
+    def abort(self) -> None:
+        """discards the file, nothing is stored"""
+
+        if self.writer is not None and not self.writer.closed:
+            self.writer.abort()
+
+
+class ResumableIngest(Ingest):
+    """
+    An ingest written over many requests, ie a chunk of the file in each, using
+    the storage's resumable writer. It is suspended at the end of each request
+    and resumed from the state returned, which should be kept durably:
+
+        ingest = ResumableIngest(MyFile, "video.mp4")
+        ingest.write(chunk)
+        state = ingest.suspend()
+        ...
+        ingest = ResumableIngest.resume(MyFile, state)
+        ingest.write(chunk)
+        attachment = ingest.close()
+    """
+
+    writer: typing.Optional["ResumableStorageWriter"]
+
+    @classmethod
+    def resume(
+        cls, attachment_class: typing.Type["FileAttachment"], state: dict
+    ) -> "ResumableIngest":
+        ingest = cls(attachment_class, state["original_filename"])
+        # the digest of the earlier requests can not be kept in the state
+        ingest.digest = None
+        ingest.attachment.update(state["attachment"])
+        ingest.bytes_written = state["offset"]
+        ingest.head = bytearray(base64.b64decode(state["head"]))
+
+        if state["writer"] is not None:
+            ingest.writer = ingest.attachment.storage.open_resumable(
+                ingest.attachment.path, ingest.attachment.content_type, state["writer"]
+            )
+
+        return ingest
+
+    def open_writer(self) -> "ResumableStorageWriter":
+        return self.attachment.storage.open_resumable(
+            self.attachment.path, self.attachment.content_type
+        )
+
+    def suspend(self) -> dict:
+        """keeps what has been written and returns the state to resume from"""
+
+        return {
+            "original_filename": self.original_filename,
+            "offset": self.bytes_written,
+            "attachment": dict(self.attachment),
+            # the start of the file before the content type is known
+            "head": base64.b64encode(self.head).decode("ascii"),
+            "writer": self.writer.suspend() if self.writer else None,
+        }
+
+
+class ImageIngest(Ingest):
+    """
+    Also keeps the image in memory, up to the attachment's max_length, to read
+    its size, placeholder and dominant colour once closed. The pixels are
+    checked as soon as the header has arrived, before the rest is written.
+    """
+
+    attachment: "ImageAttachment"
+
+    def __init__(
+        self, attachment_class: typing.Type["ImageAttachment"], original_filename: str
+    ) -> None:
+        super().__init__(attachment_class, original_filename)
+        self.buffer = io.BytesIO()
+        self.header_read = False
+        # the header is tried each time the length doubles until it is read
+        self.next_header_length = SNIFF_LENGTH
+
+    def write(self, data: bytes) -> None:
+        super().write(data)
+        self.buffer.write(data)
+
+        if not self.header_read and self.bytes_written >= self.next_header_length:
+            self.next_header_length = self.bytes_written * 2
+            self.read_header()
+
+    def read_header(self) -> None:
+        from PIL import Image
+
+        try:
+            with Image.open(io.BytesIO(self.buffer.getvalue())) as image:
+                size = image.size
+        except (OSError, SyntaxError):
+            # the header has not all arrived yet
+            return
+
+        check_pixels(size, self.attachment.max_pixels)
+        self.header_read = True
+
+    def finish(self) -> None:
+        from PIL import Image
+
+        self.buffer.seek(0)
+
+        with Image.open(self.buffer) as image:
+            self.attachment.set_image_details(image)
+
+        self.buffer.close()
+
+    def abort(self) -> None:
+        super().abort()
+        self.buffer.close()
@@ -0,0 +1,117 @@
+import functools
+import logging
+import time
+import typing
+
+logger = logging.getLogger("starlette_files")
+
+
+class MetricsSink:
+    """The base class for sinks that receive the timings of each stage"""
+
+    def record(self, name: str, duration: float, **data) -> None:
+        """
+        Should be overridden in inherited class and records a stage.
+
+        :param name: the name of the stage, ie 'image.encode'.
+        :param duration: the seconds the stage took.
+        :param data: details of the stage such as bytes, width and height.
+        """
+        raise NotImplementedError()
+
+
+class LoggingSink(MetricsSink):
+    """Logs each stage to the 'starlette_files' logger"""
+
+    def __init__(self, level: int = logging.DEBUG):
+        self.level = level
+
+    def record(self, name: str, duration: float, **data) -> None:
+        details = " ".join(f"{key}={value}" for key, value in data.items())
+        logger.log(self.level, "%s %.2fms %s", name, duration * 1000, details)
+
+
+_sink: typing.Optional[MetricsSink] = None
+
+
+def set_sink(sink: typing.Optional[MetricsSink]) -> None:
+    """sets the sink that receives all timings, None to stop recording"""
+
+    global _sink
+    _sink = sink
+
+
+def get_sink() -> typing.Optional[MetricsSink]:
+    return _sink
+
+
+class Timer:
+    def __init__(self, sink: MetricsSink, name: str, data: dict):
+        self.sink = sink
+        self.name = name
+        self.data = data
+
+    def set(self, **data) -> None:
+        """adds details only known once the stage has run"""
+        self.data.update(data)
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is not None:
+            self.data["error"] = exc_type.__name__
+        self.sink.record(self.name, time.perf_counter() - self.start, **self.data)
+
+
+class NullTimer:
+    """Used when there is no sink so timing costs next to nothing"""
+
+    def set(self, **data) -> None:
+        pass
+
+    def __enter__(self) -> "NullTimer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+def timed(name: str, **data) -> typing.Union[Timer, NullTimer]:
+    """
+    times the stage run within the block when a sink is set:
+
+        with timed("image.encode", format="JPEG") as timer:
+            ...
+            timer.set(bytes=length)
+    """
+
+    if _sink is None:
+        return NULL_TIMER
+    return Timer(_sink, name, data)
+
+
+def instrumented(method: typing.Callable) -> typing.Callable:
+    """
+    times each call of a storage method, recorded as 'storage.<method>' with
+    the name of the storage class as the backend.
+    """
+
+    name = f"storage.{method.__name__}"
+
+    @functools.wraps(method)
+    def wrapper(self, filename: str, *args, **kwargs):
+        if _sink is None:
+            return method(self, filename, *args, **kwargs)
+
+        with Timer(_sink, name, {"backend": type(self).__name__}) as timer:
+            result = method(self, filename, *args, **kwargs)
+            if isinstance(result, int):
+                timer.set(bytes=result)
+            return result
+
+    return wrapper
@@ -1,11 +1,110 @@
 import mimetypes as mdb
+import struct
+import threading
 import typing
 
-import magic
+# the magic numbers at the start of the types that can be identified without
+# libmagic, as (offset, signature, mimetype).
+SIGNATURES: typing.List[typing.Tuple[int, bytes, str]] = [
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"%PDF-", "application/pdf"),
+]
+
+# the major brands of iso media files, the 'ftyp' box, that libmagic reports
+# as these types. other brands such as quicktime and heic are left to libmagic.
+FTYP_BRANDS = {
+    b"avif": "image/avif",
+    b"avis": "image/avif",
+    b"isom": "video/mp4",
+    b"iso2": "video/mp4",
+    b"iso3": "video/mp4",
+    b"iso4": "video/mp4",
+    b"iso5": "video/mp4",
+    b"iso6": "video/mp4",
+    b"mp41": "video/mp4",
+    b"mp42": "video/mp4",
+    b"avc1": "video/mp4",
+    b"dash": "video/mp4",
+    b"mmp4": "video/mp4",
+}
+
+# documents such as docx, odt, epub and jar are zip files that libmagic
+# identifies by their first entry, these are left to libmagic.
+ZIP_CONTAINER_ENTRIES = (
+    b"[Content_Types].xml",
+    b"_rels/",
+    b"docProps/",
+    b"mimetype",
+    b"META-INF/",
+    b"AndroidManifest.xml",
+    b"classes.dex",
+)
+
+
+def _sniff_zip(buffer: bytes) -> typing.Optional[str]:
+    if buffer.startswith(b"PK\x05\x06"):
+        # an empty archive
+        return "application/zip"
+
+    if not buffer.startswith(b"PK\x03\x04") or len(buffer) < 30:
+        return None
+
+    (name_length,) = struct.unpack("<H", buffer[26:28])
+    name = buffer[30 : 30 + name_length]
+
+    if len(name) < name_length or name.startswith(ZIP_CONTAINER_ENTRIES):
+        return None
+
+    return "application/zip"
+
+
+def signature_mime_from_buffer(buffer: bytes) -> typing.Optional[str]:
+    """
+    identifies the common types from their magic numbers, returns None when
+    the type is not one of them.
+    """
+
+    for offset, signature, mimetype in SIGNATURES:
+        if buffer.startswith(signature, offset):
+            return mimetype
+
+    if buffer[:4] == b"RIFF" and buffer[8:12] == b"WEBP":
+        return "image/webp"
+
+    if buffer[4:8] == b"ftyp":
+        return FTYP_BRANDS.get(buffer[8:12])
+
+    if buffer[:2] == b"PK":
+        return _sniff_zip(buffer)
+
+    return None
+
+
+_local = threading.local()
+
+
+def libmagic_mime_from_buffer(buffer: bytes) -> str:
+    """
+    identifies the type using libmagic. each thread has its own handle as
+    python-magic's shared one is locked while in use.
+    """
+
+    detector = getattr(_local, "magic", None)
+
+    if detector is None:
+        # imported on first use as loading libmagic slows down startup
+        import magic
+
+        detector = _local.magic = magic.Magic(mime=True)
+
+    return detector.from_buffer(buffer)
 
 
 def magic_mime_from_buffer(buffer: bytes) -> str:
-    return magic.from_buffer(buffer, mime=True)
+    return signature_mime_from_buffer(buffer) or libmagic_mime_from_buffer(buffer)
 
 
 def guess_extension(mimetype: str) -> typing.Optional[str]:
@@ -14,8 +113,14 @@ def guess_extension(mimetype: str) -> typing.Optional[str]:
     - https://bugs.python.org/issue4963
     - https://bugs.python.org/issue1043134
     - https://bugs.python.org/issue6626#msg91205
+
+    'image/webp' and 'image/avif' are missing in older versions of python.
     """
 
     if mimetype == "image/jpeg":
         return ".jpeg"
+    if mimetype == "image/webp":
+        return ".webp"
+    if mimetype == "image/avif":
+        return ".avif"
     return mdb.guess_extension(mimetype)
@@ -0,0 +1,525 @@
+import base64
+import contextlib
+import json
+import sqlite3
+import time
+import typing
+import uuid
+
+from .constants import KB
+from .exceptions import (
+    ContentTypeValidationError,
+    MaximumAllowedFileLengthError,
+    MissingDependencyError,
+    UploadLockedError,
+    UploadNotFoundError,
+    UploadOffsetError,
+)
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from starlette.requests import Request
+    from starlette.responses import Response
+
+    from .fields import FileAttachment
+    from .ingest import ResumableIngest
+
+
+class UploadStore:
+    """
+    The base class for stores that keep the state of resumable uploads between
+    requests. An upload is locked while a request is writing to it.
+    """
+
+    def create(self, upload_id: str, state: dict) -> None:
+        """
+        Should be overridden in inherited class and adds a new upload.
+
+        :param upload_id: the id of the upload.
+        :param state: the json serializable state of the upload.
+        """
+        raise NotImplementedError()
+
+    def get(self, upload_id: str) -> typing.Optional[dict]:
+        """
+        Should be overridden in inherited class and returns the state of the
+        upload, or None if there is no upload with the id.
+
+        :param upload_id: the id of the upload.
+        """
+        raise NotImplementedError()
+
+    def lock(self, upload_id: str) -> dict:
+        """
+        Should be overridden in inherited class to lock the upload and return
+        its state, raising UploadNotFoundError when there is no upload with the
+        id and UploadLockedError when it is already locked.
+
+        :param upload_id: the id of the upload.
+        """
+        raise NotImplementedError()
+
+    def unlock(self, upload_id: str, state: dict = None) -> None:
+        """
+        Should be overridden in inherited class to save the state, if given,
+        and unlock the upload.
+
+        :param upload_id: the id of the upload.
+        :param state: the state to save.
+        """
+        raise NotImplementedError()
+
+    def delete(self, upload_id: str) -> None:
+        """
+        Should be overridden in inherited class and deletes the upload.
+
+        :param upload_id: the id of the upload.
+        """
+        raise NotImplementedError()
+
+
+class SQLiteUploadStore(UploadStore):
+    """
+    Keeps the uploads in a sqlite database so they survive restarts and are
+    shared by all the processes on the host.
+
+    :param path: the path of the database file.
+    :param lock_timeout: the seconds a lock is held for at most, after which
+        an upload left locked by a process that died can be resumed.
+    """
+
+    def __init__(self, path: str, lock_timeout: float = 300) -> None:
+        self.path = path
+        self.lock_timeout = lock_timeout
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                "id TEXT PRIMARY KEY, "
+                "state TEXT NOT NULL, "
+                "locked_until REAL NOT NULL DEFAULT 0, "
+                "updated_on REAL NOT NULL)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> typing.Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def create(self, upload_id: str, state: dict) -> None:
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO uploads (id, state, updated_on) VALUES (?, ?, ?)",
+                (upload_id, json.dumps(state), time.time()),
+            )
+
+    def get(self, upload_id: str) -> typing.Optional[dict]:
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT state FROM uploads WHERE id = ?", (upload_id,)
+            ).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def lock(self, upload_id: str) -> dict:
+        now = time.time()
+
+        with self._connect() as db:
+            locked = db.execute(
+                "UPDATE uploads SET locked_until = ? WHERE id = ? AND locked_until < ?",
+                (now + self.lock_timeout, upload_id, now),
+            ).rowcount
+            row = db.execute(
+                "SELECT state FROM uploads WHERE id = ?", (upload_id,)
+            ).fetchone()
+
+        if row is None:
+            raise UploadNotFoundError(upload_id)
+        if not locked:
+            raise UploadLockedError(upload_id)
+
+        return json.loads(row[0])
+
+    def unlock(self, upload_id: str, state: dict = None) -> None:
+        with self._connect() as db:
+            if state is None:
+                db.execute(
+                    "UPDATE uploads SET locked_until = 0 WHERE id = ?", (upload_id,)
+                )
+            else:
+                db.execute(
+                    "UPDATE uploads SET state = ?, locked_until = 0, updated_on = ? "
+                    "WHERE id = ?",
+                    (json.dumps(state), time.time(), upload_id),
+                )
+
+    def delete(self, upload_id: str) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM uploads WHERE id = ?", (upload_id,))
+
+
+class ResumableUpload:
+    """
+    An upload resumed by :meth:`ResumableUploads.resume`, it stays locked
+    until it is suspended.
+    """
+
+    def __init__(
+        self,
+        store: UploadStore,
+        upload_id: str,
+        length: int,
+        ingest: "ResumableIngest",
+    ) -> None:
+        self.store = store
+        self.upload_id = upload_id
+        self.length = length
+        self.ingest = ingest
+        self.done = False
+        self.failed = False
+
+    @property
+    def offset(self) -> int:
+        return self.ingest.bytes_written
+
+    def write(self, data: bytes) -> None:
+        if self.offset + len(data) > self.length:
+            raise MaximumAllowedFileLengthError(self.length)
+
+        try:
+            self.ingest.write(data)
+        except (ContentTypeValidationError, MaximumAllowedFileLengthError):
+            # the file can never be valid so there is nothing to resume
+            self.abort()
+            raise
+        except BaseException:
+            # what was written is not known so the upload is resumed from
+            # where this request started
+            self.failed = True
+            raise
+
+    def suspend(self) -> int:
+        """keeps what has been written, unlocks the upload and returns the offset"""
+
+        if self.done:
+            return self.offset
+
+        self.done = True
+
+        if self.failed:
+            self.store.unlock(self.upload_id)
+            return self.store.get(self.upload_id)["ingest"]["offset"]  # type: ignore
+
+        state = {"length": self.length, "ingest": self.ingest.suspend()}
+        self.store.unlock(self.upload_id, state)
+
+        return self.offset
+
+    def abort(self) -> None:
+        self.done = True
+        self.ingest.abort()
+        self.store.delete(self.upload_id)
+
+
+class ResumableUploads:
+    """
+    Uploads of an attachment class written over many requests in the style of
+    tus, so a large upload that fails part way can carry on from where it got
+    to rather than starting again. The file is written straight to the storage
+    as each chunk arrives with the state of each upload kept in the store.
+
+    :param attachment_class: the attachment class the files are stored as.
+    :param store: where the state of each upload is kept between requests.
+    """
+
+    def __init__(
+        self, attachment_class: typing.Type["FileAttachment"], store: UploadStore
+    ) -> None:
+        if attachment_class.resumable_ingest_class is None:
+            raise ValueError(
+                "%s does not support resumable uploads." % attachment_class.__name__
+            )
+
+        self.attachment_class = attachment_class
+        self.ingest_class = attachment_class.resumable_ingest_class
+        self.store = store
+
+    def create(self, length: int, original_filename: str) -> str:
+        """starts an upload of length bytes and returns its id"""
+
+        if length > self.attachment_class.max_length:
+            raise MaximumAllowedFileLengthError(self.attachment_class.max_length)
+
+        upload_id = uuid.uuid4().hex
+        ingest = self.ingest_class(self.attachment_class, original_filename)
+        self.store.create(upload_id, {"length": length, "ingest": ingest.suspend()})
+
+        return upload_id
+
+    def get_offset(self, upload_id: str) -> typing.Tuple[int, int]:
+        """returns how many bytes have been written and the length expected"""
+
+        state = self.store.get(upload_id)
+
+        if state is None:
+            raise UploadNotFoundError(upload_id)
+
+        return state["ingest"]["offset"], state["length"]
+
+    def resume(self, upload_id: str, offset: int) -> ResumableUpload:
+        """
+        locks the upload to write the next chunk to, the offset is where the
+        client is sending from which must be where the upload got to. suspend
+        the upload returned once the chunk has been written:
+
+            upload = uploads.resume(upload_id, offset)
+            try:
+                upload.write(data)
+            finally:
+                upload.suspend()
+        """
+
+        state = self.store.lock(upload_id)
+
+        if state["ingest"]["offset"] != offset:
+            self.store.unlock(upload_id)
+            raise UploadOffsetError(state["ingest"]["offset"])
+
+        try:
+            ingest = self.ingest_class.resume(self.attachment_class, state["ingest"])
+        except BaseException:
+            self.store.unlock(upload_id)
+            raise
+
+        return ResumableUpload(self.store, upload_id, state["length"], ingest)
+
+    def append(self, upload_id: str, offset: int, data: bytes) -> int:
+        """writes the chunk at the offset and returns the offset after it"""
+
+        upload = self.resume(upload_id, offset)
+        try:
+            upload.write(data)
+        finally:
+            offset = upload.suspend()
+
+        return offset
+
+    def finalize(self, upload_id: str) -> "FileAttachment":
+        """
+        stores the file once all of it has been written and returns the
+        attachment, the file is not read again.
+        """
+
+        state = self.store.lock(upload_id)
+
+        if state["ingest"]["offset"] != state["length"]:
+            self.store.unlock(upload_id)
+            raise UploadOffsetError(state["ingest"]["offset"])
+
+        try:
+            ingest = self.ingest_class.resume(self.attachment_class, state["ingest"])
+            attachment = ingest.close()
+        except (ContentTypeValidationError, MaximumAllowedFileLengthError):
+            # a file shorter than the start used to detect the content type
+            # is only validated here
+            self.abort(upload_id, locked=True)
+            raise
+        except BaseException:
+            self.store.unlock(upload_id)
+            raise
+
+        self.store.delete(upload_id)
+
+        return attachment
+
+    def abort(self, upload_id: str, locked: bool = False) -> None:
+        """discards the upload and whatever has been written"""
+
+        state = self.store.get(upload_id) if locked else self.store.lock(upload_id)
+
+        if state is None:
+            raise UploadNotFoundError(upload_id)
+
+        self.ingest_class.resume(self.attachment_class, state["ingest"]).abort()
+        self.store.delete(upload_id)
+
+
+TUS_VERSION = "1.0.0"
+
+
+def parse_upload_metadata(value: str) -> typing.Dict[str, str]:
+    """parses tus' Upload-Metadata header, ie 'filename YS5wZGY=,private'"""
+
+    metadata = {}
+
+    for pair in value.split(","):
+        key, _, encoded = pair.strip().partition(" ")
+        if key:
+            metadata[key] = base64.b64decode(encoded).decode("utf-8")
+
+    return metadata
+
+
+class ResumableUploadApp:
+    """
+    An ASGI app with the endpoints of resumable uploads in the style of tus,
+    ie mounted with: app.mount("/uploads", ResumableUploadApp(uploads))
+
+        POST /                  starts an upload of Upload-Length bytes, named
+                                by the filename in Upload-Metadata
+        HEAD /{id}              returns the Upload-Offset to carry on from
+        PATCH /{id}             writes the body from the Upload-Offset
+        POST /{id}/finalize     stores the upload
+        DELETE /{id}            discards the upload
+
+    :param uploads: the resumable uploads of the attachment class.
+    :param on_finalize: called with the request and attachment once finalized
+        returning the response, ie after saving the attachment to a model. by
+        default the attachment is returned as json.
+    :param write_size: the bytes received before they are written.
+    """
+
+    def __init__(
+        self,
+        uploads: ResumableUploads,
+        on_finalize: typing.Callable[
+            ["Request", "FileAttachment"], typing.Awaitable["Response"]
+        ] = None,
+        write_size: int = 256 * KB,
+    ) -> None:
+        try:
+            from starlette.routing import Route, Router
+        except ImportError:  # pragma: no cover
+            raise MissingDependencyError(
+                "starlette must be installed to use the 'ResumableUploadApp' class."
+            )
+
+        self.uploads = uploads
+        self.on_finalize = on_finalize
+        self.write_size = write_size
+        self.router = Router(
+            routes=[
+                Route("/", self._errors(self.create), methods=["POST"]),
+                Route(
+                    "/{upload_id}",
+                    self._errors(self.offset),
+                    methods=["HEAD", "GET"],
+                ),
+                Route("/{upload_id}", self._errors(self.append), methods=["PATCH"]),
+                Route("/{upload_id}", self._errors(self.abort), methods=["DELETE"]),
+                Route(
+                    "/{upload_id}/finalize",
+                    self._errors(self.finalize),
+                    methods=["POST"],
+                ),
+            ]
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.router(scope, receive, send)
+
+    def _errors(self, endpoint: typing.Callable) -> typing.Callable:
+        from starlette.responses import Response
+
+        async def wrapper(request: "Request") -> "Response":
+            try:
+                response = await endpoint(request)
+            except UploadNotFoundError:
+                response = Response(status_code=404)
+            except UploadOffsetError as e:
+                response = Response(
+                    status_code=409, headers={"Upload-Offset": str(e.offset)}
+                )
+            except UploadLockedError:
+                response = Response(status_code=423)
+            except MaximumAllowedFileLengthError as e:
+                response = Response(str(e), status_code=413)
+            except ContentTypeValidationError as e:
+                response = Response(str(e), status_code=415)
+            except (KeyError, ValueError):
+                response = Response("Missing or invalid upload headers.", 400)
+
+            response.headers["Tus-Resumable"] = TUS_VERSION
+            return response
+
+        return wrapper
+
+    async def create(self, request: "Request") -> "Response":
+        from starlette.concurrency import run_in_threadpool
+        from starlette.responses import Response
+
+        length = int(request.headers["upload-length"])
+        metadata = parse_upload_metadata(request.headers.get("upload-metadata", ""))
+
+        upload_id = await run_in_threadpool(
+            self.uploads.create, length, metadata.get("filename", "")
+        )
+        location = f"{request.url.path.rstrip('/')}/{upload_id}"
+
+        return Response(status_code=201, headers={"Location": location})
+
+    async def offset(self, request: "Request") -> "Response":
+        from starlette.concurrency import run_in_threadpool
+        from starlette.responses import Response
+
+        offset, length = await run_in_threadpool(
+            self.uploads.get_offset, request.path_params["upload_id"]
+        )
+
+        return Response(
+            headers={
+                "Upload-Offset": str(offset),
+                "Upload-Length": str(length),
+                "Cache-Control": "no-store",
+            }
+        )
+
+    async def append(self, request: "Request") -> "Response":
+        from starlette.concurrency import run_in_threadpool
+        from starlette.requests import ClientDisconnect
+        from starlette.responses import Response
+
+        from .uploads import batch_stream
+
+        upload = await run_in_threadpool(
+            self.uploads.resume,
+            request.path_params["upload_id"],
+            int(request.headers["upload-offset"]),
+        )
+
+        # whatever has been written is kept when the client disconnects, so
+        # it can carry on from there
+        try:
+            async for data in batch_stream(request.stream(), self.write_size):
+                await run_in_threadpool(upload.write, data)
+        except ClientDisconnect:
+            pass
+        finally:
+            offset = await run_in_threadpool(upload.suspend)
+
+        return Response(status_code=204, headers={"Upload-Offset": str(offset)})
+
+    async def finalize(self, request: "Request") -> "Response":
+        from starlette.concurrency import run_in_threadpool
+        from starlette.responses import JSONResponse
+
+        attachment = await run_in_threadpool(
+            self.uploads.finalize, request.path_params["upload_id"]
+        )
+
+        if self.on_finalize is not None:
+            return await self.on_finalize(request, attachment)
+
+        return JSONResponse(dict(attachment), status_code=201)
+
+    async def abort(self, request: "Request") -> "Response":
+        from starlette.concurrency import run_in_threadpool
+        from starlette.responses import Response
+
+        await run_in_threadpool(self.uploads.abort, request.path_params["upload_id"])
+
+        return Response(status_code=204)
@@ -1,3 +1,12 @@
 from .base import Storage
 from .filesystem import FileSystemStorage
-from .s3 import S3Storage
+
+
+def __getattr__(name: str):
+    # the s3 storage is imported on first use as boto3 slows down startup
+    if name == "S3Storage":
+        from .s3 import S3Storage
+
+        return S3Storage
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
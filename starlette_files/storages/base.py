@@ -1,10 +1,109 @@
 import typing
+from io import BytesIO
 
 from ..constants import KB
+from ..helpers import copy_stream
+from ..instrumentation import timed
+
+
+class StorageWriter:
+    """
+    A writable file-like object returned by :meth:`Storage.open_writer`. The
+    bytes written are stored once closed, or discarded if aborted.
+
+    Use it as a context manager so an exception aborts the write:
+
+        with storage.open_writer("files/foo.txt") as writer:
+            writer.write(b"foo")
+    """
+
+    def __init__(self) -> None:
+        self.bytes_written = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self.bytes_written += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def tell(self) -> int:
+        return self.bytes_written
+
+    def writable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self.closed = True
+
+    def abort(self) -> None:
+        self.closed = True
+
+    def __enter__(self) -> "StorageWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if self.closed:
+            return
+        if exc_type is None:
+            with timed(
+                "storage.close_writer",
+                backend=type(self).__name__,
+                bytes=self.bytes_written,
+            ):
+                self.close()
+        else:
+            self.abort()
+
+
+class BufferedStorageWriter(StorageWriter):
+    """
+    The default writer for storages that cannot write directly, the bytes are
+    buffered in memory and stored using :meth:`Storage.put` once closed.
+    """
+
+    def __init__(
+        self, storage: "Storage", filename: str, content_type: str = None
+    ) -> None:
+        super().__init__()
+        self.storage = storage
+        self.filename = filename
+        self.buffer = BytesIO()
+        setattr(self.buffer, "content_type", content_type)
+
+    def write(self, data: bytes) -> int:
+        self.buffer.write(data)
+        return super().write(data)
+
+    def close(self) -> None:
+        super().close()
+        self.storage.put(self.filename, self.buffer)
+        self.buffer.close()
+
+    def abort(self) -> None:
+        super().abort()
+        self.buffer.close()
+
+
+class ResumableStorageWriter(StorageWriter):
+    """
+    A writer returned by :meth:`Storage.open_resumable` for a file written over
+    many requests. It is suspended at the end of each and resumed from the
+    state :meth:`suspend` returns, which the caller keeps somewhere durable.
+    """
+
+    def suspend(self) -> dict:
+        """
+        Should be overridden in inherited class to keep the bytes written so
+        far and return the state to resume from, the writer cannot be used
+        once suspended.
+        """
+        raise NotImplementedError()
 
 
 class Storage:
-    """ The abstract base class for all stores. """
+    """The abstract base class for all stores."""
 
     def put(self, filename: str, stream: typing.IO) -> int:
         """
@@ -17,6 +116,49 @@ class Storage:
         """
         raise NotImplementedError()
 
+    def open_writer(self, filename: str, content_type: str = None) -> StorageWriter:
+        """
+        Can be overridden in inherited class to write directly to the store and
+        returns a writable file-like object that stores the bytes written as
+        the given filename once closed. By default the bytes are buffered and
+        stored using :meth:`put`.
+
+        :param filename: the target filename.
+        :param content_type: the content type of the file if known.
+        """
+        return BufferedStorageWriter(self, filename, content_type)
+
+    def open_resumable(
+        self, filename: str, content_type: str = None, state: dict = None
+    ) -> ResumableStorageWriter:
+        """
+        Can be overridden in inherited class to support files written over many
+        requests, ie resumable uploads. Returns a writer that stores the file
+        once closed, started again from the state of the last writer suspended
+        when given.
+
+        :param filename: the target filename.
+        :param content_type: the content type of the file if known.
+        :param state: the state returned by the last writer's suspend.
+        """
+        raise NotImplementedError(
+            "%s does not support resumable writes." % type(self).__name__
+        )
+
+    def copy(self, source: str, target: str, content_type: str = None) -> None:
+        """
+        Can be overridden in inherited class to copy the file within the store
+        without reading it, ie server side. By default the source is opened and
+        streamed into :meth:`open_writer`.
+
+        :param source: the filename to copy.
+        :param target: the target filename.
+        :param content_type: the content type of the file if known.
+        """
+        with self.open(source) as source_file:
+            with self.open_writer(target, content_type) as writer:
+                copy_stream(source_file, writer, chunk_size=64 * KB)
+
     def delete(self, filename: str) -> None:
         """
         Should be overridden in inherited class and deletes the given file.
@@ -34,12 +176,22 @@ class Storage:
         """
         raise NotImplementedError()
 
+    def local_path(self, filename: str) -> typing.Optional[str]:
+        """
+        Can be overridden in inherited class to return the path of the file on
+        the local file system, if it has one, so it can be read directly
+        without copying it, ie by another process.
+
+        :param filename: The filename to get the path for.
+        """
+        return None
+
     def locate(self, filename: str) -> str:
         """
         If overridden in the inherited class, should locate the file's url
         to share in public space or a path of some sort to locate it.
 
-        This method is not used internally by starlette-files it is just a 
+        This method is not used internally by starlette-files it is just a
         handy helper that gets returned by an Attachment property.
 
         :param filename: The filename to locate.
@@ -1,20 +1,107 @@
+import hashlib
+import shutil
 import typing
-from os import makedirs, remove
-from os.path import abspath, dirname, exists, join
+import uuid
+from os import listdir, makedirs, remove, rename, replace
+from os.path import abspath, dirname, exists, isfile, join, split
 
 from ..constants import KB
 from ..helpers import copy_stream
-from .base import Storage
+from ..instrumentation import instrumented
+from .base import ResumableStorageWriter, Storage, StorageWriter
+
+
+class FileSystemStorageWriter(StorageWriter):
+    """
+    Writes to a temporary file next to the target which is moved into place
+    once closed, so a file is never read while part written and two writers
+    of the same file, ie the same rendition, do not interleave.
+    """
+
+    def __init__(self, physical_path: str) -> None:
+        super().__init__()
+        self.physical_path = physical_path
+        self.temporary_path = f"{physical_path}.{uuid.uuid4().hex}.part"
+        self.file = open(self.temporary_path, mode="wb")
+
+    def write(self, data: bytes) -> int:
+        self.file.write(data)
+        return super().write(data)
+
+    def close(self) -> None:
+        super().close()
+        self.file.close()
+        if self.temporary_path != self.physical_path:
+            replace(self.temporary_path, self.physical_path)
+
+    def abort(self) -> None:
+        super().abort()
+        self.file.close()
+        remove(self.temporary_path)
+
+
+class FileSystemResumableWriter(ResumableStorageWriter, FileSystemStorageWriter):
+    """
+    Appends to the file in place. It is cut back to the offset in the state
+    when resumed in case a request wrote more than was recorded.
+    """
+
+    def __init__(self, physical_path: str, state: dict = None) -> None:
+        ResumableStorageWriter.__init__(self)
+        self.physical_path = physical_path
+        # the upload's own unique path is written to directly
+        self.temporary_path = physical_path
+
+        if state is None:
+            self.file = open(physical_path, mode="wb")
+        else:
+            self.file = open(physical_path, mode="r+b")
+            self.file.truncate(state["offset"])
+            self.file.seek(state["offset"])
+            self.bytes_written = state["offset"]
+
+    def suspend(self) -> dict:
+        self.closed = True
+        self.file.close()
+        return {"offset": self.bytes_written}
 
 
 class FileSystemStorage(Storage):
-    def __init__(self, root_path: str, chunk_size: int = 32 * KB):
+    def __init__(
+        self,
+        root_path: str,
+        chunk_size: int = 32 * KB,
+        shard_depth: int = 0,
+        shard_width: int = 2,
+    ):
         self.root_path = abspath(root_path)
         self.chunk_size = chunk_size
+        self.shard_depth = shard_depth
+        self.shard_width = shard_width
+
+    def _get_shards(self, name: str) -> typing.List[str]:
+        """
+        returns the sub directories a file is nested in, derived from a hash
+        of its name so files are evenly spread regardless of how they are named.
+
+        ie: with a depth of 2 and a width of 2 'foo.jpeg' gives ['ba', '86']
+        """
+
+        if not self.shard_depth:
+            return []
+
+        digest = hashlib.md5(name.encode("utf-8")).hexdigest()
+        width = self.shard_width
+        return [digest[i * width : (i + 1) * width] for i in range(self.shard_depth)]
+
+    def _get_relative_path(self, filename: str) -> str:
+        directory, name = split(filename)
+        return join(directory, *self._get_shards(name), name)
 
     def _get_physical_path(self, filename: str) -> str:
-        return join(self.root_path, filename)
+        return join(self.root_path, self._get_relative_path(filename))
 
+    @instrumented
     def put(self, filename: str, stream: typing.IO) -> int:
         physical_path = self._get_physical_path(filename)
         physical_directory = dirname(physical_path)
@@ -27,12 +114,73 @@ class FileSystemStorage(Storage):
         with open(physical_path, mode="wb") as target_file:
             return copy_stream(stream, target_file, chunk_size=self.chunk_size)
 
+    @instrumented
+    def open_writer(
+        self, filename: str, content_type: str = None
+    ) -> FileSystemStorageWriter:
+        physical_path = self._get_physical_path(filename)
+        makedirs(dirname(physical_path), exist_ok=True)
+        return FileSystemStorageWriter(physical_path)
+
+    @instrumented
+    def open_resumable(
+        self, filename: str, content_type: str = None, state: dict = None
+    ) -> FileSystemResumableWriter:
+        physical_path = self._get_physical_path(filename)
+        makedirs(dirname(physical_path), exist_ok=True)
+        return FileSystemResumableWriter(physical_path, state)
+
+    @instrumented
+    def copy(self, source: str, target: str, content_type: str = None) -> None:
+        physical_path = self._get_physical_path(target)
+        makedirs(dirname(physical_path), exist_ok=True)
+        shutil.copyfile(self._get_physical_path(source), physical_path)
+
+    @instrumented
     def delete(self, filename: str) -> None:
         physical_path = self._get_physical_path(filename)
         remove(physical_path)
 
+    @instrumented
     def open(self, filename: str, mode: str = "rb") -> typing.IO:
         return open(self._get_physical_path(filename), mode=mode)
 
+    def local_path(self, filename: str) -> str:
+        return self._get_physical_path(filename)
+
+    @instrumented
     def locate(self, filename: str) -> str:
-        return f"{self.root_path}/{filename}"
+        return f"{self.root_path}/{self._get_relative_path(filename)}"
+
+    def migrate(self, directory: str) -> int:
+        """
+        moves the files stored flat in the given directory into the sharded
+        layout. this is safe to run more than once and files that are already
+        sharded are left untouched.
+
+        :param directory: the directory within the storage, ie 'images'.
+        :return: the number of files moved.
+        """
+
+        if not self.shard_depth:
+            return 0
+
+        flat_directory = join(self.root_path, directory)
+
+        if not exists(flat_directory):
+            return 0
+
+        moved = 0
+
+        for name in listdir(flat_directory):
+            flat_path = join(flat_directory, name)
+
+            if not isfile(flat_path):
+                continue
+
+            physical_path = self._get_physical_path(join(directory, name))
+            makedirs(dirname(physical_path), exist_ok=True)
+            rename(flat_path, physical_path)
+            moved += 1
+
+        return moved
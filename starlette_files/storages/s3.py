@@ -2,9 +2,10 @@ import typing
 import urllib
 from io import BytesIO
 
-from ..constants import KB
+from ..constants import MB
 from ..exceptions import MissingDependencyError
-from .base import Storage
+from ..instrumentation import instrumented
+from .base import ResumableStorageWriter, Storage, StorageWriter
 
 # Importing optional stuff required by S3 store
 try:
@@ -13,6 +14,123 @@ except ImportError:  # pragma: no cover
     boto3 = None
 
 
+class S3StorageWriter(StorageWriter):
+    """
+    Uploads the bytes written as a multipart upload, sending each part as soon
+    as the storage's part_size has been written so the whole file is never held
+    in memory. Files smaller than a single part are uploaded in one request.
+    """
+
+    def __init__(self, storage: "S3Storage", path: str, content_type: str = None):
+        super().__init__()
+        self.storage = storage
+        self.path = path
+        self.content_type = content_type
+        self.buffer = bytearray()
+        self.upload = None
+        self.parts: typing.List[dict] = []
+
+    def write(self, data: bytes) -> int:
+        self.buffer += data
+        if len(self.buffer) >= self.storage.part_size:
+            self._upload_part()
+        return super().write(data)
+
+    def _upload_part(self) -> None:
+        if self.upload is None:
+            self.upload = self.storage._create_multipart_upload(
+                self.path, self.content_type
+            )
+
+        part_number = len(self.parts) + 1
+        part = self.upload.Part(part_number).upload(Body=bytes(self.buffer))
+        self.parts.append({"ETag": part["ETag"], "PartNumber": part_number})
+        self.buffer = bytearray()
+
+    def close(self) -> None:
+        try:
+            if self.upload is None:
+                self.storage._upload_file(
+                    self.path, bytes(self.buffer), self.content_type
+                )
+            else:
+                if self.buffer:
+                    self._upload_part()
+                self.upload.complete(MultipartUpload={"Parts": self.parts})
+        except BaseException:
+            # the parts already uploaded are kept, and billed, until aborted
+            self.abort()
+            raise
+
+        super().close()
+
+    def abort(self) -> None:
+        super().abort()
+
+        if self.upload is not None:
+            self.upload.abort()
+
+
+class S3ResumableWriter(ResumableStorageWriter, S3StorageWriter):
+    """
+    Keeps the multipart upload open between requests. Bytes that do not fill
+    a part when suspended are kept in a temporary object next to the file,
+    named after the offset they start at, and read back when resumed. These
+    are deleted once the upload is closed or aborted.
+    """
+
+    def __init__(
+        self,
+        storage: "S3Storage",
+        path: str,
+        content_type: str = None,
+        state: dict = None,
+    ):
+        S3StorageWriter.__init__(self, storage, path, content_type)
+
+        if state is None:
+            self.upload = storage._create_multipart_upload(path, content_type)
+            return
+
+        self.upload = storage.bucket.Object(path).MultipartUpload(state["upload_id"])
+        self.parts = state["parts"]
+        self.bytes_written = state["offset"]
+
+        if state["tail"]:
+            tail = storage.bucket.Object(self._tail_path(state["tail"])).get()
+            # a request may have written more than was recorded
+            self.buffer = bytearray(tail["Body"].read()[: state["tail"]])
+
+    def _tail_path(self, length: int) -> str:
+        return f"{self.path}.tail-{self.bytes_written - length}"
+
+    def _delete_tails(self) -> None:
+        self.storage.bucket.objects.filter(Prefix=f"{self.path}.tail-").delete()
+
+    def suspend(self) -> dict:
+        self.closed = True
+
+        if self.buffer:
+            self.storage.bucket.put_object(
+                Key=self._tail_path(len(self.buffer)), Body=bytes(self.buffer)
+            )
+
+        return {
+            "upload_id": self.upload.id,
+            "parts": self.parts,
+            "offset": self.bytes_written,
+            "tail": len(self.buffer),
+        }
+
+    def close(self) -> None:
+        super().close()
+        self._delete_tails()
+
+    def abort(self) -> None:
+        super().abort()
+        self._delete_tails()
+
+
 class S3Storage(Storage):
     def __init__(
         self,
@@ -24,6 +142,8 @@ class S3Storage(Storage):
         prefix: str = None,
         endpoint_url: str = None,
         acl: str = "private",
+        part_size: int = 8 * MB,
+        immutable: bool = False,
     ) -> None:
         if boto3 is None:  # pragma: no cover
             raise MissingDependencyError(
@@ -50,24 +170,45 @@ class S3Storage(Storage):
         self.max_age = max_age
         self.prefix = prefix
         self.acl = acl
+        # s3 requires every part except the last to be at least 5MB
+        self.part_size = max(part_size, 5 * MB)
+        self.immutable = immutable
 
     def get_s3_path(self, filename: str):
         if self.prefix:
             return "{0}/{1}".format(self.prefix, filename)
         return filename
 
+    @property
+    def cache_control(self) -> str:
+        # files whose names change with their content are never revalidated
+        if self.immutable:
+            return f"max-age={self.max_age}, immutable"
+        return f"max-age={self.max_age}"
+
     def _upload_file(
-        self, filename: str, data: str, content_type: str, rrs: bool = False
+        self,
+        filename: str,
+        data: typing.Union[bytes, str],
+        content_type: typing.Optional[str],
+        rrs: bool = False,
     ):
         return self.bucket.put_object(
             Key=filename,
             Body=data,
             ACL=self.acl,
-            CacheControl="max-age=" + str(self.max_age),
+            CacheControl=self.cache_control,
             StorageClass="REDUCED_REDUNDANCY" if rrs else "STANDARD",
             ContentType=content_type or "",
         )
 
+    def _create_multipart_upload(self, filename: str, content_type: str):
+        extra = {"ContentType": content_type} if content_type else {}
+        return self.bucket.Object(filename).initiate_multipart_upload(
+            ACL=self.acl, CacheControl=self.cache_control, **extra
+        )
+
+    @instrumented
     def put(self, filename: str, stream: typing.IO) -> int:
         path = self.get_s3_path(filename)
         stream.seek(0)
@@ -77,10 +218,31 @@ class S3Storage(Storage):
         self._upload_file(path, data, content_type, rrs=rrs)
         return len(data)
 
+    @instrumented
+    def open_writer(self, filename: str, content_type: str = None) -> "S3StorageWriter":
+        return S3StorageWriter(self, self.get_s3_path(filename), content_type)
+
+    @instrumented
+    def open_resumable(
+        self, filename: str, content_type: str = None, state: dict = None
+    ) -> "S3ResumableWriter":
+        return S3ResumableWriter(self, self.get_s3_path(filename), content_type, state)
+
+    @instrumented
+    def copy(self, source: str, target: str, content_type: str = None) -> None:
+        # copied within s3 so the bytes never leave the bucket, the content
+        # type and cache control are copied with it
+        copy_source = {"Bucket": self.bucket.name, "Key": self.get_s3_path(source)}
+        self.bucket.Object(self.get_s3_path(target)).copy_from(
+            CopySource=copy_source, ACL=self.acl
+        )
+
+    @instrumented
     def delete(self, filename: str) -> None:
         path = self.get_s3_path(filename)
         self.bucket.Object(path).delete()
 
+    @instrumented
     def open(self, filename: str, mode: str = "rb") -> typing.IO:
         path = self.get_s3_path(filename)
         obj = self.bucket.Object(path).get()
@@ -106,6 +268,7 @@ class S3Storage(Storage):
         split_url = split_url._replace(query="&".join(joined_qs))
         return split_url.geturl()
 
+    @instrumented
     def locate(self, filename) -> str:
         path = self.get_s3_path(filename)
         params = {"Key": path, "Bucket": self.bucket.name}
@@ -0,0 +1,221 @@
+import typing
+
+from .constants import KB, MB
+from .exceptions import MissingDependencyError, MultipartParseError
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    from starlette.requests import Request
+
+    from .fields import FileAttachment
+    from .ingest import Ingest
+
+
+def _import_multipart():
+    try:
+        import python_multipart as multipart
+        from python_multipart.multipart import parse_options_header
+    except ImportError:  # pragma: no cover
+        try:
+            import multipart
+            from multipart.multipart import parse_options_header
+        except ImportError:
+            raise MissingDependencyError(
+                "python-multipart must be installed to use 'parse_upload'."
+            )
+
+    return multipart, parse_options_header
+
+
+class UploadParser:
+    """
+    Parses a multipart/form-data body written a chunk at a time, the files
+    named in attachments are passed straight to their ingest as they arrive
+    and the other fields are kept as strings in the form.
+
+    :param content_type: the request's content type header with the boundary.
+    :param attachments: the attachment class for each file field by name.
+    :param max_field_size: the most bytes allowed in each field that is not a
+        file.
+    """
+
+    def __init__(
+        self,
+        content_type: str,
+        attachments: typing.Dict[str, typing.Type["FileAttachment"]],
+        max_field_size: int = MB,
+    ) -> None:
+        multipart, parse_options_header = _import_multipart()
+
+        self.attachments = attachments
+        self.max_field_size = max_field_size
+        self.form: typing.Dict[str, typing.Any] = {}
+        # the attachments stored so far, deleted if the upload is aborted
+        self.stored: typing.List["FileAttachment"] = []
+        self._parse_options_header = parse_options_header
+
+        _, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+
+        if not boundary:
+            raise MultipartParseError("Missing boundary in multipart content type.")
+
+        self._parser = multipart.MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+        self._headers: typing.Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._name: typing.Optional[str] = None
+        self._field: typing.Optional[bytearray] = None
+        self._ingest: typing.Optional["Ingest"] = None
+
+    def write(self, data: bytes) -> None:
+        self._parser.write(data)
+
+    def finalize(self) -> None:
+        self._parser.finalize()
+
+    def abort(self) -> None:
+        """discards the file being written and deletes those already stored"""
+
+        if self._ingest is not None:
+            self._ingest.abort()
+            self._ingest = None
+
+        for attachment in self.stored:
+            attachment.storage.delete(attachment.path)
+
+        self.stored = []
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = self._parse_options_header(
+            self._headers.get(b"content-disposition", b"")
+        )
+
+        name = options.get(b"name")
+
+        if name is None:
+            raise MultipartParseError("Missing name in the content disposition.")
+
+        self._name = name.decode("utf-8")
+        self._field = None
+        self._ingest = None
+
+        if b"filename" not in options:
+            self._field = bytearray()
+            return
+
+        filename = options[b"filename"].decode("utf-8")
+        attachment_class = self.attachments.get(self._name)
+
+        # files for other fields, or an empty file input, are skipped
+        if attachment_class is not None and filename:
+            self._ingest = attachment_class.ingest(filename)
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._ingest is not None:
+            self._ingest.write(data[start:end])
+
+        elif self._field is not None:
+            self._field += data[start:end]
+            if len(self._field) > self.max_field_size:
+                raise MultipartParseError(
+                    "Field %s is larger than: %d bytes"
+                    % (self._name, self.max_field_size)
+                )
+
+    def _on_part_end(self) -> None:
+        if self._ingest is not None:
+            attachment = self._ingest.close()
+            self._ingest = None
+            self.stored.append(attachment)
+            self.form[self._name] = attachment  # type: ignore
+
+        elif self._field is not None:
+            self.form[self._name] = self._field.decode("utf-8")  # type: ignore
+            self._field = None
+
+
+async def batch_stream(
+    stream: typing.AsyncIterator[bytes], size: int
+) -> typing.AsyncIterator[bytes]:
+    """
+    joins the chunks of the stream until there are at least size bytes, so the
+    much smaller chunks a request is received in are handed to a thread in
+    fewer, larger writes.
+    """
+
+    pending = bytearray()
+
+    async for chunk in stream:
+        pending += chunk
+        if len(pending) >= size:
+            yield bytes(pending)
+            pending.clear()
+
+    if pending:
+        yield bytes(pending)
+
+
+async def parse_upload(
+    request: "Request",
+    attachments: typing.Dict[str, typing.Type["FileAttachment"]],
+    max_field_size: int = MB,
+    write_size: int = 256 * KB,
+) -> typing.Dict[str, typing.Any]:
+    """
+    reads a multipart/form-data request's body a chunk at a time and returns
+    its fields, with each file named in attachments as the attachment stored
+    from it, ie:
+
+        form = await parse_upload(request, {"file": MyImage})
+        image = MyImageModel(file=form["file"], title=form["title"])
+
+    unlike request.form() the files are written straight to the storage
+    rather than spooled to a temporary file first. a file that is too large or
+    not an allowed content type raises as soon as enough of it has arrived,
+    the rest is not read and none of the files are stored.
+
+    the body is parsed in a thread once write_size bytes have arrived.
+    """
+
+    from starlette.concurrency import run_in_threadpool
+
+    parser = UploadParser(
+        request.headers.get("content-type", ""), attachments, max_field_size
+    )
+
+    # the storages are written to in the same thread pool as sync endpoints
+    try:
+        async for data in batch_stream(request.stream(), write_size):
+            await run_in_threadpool(parser.write, data)
+        await run_in_threadpool(parser.finalize)
+    except BaseException:
+        await run_in_threadpool(parser.abort)
+        raise
+
+    return parser.form
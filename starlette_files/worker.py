@@ -0,0 +1,122 @@
+import argparse
+import importlib
+import logging
+import multiprocessing
+import signal
+import typing
+
+from .image.queue import RenditionQueue, RenditionWorker
+from .instrumentation import LoggingSink, set_sink
+
+logger = logging.getLogger("starlette_files")
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="starlette-files-worker",
+        description="creates the renditions queued in a rendition queue",
+    )
+    parser.add_argument("queue", help="the path of the queue's database")
+    parser.add_argument(
+        "--import",
+        dest="modules",
+        action="append",
+        default=[],
+        metavar="MODULE",
+        help="a module to import first, ie the one that sets up the storages",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="the number of worker processes (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10,
+        help="the jobs each process claims at a time (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=1,
+        help="the seconds to wait when there are no jobs (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=5,
+        help="the times a job is tried before it is failed (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=10,
+        help="the seconds before the first retry, doubling each time "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--until-empty",
+        action="store_true",
+        help="exit once there are no jobs ready rather than waiting for more",
+    )
+    parser.add_argument(
+        "--log-metrics",
+        action="store_true",
+        help="log the timings of each stage, the queue's latency and depth",
+    )
+    return parser
+
+
+def run_worker(options: argparse.Namespace) -> int:
+    """runs a worker in this process until it is stopped or the queue is empty"""
+
+    for module in options.modules:
+        importlib.import_module(module)
+
+    if options.log_metrics:
+        set_sink(LoggingSink(logging.INFO))
+
+    queue = RenditionQueue(
+        options.queue, max_attempts=options.max_attempts, backoff=options.backoff
+    )
+    worker = RenditionWorker(
+        queue, batch_size=options.batch_size, poll_interval=options.poll_interval
+    )
+
+    # the jobs already claimed are finished before exiting
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+
+    return worker.run(until_empty=options.until_empty)
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> None:
+    options = get_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(process)d %(message)s")
+
+    if options.processes <= 1:
+        count = run_worker(options)
+        logger.info("ran %d jobs", count)
+        return
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(options,))
+        for _ in range(options.processes)
+    ]
+
+    for process in processes:
+        process.start()
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # the processes got the interrupt too, wait for them to finish
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
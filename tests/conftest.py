@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from starlette_files.storages import FileSystemStorage
+
+
+@pytest.fixture
+def storage(request, tmp_path, monkeypatch):
+    """
+    a file system storage in a temporary directory, set as the storage of
+    each of the attachment classes listed in the test module's
+    attachment_classes.
+    """
+
+    storage = FileSystemStorage(str(tmp_path / "files"))
+
+    for attachment_class in getattr(request.module, "attachment_classes", []):
+        monkeypatch.setattr(attachment_class, "storage", storage, raising=False)
+
+    return storage
+
+
+@pytest.fixture
+def stored_files(storage):
+    """lists the files stored in a directory of the storage"""
+
+    def stored_files(directory):
+        path = os.path.join(storage.root_path, directory)
+        return sorted(os.listdir(path)) if os.path.exists(path) else []
+
+    return stored_files
+
+
+@pytest.fixture
+def stored_bytes(storage):
+    """reads the bytes of an attachment in the storage as they are stored"""
+
+    def stored_bytes(attachment):
+        with attachment.open_stored as f:
+            return f.read()
+
+    return stored_bytes
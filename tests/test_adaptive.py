@@ -0,0 +1,62 @@
+import io
+
+import pytest
+
+from starlette_files.image import adaptive
+from starlette_files.image.executors import render
+from starlette_files.image.filter import ImageFilter
+
+pytest.importorskip("numpy")
+
+
+def create_image(noisy):
+    from PIL import Image
+
+    if noisy:
+        return Image.effect_noise((800, 600), 64).convert("RGB")
+
+    # a smooth gradient with little detail
+    return Image.linear_gradient("L").resize((800, 600)).convert("RGB")
+
+
+def encoded(image):
+    data = io.BytesIO()
+    image.save(data, "PNG")
+    return data.getvalue()
+
+
+def test_ssim():
+    image = create_image(noisy=True)
+
+    assert adaptive.ssim(image, image) == pytest.approx(1)
+    assert adaptive.ssim(image, create_image(noisy=False)) < 0.5
+
+
+def test_quality_auto_lower_for_flat_images():
+    env = {"output-quality-target": 0.97}
+
+    flat = adaptive.choose_quality(create_image(noisy=False), "JPEG", env)
+    noisy = adaptive.choose_quality(create_image(noisy=True), "JPEG", env)
+
+    assert flat in adaptive.SEARCH_QUALITIES
+    assert flat < noisy
+
+
+@pytest.mark.parametrize("max_bytes", [150000, 250000])
+def test_max_bytes(max_bytes):
+    image = create_image(noisy=True)
+
+    result = render(
+        encoded(image), ImageFilter(["format-jpeg", f"maxbytes-{max_bytes}"]), None
+    )
+
+    assert result.size <= max_bytes
+
+
+def test_max_bytes_stops_at_lowest_quality():
+    image = create_image(noisy=True)
+
+    result = render(encoded(image), ImageFilter(["format-jpeg", "maxbytes-1000"]), None)
+
+    lowest = adaptive._encode(image, "JPEG", {}, adaptive.SEARCH_QUALITIES[0])
+    assert result.data == lowest
@@ -0,0 +1,168 @@
+import gzip
+import io
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from starlette_files.compression import (
+    CompressingWriter,
+    accepts_encoding,
+    file_response,
+    is_compressible,
+    open_decompressed,
+)
+from starlette_files.constants import KB
+from starlette_files.fields import FileAttachment
+
+TEXT = b"a line of text that compresses well\n" * 4 * KB
+
+
+class Document(FileAttachment):
+    directory = "documents"
+    allowed_content_types = ["text/plain", "application/pdf"]
+    max_length = 1024 * KB
+    compression = "gzip"
+
+
+attachment_classes = [Document]
+
+
+def test_is_compressible():
+    assert is_compressible("text/csv")
+    assert is_compressible("application/json")
+    assert not is_compressible("image/png")
+    assert not is_compressible("application/json", ["text/*"])
+
+
+def test_accepts_encoding():
+    assert accepts_encoding("gzip, br", "gzip")
+    assert accepts_encoding("*", "zstd")
+    assert not accepts_encoding("gzip;q=0, *", "gzip")
+    assert not accepts_encoding("br", "gzip")
+    assert not accepts_encoding(None, "gzip")
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "zstd"])
+def test_compressing_writer(storage, encoding):
+    if encoding == "zstd":
+        pytest.importorskip("zstandard")
+
+    writer = CompressingWriter(storage.open_writer("a.txt"), encoding)
+
+    with writer:
+        for start in range(0, len(TEXT), 10 * KB):
+            writer.write(TEXT[start : start + 10 * KB])
+
+    # the bytes written are those before compression
+    assert writer.bytes_written == len(TEXT)
+
+    with storage.open("a.txt") as f:
+        stored = f.read()
+
+    assert len(stored) < len(TEXT)
+
+    with open_decompressed(io.BytesIO(stored), encoding) as f:
+        assert f.read() == TEXT
+
+
+def test_compressing_writer_abort(storage):
+    writer = CompressingWriter(storage.open_writer("a.txt"), "gzip")
+    writer.write(TEXT)
+    writer.abort()
+
+    assert not os.path.exists(os.path.join(storage.root_path, "a.txt"))
+
+
+def test_compressing_writer_close_fails(storage):
+    inner = storage.open_writer("a.txt")
+    writer = CompressingWriter(inner, "gzip")
+
+    def broken(data):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        with writer:
+            writer.write(TEXT)
+            # the rest is written as the compressor is flushed
+            inner.write = broken
+
+    # the inner writer is aborted rather than left part written
+    assert os.listdir(storage.root_path) == []
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError):
+        open_decompressed(io.BytesIO(), "br")
+
+
+def test_attachment_compressed(stored_bytes):
+    attachment = Document.create_from(io.BytesIO(TEXT), "notes.txt")
+
+    assert attachment.content_type == "text/plain"
+    assert attachment.content_encoding == "gzip"
+    assert attachment.file_size == len(TEXT)
+    assert gzip.decompress(stored_bytes(attachment)) == TEXT
+
+    with attachment.open as f:
+        assert f.read() == TEXT
+
+
+def test_attachment_ingest_compressed(stored_bytes):
+    ingest = Document.ingest("notes.txt")
+    for start in range(0, len(TEXT), 10 * KB):
+        ingest.write(TEXT[start : start + 10 * KB])
+    attachment = ingest.close()
+
+    assert attachment.content_encoding == "gzip"
+    assert gzip.decompress(stored_bytes(attachment)) == TEXT
+
+
+def test_attachment_not_compressible(stored_bytes):
+    content = b"%PDF-1.4\n" + os.urandom(KB)
+    attachment = Document.create_from(io.BytesIO(content), "report.pdf")
+
+    assert attachment.content_encoding is None
+    assert stored_bytes(attachment) == content
+
+
+@pytest.fixture
+def client(storage):
+    attachments = {
+        "text": Document.create_from(io.BytesIO(TEXT), "notes.txt"),
+        "pdf": Document.create_from(io.BytesIO(b"%PDF-1.4\n"), "report.pdf"),
+    }
+
+    def endpoint(request):
+        return file_response(request, attachments[request.path_params["name"]])
+
+    app = Starlette(routes=[Route("/{name}", endpoint)])
+    return TestClient(app)
+
+
+def test_file_response_compressed(client):
+    response = client.get("/text", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"].startswith("text/plain")
+    # the client decodes the gzip it was sent
+    assert response.content == TEXT
+
+
+def test_file_response_decompressed(client):
+    response = client.get("/text", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == TEXT
+
+
+def test_file_response_uncompressed(client):
+    response = client.get("/pdf", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+    assert response.content == b"%PDF-1.4\n"
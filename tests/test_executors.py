@@ -0,0 +1,65 @@
+import io
+
+import pytest
+
+from starlette_files.exceptions import InvalidImageOperationError
+from starlette_files.fields import ImageAttachment, ImageRenditionAttachment
+from starlette_files.image.executors import ProcessPoolRenditionExecutor
+
+SPECS = [["width-100"], ["fill-50x50", "format-webp"]]
+
+
+class Image(ImageAttachment):
+    allowed_content_types = ["image/jpeg"]
+
+
+class Rendition(ImageRenditionAttachment):
+    pass
+
+
+attachment_classes = [Image, Rendition]
+
+
+@pytest.fixture
+def executor():
+    executor = ProcessPoolRenditionExecutor(processes=1, timeout=30)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def image(storage):
+    from PIL import Image as PILImage
+
+    data = io.BytesIO()
+    PILImage.effect_noise((400, 300), 32).convert("RGB").save(data, "JPEG")
+    return Image.create_from(io.BytesIO(data.getvalue()), "image.jpg")
+
+
+def rendered(renditions, stored_bytes):
+    return [
+        (rendition.saved_filename, rendition.width, rendition.height)
+        + (stored_bytes(rendition),)
+        for rendition in renditions
+    ]
+
+
+def test_executor_matches_in_process(image, executor, stored_bytes, monkeypatch):
+    expected = rendered(Rendition.create_many(image, SPECS), stored_bytes)
+
+    monkeypatch.setattr(Rendition, "executor", executor)
+    result = rendered(Rendition.create_many(image, SPECS), stored_bytes)
+
+    assert executor._pool is not None
+    assert result == expected
+    assert [r[1:3] for r in result] == [(100, 75), (50, 50)]
+
+
+def test_executor_invalid_specs(image, executor, monkeypatch):
+    monkeypatch.setattr(Rendition, "executor", executor)
+
+    with pytest.raises(InvalidImageOperationError):
+        Rendition.create_many(image, [["width-100"], ["bogus-1"]])
+
+    # nothing was sent to the workers
+    assert executor._pool is None
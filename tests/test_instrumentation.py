@@ -0,0 +1,54 @@
+import io
+
+import pytest
+
+from starlette_files.image.filter import ImageFilter
+from starlette_files.instrumentation import MetricsSink, set_sink
+
+
+class ListSink(MetricsSink):
+    def __init__(self):
+        self.records = []
+
+    def record(self, name, duration, **data):
+        self.records.append((name, data))
+
+
+@pytest.fixture
+def sink():
+    sink = ListSink()
+    set_sink(sink)
+    yield sink
+    set_sink(None)
+
+
+def open_image():
+    from PIL import Image
+
+    data = io.BytesIO()
+    Image.new("RGB", (40, 30)).save(data, "PNG")
+    return Image.open(io.BytesIO(data.getvalue()))
+
+
+def test_decode_timed(sink):
+    image = open_image()
+
+    ImageFilter(["width-20"]).process(None, image)
+
+    names = [name for name, _ in sink.records]
+    assert names == ["image.decode", "image.operation"]
+    assert sink.records[0][1] == {"format": "PNG", "width": 40, "height": 30}
+    assert sink.records[1][1]["operation"] == "width"
+    # decoded before the operations
+    assert image.tile == []
+
+
+def test_not_decoded_without_sink():
+    image = open_image()
+
+    result, output_format, env = ImageFilter(["format-webp"]).process(None, image)
+
+    # left to be decoded when the pixels are first needed, ie to encode
+    assert result is image
+    assert image.tile != []
+    assert output_format == "WEBP"
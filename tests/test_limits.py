@@ -0,0 +1,140 @@
+import io
+import threading
+import time
+
+import pytest
+
+from starlette_files.exceptions import DecodeTimeoutError, MaximumAllowedPixelsError
+from starlette_files.fields import ImageAttachment, ImageRenditionAttachment
+from starlette_files.image.limits import DecodeLimiter, check_pixels, estimate_memory
+
+
+class Image(ImageAttachment):
+    allowed_content_types = ["image/png"]
+    max_pixels = 500 * 500
+
+
+class Rendition(ImageRenditionAttachment):
+    max_pixels = 500 * 500
+
+
+attachment_classes = [Image, Rendition]
+
+
+def encoded(size):
+    from PIL import Image as PILImage
+
+    data = io.BytesIO()
+    PILImage.new("RGB", size).save(data, "PNG")
+    return io.BytesIO(data.getvalue())
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    """the sizes of the images decoded"""
+
+    from PIL import ImageFile
+
+    sizes = []
+    load = ImageFile.ImageFile.load
+
+    def counted(self):
+        sizes.append(self.size)
+        return load(self)
+
+    monkeypatch.setattr(ImageFile.ImageFile, "load", counted)
+    return sizes
+
+
+def test_check_pixels():
+    check_pixels((500, 500), 500 * 500)
+    check_pixels((5000, 5000), None)
+
+    with pytest.raises(MaximumAllowedPixelsError):
+        check_pixels((501, 500), 500 * 500)
+
+
+def test_estimate_memory():
+    assert estimate_memory((100, 100), "L") == 10000
+    assert estimate_memory((100, 100), "RGB") == 40000
+
+
+def test_upload_rejected_before_decode(storage, decoded):
+    with pytest.raises(MaximumAllowedPixelsError):
+        Image.create_from(encoded((1000, 1000)), "image.png")
+
+    assert decoded == []
+
+
+def test_rendition_rejected_before_decode(storage, decoded, monkeypatch):
+    image = Image.create_from(encoded((400, 400)), "image.png")
+    decoded.clear()
+    monkeypatch.setattr(Rendition, "max_pixels", 100 * 100)
+
+    with pytest.raises(MaximumAllowedPixelsError):
+        Rendition.create_from(image, ["width-50"])
+
+    assert decoded == []
+
+
+def test_decode_reserves_memory(storage, monkeypatch):
+    limiter = DecodeLimiter(10 * 1000 * 1000)
+    reserved = []
+    acquire = limiter.acquire
+
+    def counted(memory):
+        reserved.append(memory)
+        acquire(memory)
+
+    monkeypatch.setattr(limiter, "acquire", counted)
+    monkeypatch.setattr(Image, "decode_limiter", limiter)
+
+    image = Image.create_from(encoded((400, 300)), "image.png")
+
+    # the size is read from the header and pngs have no placeholder
+    assert reserved == []
+
+    image.build_tiles()
+
+    assert reserved == [estimate_memory((400, 300), "RGB")]
+    assert limiter.reserved == 0
+
+
+def test_reserve_waits_for_memory():
+    limiter = DecodeLimiter(100)
+    events = []
+
+    def decode():
+        with limiter.reserve(50):
+            events.append("second")
+
+    with limiter.reserve(80):
+        thread = threading.Thread(target=decode)
+        thread.start()
+        time.sleep(0.1)
+        # not enough is free until the first is released
+        events.append("first")
+
+    thread.join(1)
+
+    assert events == ["first", "second"]
+    assert limiter.reserved == 0
+
+
+def test_reserve_times_out():
+    limiter = DecodeLimiter(100, timeout=0.05)
+
+    with limiter.reserve(80):
+        with pytest.raises(DecodeTimeoutError):
+            limiter.acquire(50)
+
+    assert limiter.reserved == 0
+
+
+def test_reserve_more_than_the_maximum_alone():
+    limiter = DecodeLimiter(100, timeout=0.05)
+
+    with limiter.reserve(500):
+        assert limiter.reserved == 500
+
+    assert limiter.reserved == 0
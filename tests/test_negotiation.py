@@ -0,0 +1,108 @@
+import io
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from starlette_files.fields import ImageAttachment, ImageRenditionAttachment
+from starlette_files.image.cache import RenditionIndex
+from starlette_files.image.negotiation import (
+    IMMUTABLE_CACHE_CONTROL,
+    matches_etag,
+    negotiate_specs,
+    rendition_response,
+)
+
+
+class Image(ImageAttachment):
+    allowed_content_types = ["image/jpeg"]
+
+
+class Rendition(ImageRenditionAttachment):
+    pass
+
+
+attachment_classes = [Image, Rendition]
+
+
+@pytest.fixture
+def image(tmp_path, storage, monkeypatch):
+    from PIL import Image as PILImage
+
+    monkeypatch.setattr(Rendition, "cache", RenditionIndex(str(tmp_path / "i.db")))
+
+    data = io.BytesIO()
+    PILImage.new("RGB", (400, 300)).save(data, "JPEG")
+    return Image.create_from(io.BytesIO(data.getvalue()), "image.jpg")
+
+
+@pytest.fixture
+def created(monkeypatch):
+    """the filter specs of each rendition created"""
+
+    specs = []
+    create_many = Rendition.create_many.__func__
+
+    def counted(cls, attachment, filter_specs_list):
+        specs.extend(filter_specs_list)
+        return create_many(cls, attachment, filter_specs_list)
+
+    monkeypatch.setattr(Rendition, "create_many", classmethod(counted))
+    return specs
+
+
+@pytest.fixture
+def client(image):
+    async def endpoint(request):
+        return await rendition_response(request, Rendition, image, ["width-100"])
+
+    return TestClient(Starlette(routes=[Route("/", endpoint)]))
+
+
+def test_negotiate_specs():
+    assert negotiate_specs(["width-100", "format-png"], "image/webp,*/*") == [
+        "width-100",
+        "format-webp",
+    ]
+    assert negotiate_specs(["width-100"], "image/*") == ["width-100"]
+
+
+def test_matches_etag():
+    assert matches_etag('"a"', '"a"')
+    assert matches_etag('W/"a"', '"a"')
+    assert matches_etag('"b", W/"a"', '"a"')
+    assert matches_etag("*", '"a"')
+    assert not matches_etag('"b"', '"a"')
+    assert not matches_etag(None, '"a"')
+
+
+def test_rendition_response(client, created):
+    response = client.get("/", headers={"Accept": "image/webp"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["vary"] == "Accept"
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert created == [["width-100", "format-webp"]]
+
+    # found in the cache rather than created again
+    etag = response.headers["etag"]
+    assert client.get("/", headers={"Accept": "image/webp"}).headers["etag"] == etag
+    assert len(created) == 1
+
+
+def test_rendition_response_not_modified(client, created):
+    response = client.get("/")
+    etag = response.headers["etag"]
+
+    response = client.get("/", headers={"Accept": "image/webp"})
+    assert response.headers["etag"] != etag
+
+    created.clear()
+    response = client.get("/", headers={"If-None-Match": f"W/{etag}"})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert created == []
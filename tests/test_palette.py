@@ -0,0 +1,68 @@
+import io
+
+import pytest
+
+from starlette_files.exceptions import InvalidFilterSpecError
+from starlette_files.image.executors import render
+from starlette_files.image.filter import ImageFilter
+
+
+def create_image(mode):
+    """noise, transparent on the left for rgba"""
+
+    from PIL import Image
+
+    noise = Image.effect_noise((200, 100), 64)
+    image = Image.merge("RGB", (noise, Image.new("L", (200, 100)), noise))
+
+    if mode == "RGBA":
+        image.putalpha(Image.new("L", (200, 100), 255))
+        image.paste((0, 0, 0, 0), (0, 0, 50, 100))
+
+    data = io.BytesIO()
+    image.save(data, "PNG")
+    return data.getvalue()
+
+
+def rendered(source, specs):
+    from PIL import Image
+
+    result = render(source, ImageFilter(specs), None)
+    return result, Image.open(io.BytesIO(result.data))
+
+
+@pytest.mark.parametrize("specs", [["format-png8"], ["colors-64"]])
+def test_palette_keeps_transparency(specs):
+    source = create_image("RGBA")
+
+    result, image = rendered(source, specs)
+
+    assert result.format == "PNG"
+    assert image.format == "PNG"
+    assert image.mode == "P"
+    assert "transparency" in image.info
+    rgba = image.convert("RGBA")
+    assert rgba.getpixel((10, 50))[3] == 0
+    assert rgba.getpixel((150, 50))[3] == 255
+    assert result.size < len(source)
+
+
+@pytest.mark.parametrize("dither", ["nodither", "dither"])
+def test_colors(dither):
+    result, image = rendered(create_image("RGB"), [f"colors-16-{dither}"])
+
+    assert image.mode == "P"
+    assert len(image.getcolors()) <= 16
+    assert "transparency" not in image.info
+
+
+def test_colors_other_formats_ignored():
+    result, image = rendered(create_image("RGB"), ["format-jpeg", "colors-16"])
+
+    assert image.format == "JPEG"
+    assert image.mode == "RGB"
+
+
+def test_colors_invalid():
+    with pytest.raises(InvalidFilterSpecError):
+        ImageFilter(["colors-1"]).operations
@@ -0,0 +1,83 @@
+import pickle
+import random
+
+import pytest
+
+from starlette_files.image.planning import fill_crop_box, fill_crop_boxes
+from starlette_files.image.rect import Rect
+
+
+def cases(count=500):
+    """random image sizes, targets and focal points, some without one"""
+
+    rng = random.Random(0)
+
+    for _ in range(count):
+        image_size = (rng.randint(1, 4000), rng.randint(1, 4000))
+        target_size = (rng.randint(1, 1000), rng.randint(1, 1000))
+
+        focal_point = None
+        if rng.random() < 0.75:
+            left = rng.randint(0, image_size[0] - 1)
+            top = rng.randint(0, image_size[1] - 1)
+            focal_point = Rect(
+                left,
+                top,
+                rng.randint(left + 1, image_size[0]),
+                rng.randint(top + 1, image_size[1]),
+            )
+
+        yield image_size, target_size, focal_point, rng.choice([0, 0.5, 1])
+
+
+def test_rect_is_immutable():
+    rect = Rect(10, 20, 110, 70)
+
+    assert rect.size == (100, 50)
+    assert rect.centroid == (60, 45)
+    assert not hasattr(rect, "__dict__")
+    assert pickle.loads(pickle.dumps(rect)) == rect
+
+    with pytest.raises(AttributeError):
+        rect.left = 0
+
+
+def test_fill_crop_box():
+    # no focal point, the centre of the image at the target's aspect ratio
+    assert fill_crop_box((400, 300), (100, 100)) == Rect(50, 0, 350, 300)
+    # the focal point is kept in the box
+    assert fill_crop_box((400, 300), (100, 100), Rect(0, 0, 20, 20)) == Rect(
+        0, 0, 300, 300
+    )
+    # zoomed in to the focal point
+    assert fill_crop_box((400, 300), (100, 100), Rect(0, 0, 20, 20), 1) == Rect(
+        0, 0, 100, 100
+    )
+
+
+def test_fill_crop_boxes_matches_fill_crop_box():
+    np = pytest.importorskip("numpy")
+
+    rows = list(cases())
+    focal_points = [
+        focal_point.as_tuple() if focal_point else (np.nan,) * 4
+        for _, _, focal_point, _ in rows
+    ]
+
+    boxes = fill_crop_boxes(
+        np.array([row[0] for row in rows]),
+        np.array([row[1] for row in rows]),
+        np.array(focal_points),
+        np.array([row[3] for row in rows]),
+    )
+
+    for row, box in zip(rows, boxes):
+        assert fill_crop_box(*row) == Rect(*box.tolist()), row
+
+
+def test_fill_crop_boxes_one_target():
+    np = pytest.importorskip("numpy")
+
+    boxes = fill_crop_boxes(np.array([[400, 300], [300, 400]]), np.array([100, 100]))
+
+    assert boxes.tolist() == [[50, 0, 350, 300], [0, 50, 300, 350]]
@@ -0,0 +1,47 @@
+import io
+
+from starlette_files.fields import ImageAttachment
+from starlette_files.image import preview
+
+
+class Image(ImageAttachment):
+    allowed_content_types = ["image/jpeg", "image/png"]
+
+
+attachment_classes = [Image]
+
+
+def create_image(image_format, color=(200, 30, 30)):
+    from PIL import Image as PILImage
+
+    data = io.BytesIO()
+    PILImage.new("RGB", (640, 480), color).save(data, image_format)
+    return Image.create_from(io.BytesIO(data.getvalue()), "image")
+
+
+def test_dominant_color():
+    from PIL import Image as PILImage
+
+    image = PILImage.new("RGBA", (64, 64), (0, 0, 0, 0))
+    # the transparent pixels are the most common but are skipped
+    image.paste((0, 0, 255, 255), (0, 0, 16, 16))
+
+    assert preview.dominant_color(image) == "#0000ff"
+
+
+def test_jpeg_upload_has_placeholder(storage):
+    image = create_image("JPEG")
+
+    assert image.placeholder.startswith("data:image/")
+    assert len(image.placeholder) < 1000
+    # near the colour of the image, jpeg is not exact
+    red, green, blue = (int(image.dominant_color[i : i + 2], 16) for i in (1, 3, 5))
+    assert red > 150 and green < 80 and blue < 80
+
+
+def test_png_upload_has_no_placeholder(storage):
+    image = create_image("PNG")
+
+    assert image.placeholder is None
+    assert image.dominant_color is None
+    assert (image.width, image.height) == (640, 480)
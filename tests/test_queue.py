@@ -0,0 +1,209 @@
+import io
+import sqlite3
+import time
+
+import pytest
+
+from starlette_files.exceptions import InvalidImageOperationError
+from starlette_files.fields import ImageAttachment, ImageRenditionAttachment
+from starlette_files.image.cache import RenditionIndex, get_rendition_key
+from starlette_files.image.queue import (
+    RenditionQueue,
+    RenditionWorker,
+    class_path,
+    import_class,
+)
+
+
+class Image(ImageAttachment):
+    allowed_content_types = ["image/png"]
+
+
+class Rendition(ImageRenditionAttachment):
+    pass
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return RenditionQueue(str(tmp_path / "queue.db"), max_attempts=2)
+
+
+attachment_classes = [Image, Rendition]
+
+
+@pytest.fixture
+def image(tmp_path, storage, monkeypatch, queue):
+    from PIL import Image as PILImage
+
+    index = RenditionIndex(str(tmp_path / "index.db"))
+    monkeypatch.setattr(Rendition, "cache", index)
+    monkeypatch.setattr(Rendition, "queue", queue)
+
+    data = io.BytesIO()
+    PILImage.new("RGB", (400, 300)).save(data, "PNG")
+    return Image.create_from(io.BytesIO(data.getvalue()), "image.png")
+
+
+def jobs(queue):
+    db = sqlite3.connect(queue.path)
+    try:
+        return db.execute(
+            "SELECT filter_specs, status, attempts, available_on FROM jobs ORDER BY id"
+        ).fetchall()
+    finally:
+        db.close()
+
+
+def test_class_path():
+    assert class_path(Rendition) == f"{__name__}:Rendition"
+    assert import_class(class_path(Rendition)) is Rendition
+
+    class Local(Rendition):
+        pass
+
+    with pytest.raises(ValueError):
+        class_path(Local)
+
+
+def test_enqueue_skips_those_queued(queue, image):
+    assert Rendition.enqueue(image, [["width-100"], ["width-200"]]) == 2
+    # normalised to the same specs as those already queued
+    assert Rendition.enqueue(image, [[" width-100 "], ["width-300"]]) == 1
+
+    assert queue.stats()["queued"] == 3
+
+
+def test_enqueue_unknown_operation(queue, image):
+    with pytest.raises(InvalidImageOperationError):
+        Rendition.enqueue(image, [["width-100"], ["bogus-1"]])
+
+    # none of them are queued
+    assert jobs(queue) == []
+
+
+def test_claim(queue, image):
+    Rendition.enqueue(image, [["width-100"], ["width-200"], ["width-300"]])
+
+    claimed = queue.claim(2)
+
+    assert [job.filter_specs for job in claimed] == [["width-100"], ["width-200"]]
+    assert [job.attempts for job in claimed] == [1, 1]
+    assert [row[1:3] for row in jobs(queue)] == [
+        ("running", 1),
+        ("running", 1),
+        ("queued", 0),
+    ]
+    # those running are not claimed again until the lock timeout
+    assert [job.filter_specs for job in queue.claim(2)] == [["width-300"]]
+    assert queue.claim(2) == []
+
+
+def test_claim_after_lock_timeout(tmp_path, image):
+    queue = RenditionQueue(str(tmp_path / "expired.db"), lock_timeout=-1)
+    queue.enqueue_many(Rendition, [(image, ["width-100"])])
+
+    queue.claim()
+    # left running by a worker that died
+    (job,) = queue.claim()
+
+    assert job.attempts == 2
+
+
+def test_claim_while_locked(tmp_path, image):
+    queue = RenditionQueue(str(tmp_path / "locked.db"), busy_timeout=0.1)
+    queue.enqueue_many(Rendition, [(image, ["width-100"])])
+
+    # another worker holding the write lock for longer than the busy timeout
+    db = sqlite3.connect(queue.path, isolation_level=None)
+    db.execute("BEGIN IMMEDIATE")
+
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            queue.claim()
+    finally:
+        db.execute("ROLLBACK")
+        db.close()
+
+    assert len(queue.claim()) == 1
+
+
+def test_fail_backs_off(queue, image):
+    Rendition.enqueue(image, [["width-100"]])
+
+    (job,) = queue.claim()
+    queue.fail(job, "error")
+
+    _, status, attempts, available_on = jobs(queue)[0]
+    assert (status, attempts) == ("queued", 1)
+    assert available_on == pytest.approx(time.time() + queue.backoff, abs=1)
+    assert queue.claim() == []
+
+
+def test_fail_after_max_attempts(queue, image):
+    Rendition.enqueue(image, [["width-100"]])
+
+    for _ in range(queue.max_attempts):
+        (job,) = queue.claim()
+        queue.fail(job, "error")
+        # ready again without waiting for the backoff
+        sqlite3.connect(queue.path, isolation_level=None).execute(
+            "UPDATE jobs SET available_on = 0 WHERE status = 'queued'"
+        )
+
+    assert jobs(queue)[0][1] == "failed"
+    assert queue.claim() == []
+
+    assert queue.retry_failed() == 1
+    assert queue.claim()[0].attempts == 1
+
+
+def test_stats(queue, image):
+    Rendition.enqueue(image, [["width-100"], ["width-200"], ["width-300"]])
+    queue.complete(queue.claim(1))
+    queue.claim(1)
+
+    stats = queue.stats()
+
+    assert {status: stats[status] for status in ["queued", "running", "done"]} == {
+        "queued": 1,
+        "running": 1,
+        "done": 1,
+    }
+    assert stats["failed"] == 0
+    assert stats["oldest"] >= 0
+
+
+def test_purge(queue, image):
+    Rendition.enqueue(image, [["width-100"], ["width-200"]])
+    queue.complete(queue.claim(1))
+
+    assert queue.purge(older_than=60) == 0
+    assert queue.purge() == 1
+    assert queue.stats()["done"] == 0
+    # once purged it can be queued again
+    assert Rendition.enqueue(image, [["width-100"]]) == 1
+
+
+def test_worker(queue, image):
+    Rendition.enqueue(image, [["width-100"], ["width-200"]])
+
+    assert RenditionWorker(queue).run(until_empty=True) == 2
+
+    assert queue.stats()["done"] == 2
+    # recorded in the rendition class's index
+    (cached,) = Rendition.cache.lookup_many([get_rendition_key(image, ["width-100"])])
+    assert cached["width"] == 100
+
+
+def test_worker_isolates_failures(queue, image):
+    # a spec that parses but fails when run
+    Rendition.enqueue(image, [["width-100"], ["fill-0x0"], ["width-200"]])
+
+    RenditionWorker(queue).run(until_empty=True)
+
+    statuses = {row[0]: row[1] for row in jobs(queue)}
+    assert statuses == {
+        '["width-100"]': "done",
+        '["fill-0x0"]': "queued",
+        '["width-200"]': "done",
+    }
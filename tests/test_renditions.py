@@ -0,0 +1,218 @@
+import io
+
+import pytest
+
+from starlette_files.fields import ImageAttachment, ImageRenditionAttachment
+from starlette_files.image.cache import RenditionIndex, get_specs_key
+
+
+class Image(ImageAttachment):
+    allowed_content_types = ["image/jpeg", "image/png"]
+
+
+class Rendition(ImageRenditionAttachment):
+    pass
+
+
+attachment_classes = [Image, Rendition]
+
+
+def original(**values):
+    data = {
+        "saved_filename": "abc.jpg",
+        "content_digest": "digest",
+        "focal_point_x": 10,
+        "focal_point_y": 20,
+        "focal_point_width": 30,
+        "focal_point_height": 40,
+    }
+    data.update(values)
+    return Image(data)
+
+
+def name(attachment, specs=["width-100"]):
+    return Rendition.get_rendition_name(attachment, specs)
+
+
+def test_name_is_the_same_each_time():
+    assert name(original()) == name(original())
+    assert name(original()).startswith(f"abc-{original().cache_key}-")
+    # the specs are normalised as they are when run
+    assert name(original(), ["width-100", " fill-10x10 "]) == name(
+        original(), ["width-100", "fill-10x10"]
+    )
+
+
+def test_name_changes_with_the_image():
+    assert name(original(content_digest="other")) != name(original())
+    assert name(original(focal_point_x=11)) != name(original())
+    assert name(original(focal_point_height=None)) != name(original())
+
+
+def test_name_changes_with_the_specs():
+    assert name(original(), ["width-200"]) != name(original())
+    assert name(original(), ["width-100", "format-webp"]) != name(original())
+
+
+def test_name_changes_with_the_defaults():
+    class Resampled(Image):
+        resample = "lanczos"
+
+    assert name(Resampled(original())) != name(original())
+
+
+def test_older_images_keep_their_name():
+    # stored before the digest was added, the size is used instead
+    older = original(content_digest=None, file_size=1234)
+
+    assert name(older) == name(original(content_digest=None, file_size=1234))
+    assert name(older) != name(original(content_digest=None, file_size=1235))
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = RenditionIndex(str(tmp_path / "index.db"))
+    monkeypatch.setattr(Rendition, "cache", index)
+    return index
+
+
+@pytest.fixture
+def created(monkeypatch):
+    """the original and filter specs of each call to create_many"""
+
+    calls = []
+    create_many = Rendition.create_many.__func__
+
+    def counted(cls, attachment, filter_specs_list):
+        calls.append((attachment.original_filename, filter_specs_list))
+        return create_many(cls, attachment, filter_specs_list)
+
+    monkeypatch.setattr(Rendition, "create_many", classmethod(counted))
+    return calls
+
+
+def create_image(filename):
+    from PIL import Image as PILImage
+
+    data = io.BytesIO()
+    PILImage.new("RGB", (400, 300)).save(data, "JPEG")
+    return Image.create_from(io.BytesIO(data.getvalue()), filename)
+
+
+def test_specs_key():
+    assert get_specs_key(original(), [" width-100 "]) == get_specs_key(
+        original(), ["width-100"]
+    )
+    assert get_specs_key(original(), ["width-100"]) != get_specs_key(
+        original(), ["width-200"]
+    )
+
+
+def test_index_kept_between_instances(tmp_path):
+    key = ("a/b.jpg", "key", "width-100[]")
+    RenditionIndex(str(tmp_path / "index.db")).set(key, {"width": 100})
+
+    index = RenditionIndex(str(tmp_path / "index.db"))
+
+    assert index.lookup_many([key, ("a/b.jpg", "key", "other")]) == [
+        {"width": 100},
+        None,
+    ]
+
+
+def test_lookup_many_creates_only_misses(storage, index, created):
+    first = create_image("first.jpg")
+    second = create_image("second.jpg")
+    Rendition.get_or_create(first, ["width-100"])
+    created.clear()
+
+    renditions = Rendition.lookup_many(
+        [
+            (first, ["width-100"]),
+            (first, ["width-50"]),
+            (second, ["width-100"]),
+            (first, ["width-20"]),
+        ]
+    )
+
+    assert [r.width for r in renditions] == [100, 50, 100, 20]
+    # once per original for the misses
+    assert created == [
+        ("first.jpg", [["width-50"], ["width-20"]]),
+        ("second.jpg", [["width-100"]]),
+    ]
+
+    created.clear()
+    again = Rendition.lookup_many([(first, ["width-50"]), (second, ["width-100"])])
+
+    assert created == []
+    assert [r.path for r in again] == [renditions[1].path, renditions[2].path]
+
+
+def test_delete_stale(index):
+    index.set(("a.jpg", "old", "width-100"), {"width": 100})
+    index.set(("a.jpg", "old", "width-50"), {"width": 50})
+    index.set(("a.jpg", "new", "width-100"), {"width": 100})
+    index.set(("b.jpg", "old", "width-100"), {"width": 100})
+
+    assert index.delete_stale("a.jpg", "new") == 2
+
+    assert index.lookup_many(
+        [
+            ("a.jpg", "old", "width-100"),
+            ("a.jpg", "new", "width-100"),
+            ("b.jpg", "old", "width-100"),
+        ]
+    ) == [None, {"width": 100}, {"width": 100}]
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    """the sizes of the images decoded"""
+
+    from PIL import ImageFile
+
+    sizes = []
+    load = ImageFile.ImageFile.load
+
+    def counted(self):
+        sizes.append(self.size)
+        return load(self)
+
+    monkeypatch.setattr(ImageFile.ImageFile, "load", counted)
+    return sizes
+
+
+@pytest.mark.parametrize("specs", [["original"], ["width-400"], ["max-800x800"]])
+def test_unchanged_copied(storage, stored_bytes, decoded, monkeypatch, specs):
+    monkeypatch.setattr(Rendition, "copy_unchanged", True)
+    image = create_image("image.jpg")
+    decoded.clear()
+
+    rendition = Rendition.create_from(image, specs)
+
+    assert decoded == []
+    assert stored_bytes(rendition) == stored_bytes(image)
+    assert rendition.path != image.path
+    assert (rendition.width, rendition.height) == (400, 300)
+    assert rendition.file_size == image.file_size
+    assert rendition.content_type == "image/jpeg"
+
+
+@pytest.mark.parametrize("specs", [["width-200"], ["format-png"], ["quality-50"]])
+def test_changed_not_copied(storage, stored_bytes, monkeypatch, specs):
+    monkeypatch.setattr(Rendition, "copy_unchanged", True)
+    image = create_image("image.jpg")
+
+    rendition = Rendition.create_from(image, specs)
+
+    assert stored_bytes(rendition) != stored_bytes(image)
+
+
+def test_unchanged_not_copied_by_default(storage, stored_bytes):
+    image = create_image("image.jpg")
+
+    rendition = Rendition.create_from(image, ["original"])
+
+    # encoded again
+    assert stored_bytes(rendition) != stored_bytes(image)
@@ -0,0 +1,267 @@
+import base64
+import os
+
+import pytest
+from starlette.testclient import TestClient
+
+from starlette_files.constants import KB
+from starlette_files.exceptions import (
+    ContentTypeValidationError,
+    MaximumAllowedFileLengthError,
+    UploadLockedError,
+    UploadNotFoundError,
+    UploadOffsetError,
+)
+from starlette_files.fields import FileAttachment
+from starlette_files.resumable import (
+    ResumableUploadApp,
+    ResumableUploads,
+    SQLiteUploadStore,
+)
+
+CONTENT = b"%PDF-1.4\n" + os.urandom(20 * KB)
+
+
+class PDF(FileAttachment):
+    directory = "pdfs"
+    allowed_content_types = ["application/pdf"]
+    max_length = 64 * KB
+
+
+attachment_classes = [PDF]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteUploadStore(str(tmp_path / "uploads.db"))
+
+
+@pytest.fixture
+def uploads(storage, store):
+    return ResumableUploads(PDF, store)
+
+
+def test_store_lock_and_unlock(store):
+    store.create("a", {"offset": 0})
+
+    assert store.lock("a") == {"offset": 0}
+
+    with pytest.raises(UploadLockedError):
+        store.lock("a")
+
+    store.unlock("a", {"offset": 10})
+
+    assert store.lock("a") == {"offset": 10}
+
+    with pytest.raises(UploadNotFoundError):
+        store.lock("missing")
+
+
+def test_store_lock_expires(tmp_path):
+    store = SQLiteUploadStore(str(tmp_path / "uploads.db"), lock_timeout=-1)
+    store.create("a", {})
+
+    store.lock("a")
+    # left locked by a request that died
+    assert store.lock("a") == {}
+
+
+def test_upload_in_chunks(uploads):
+    upload_id = uploads.create(len(CONTENT), "report.pdf")
+
+    offset = 0
+    for start in range(0, len(CONTENT), 3 * KB):
+        offset = uploads.append(upload_id, offset, CONTENT[start : start + 3 * KB])
+
+    assert uploads.get_offset(upload_id) == (len(CONTENT), len(CONTENT))
+
+    attachment = uploads.finalize(upload_id)
+
+    assert attachment.content_type == "application/pdf"
+    assert attachment.original_filename == "report.pdf"
+    assert attachment.file_size == len(CONTENT)
+    with attachment.open as f:
+        assert f.read() == CONTENT
+    assert uploads.store.get(upload_id) is None
+
+
+def test_resume_from_wrong_offset(uploads):
+    upload_id = uploads.create(len(CONTENT), "report.pdf")
+    uploads.append(upload_id, 0, CONTENT[: 2 * KB])
+
+    with pytest.raises(UploadOffsetError) as exc_info:
+        uploads.append(upload_id, 0, CONTENT[: 2 * KB])
+
+    assert exc_info.value.offset == 2 * KB
+    # the upload is unlocked again
+    assert uploads.append(upload_id, 2 * KB, CONTENT[2 * KB :]) == len(CONTENT)
+
+
+def test_resume_while_locked(uploads):
+    upload_id = uploads.create(len(CONTENT), "report.pdf")
+    upload = uploads.resume(upload_id, 0)
+
+    with pytest.raises(UploadLockedError):
+        uploads.resume(upload_id, 0)
+
+    upload.suspend()
+    uploads.resume(upload_id, 0).suspend()
+
+
+def test_failed_write_resumes_from_last_offset(uploads):
+    upload_id = uploads.create(len(CONTENT), "report.pdf")
+    uploads.append(upload_id, 0, CONTENT[: 4 * KB])
+
+    upload = uploads.resume(upload_id, 4 * KB)
+    upload.write(CONTENT[4 * KB : 6 * KB])
+
+    def broken(data):
+        raise OSError("disk full")
+
+    upload.ingest.writer.write = broken
+
+    with pytest.raises(OSError):
+        upload.write(CONTENT[6 * KB : 8 * KB])
+
+    # what this request wrote is not kept
+    assert upload.suspend() == 4 * KB
+    assert uploads.get_offset(upload_id) == (4 * KB, len(CONTENT))
+
+    uploads.append(upload_id, 4 * KB, CONTENT[4 * KB :])
+    attachment = uploads.finalize(upload_id)
+
+    with attachment.open as f:
+        assert f.read() == CONTENT
+
+
+def test_invalid_content_type_aborts(uploads):
+    upload_id = uploads.create(2 * KB, "image.png")
+
+    with pytest.raises(ContentTypeValidationError):
+        uploads.append(upload_id, 0, b"\x89PNG\r\n\x1a\n" + bytes(2 * KB - 8))
+
+    assert uploads.store.get(upload_id) is None
+
+
+def test_too_long(uploads):
+    with pytest.raises(MaximumAllowedFileLengthError):
+        uploads.create(PDF.max_length + 1, "report.pdf")
+
+    upload_id = uploads.create(2 * KB, "report.pdf")
+
+    with pytest.raises(MaximumAllowedFileLengthError):
+        uploads.append(upload_id, 0, CONTENT[: 3 * KB])
+
+
+def test_finalize_incomplete(uploads):
+    upload_id = uploads.create(len(CONTENT), "report.pdf")
+    uploads.append(upload_id, 0, CONTENT[: 2 * KB])
+
+    with pytest.raises(UploadOffsetError):
+        uploads.finalize(upload_id)
+
+    # unlocked so the rest can be sent
+    uploads.append(upload_id, 2 * KB, CONTENT[2 * KB :])
+    uploads.finalize(upload_id)
+
+
+def test_abort_deletes_the_file(uploads, stored_files):
+    upload_id = uploads.create(len(CONTENT), "report.pdf")
+    uploads.append(upload_id, 0, CONTENT[: 2 * KB])
+
+    assert len(stored_files("pdfs")) == 1
+
+    uploads.abort(upload_id)
+
+    assert stored_files("pdfs") == []
+    with pytest.raises(UploadNotFoundError):
+        uploads.get_offset(upload_id)
+
+
+def test_filesystem_writer_truncates_to_offset(storage):
+    writer = storage.open_resumable("pdfs/a.pdf", "application/pdf")
+    writer.write(b"abcdef")
+    state = writer.suspend()
+
+    writer = storage.open_resumable("pdfs/a.pdf", "application/pdf", state)
+    writer.write(b"ghi")
+    # a request that wrote more than was recorded
+    writer.suspend()
+
+    writer = storage.open_resumable("pdfs/a.pdf", "application/pdf", state)
+    writer.write(b"GHI")
+    writer.close()
+
+    with storage.open("pdfs/a.pdf") as f:
+        assert f.read() == b"abcdefGHI"
+
+
+def test_app(uploads):
+    client = TestClient(ResumableUploadApp(uploads, write_size=KB))
+    filename = base64.b64encode(b"report.pdf").decode("ascii")
+
+    response = client.post(
+        "/",
+        headers={
+            "Upload-Length": str(len(CONTENT)),
+            "Upload-Metadata": f"filename {filename}",
+        },
+    )
+    assert response.status_code == 201
+    location = response.headers["location"]
+
+    response = client.patch(
+        location, content=CONTENT[: 5 * KB], headers={"Upload-Offset": "0"}
+    )
+    assert response.status_code == 204
+    assert response.headers["upload-offset"] == str(5 * KB)
+
+    response = client.patch(location, content=b"x", headers={"Upload-Offset": "0"})
+    assert response.status_code == 409
+    assert response.headers["upload-offset"] == str(5 * KB)
+
+    response = client.head(location)
+    assert response.headers["upload-offset"] == str(5 * KB)
+    assert response.headers["tus-resumable"] == "1.0.0"
+
+    client.patch(
+        location, content=CONTENT[5 * KB :], headers={"Upload-Offset": str(5 * KB)}
+    )
+
+    response = client.post(f"{location}/finalize")
+    assert response.status_code == 201
+    assert response.json()["original_filename"] == "report.pdf"
+
+    assert client.head(location).status_code == 404
+    assert client.post("/").status_code == 400
+
+
+def test_s3_writer_keeps_the_tail(monkeypatch):
+    moto = pytest.importorskip("moto")
+    from starlette_files.constants import MB
+    from starlette_files.storages import S3Storage
+
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+    with moto.mock_aws():
+        storage = S3Storage("bucket", "key", "secret", "us-east-1", part_size=5 * MB)
+        storage.bucket.create()
+        data = os.urandom(5 * MB + 2 * KB)
+
+        writer = storage.open_resumable("a.bin", "application/octet-stream")
+        writer.write(data[: 5 * MB])
+        writer.write(data[5 * MB : 5 * MB + KB])
+        state = writer.suspend()
+
+        # the part was uploaded and the rest kept in a tail object
+        assert len(state["parts"]) == 1
+        assert state["tail"] == KB
+        assert [o.key for o in storage.bucket.objects.all()] == [f"a.bin.tail-{5 * MB}"]
+
+        writer = storage.open_resumable("a.bin", "application/octet-stream", state)
+        writer.write(data[5 * MB + KB :])
+        writer.close()
+
+        assert [o.key for o in storage.bucket.objects.all()] == ["a.bin"]
+        with storage.open("a.bin") as f:
+            assert f.read() == data
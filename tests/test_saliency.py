@@ -0,0 +1,75 @@
+import io
+
+import pytest
+
+from starlette_files.fields import ImageAttachment
+from starlette_files.image import saliency
+
+pytest.importorskip("numpy")
+
+
+class Image(ImageAttachment):
+    allowed_content_types = ["image/jpeg", "image/png"]
+
+
+class SmartImage(Image):
+    smart_focal_point = True
+
+
+attachment_classes = [Image, SmartImage]
+
+
+def detailed(size=(1200, 900), box=(800, 500, 1100, 800)):
+    """a flat grey image with detail only in the box"""
+
+    from PIL import Image as PILImage
+
+    image = PILImage.new("RGB", size, (128, 128, 128))
+    left, top, right, bottom = box
+    noise = PILImage.effect_noise((right - left, bottom - top), 100)
+    image.paste(noise.convert("RGB"), (left, top))
+    return image
+
+
+def encoded(image, image_format):
+    data = io.BytesIO()
+    image.save(data, image_format)
+    return io.BytesIO(data.getvalue())
+
+
+def test_find_focal_point():
+    image = detailed((120, 90), (80, 50, 110, 80))
+
+    found = saliency.find_focal_point(image)
+
+    assert (found.width, found.height) == (40, 30)
+    assert 80 <= found.centroid.x <= 110
+    assert 50 <= found.centroid.y <= 80
+
+
+def test_flat_image_is_centred():
+    from PIL import Image as PILImage
+
+    found = saliency.find_focal_point(PILImage.new("RGB", (120, 90), "white"))
+
+    assert found.centroid == (60, 45)
+
+
+@pytest.mark.parametrize("image_format", ["JPEG", "PNG"])
+def test_focal_point_set_at_upload(storage, image_format):
+    image = SmartImage.create_from(encoded(detailed(), image_format), "image")
+
+    focal_point = image.get_focal_point()
+
+    assert focal_point is not None
+    # scaled up to the size of the original
+    assert 300 <= focal_point.width <= 500
+    assert 800 <= focal_point.centroid.x <= 1100
+    assert 500 <= focal_point.centroid.y <= 800
+
+
+def test_focal_point_not_set_by_default(storage):
+    image = Image.create_from(encoded(detailed(), "JPEG"), "image")
+
+    assert image.get_focal_point() is None
+    assert image.focal_point_x is None
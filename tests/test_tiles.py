@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+from starlette_files.fields import ImageAttachment
+from starlette_files.image.tiles import TilePyramid
+
+
+class Image(ImageAttachment):
+    allowed_content_types = ["image/jpeg", "image/png"]
+
+
+attachment_classes = [Image]
+
+
+def create_image(mode, image_format):
+    from PIL import Image as PILImage
+
+    data = io.BytesIO()
+    PILImage.new(mode, (600, 400), (200, 100, 50, 0)[: len(mode)]).save(
+        data, image_format
+    )
+    return Image.create_from(io.BytesIO(data.getvalue()), "image")
+
+
+def test_pyramid():
+    pyramid = TilePyramid(600, 400)
+
+    assert pyramid.max_level == 10
+    assert pyramid.level_size(10) == (600, 400)
+    assert pyramid.level_size(9) == (300, 200)
+    assert pyramid.level_size(0) == (1, 1)
+    assert pyramid.level_tiles(10) == (3, 2)
+    assert pyramid.visible_tiles(10, (0, 0, 300, 300)) == [
+        (0, 0),
+        (1, 0),
+        (0, 1),
+        (1, 1),
+    ]
+
+
+@pytest.mark.parametrize(
+    "mode, image_format", [("RGB", "JPEG"), ("RGBA", "PNG"), ("P", "PNG")]
+)
+def test_build_tiles(storage, stored_files, mode, image_format):
+    from PIL import Image as PILImage
+
+    image = create_image(mode, image_format)
+
+    pyramid = image.build_tiles()
+
+    with storage.open(f"{image.tiles_base}.dzi") as f:
+        descriptor = f.read().decode()
+
+    assert 'Format="jpeg"' in descriptor
+    assert '<Size Width="600" Height="400"/>' in descriptor
+
+    # 3x2 tiles at level 10, 2x1 at level 9 and one for each of levels 0 to 8
+    directory = f"{image.tiles_base}_files"
+    assert stored_files(f"{directory}/10") == [
+        "0_0.jpeg",
+        "0_1.jpeg",
+        "1_0.jpeg",
+        "1_1.jpeg",
+        "2_0.jpeg",
+        "2_1.jpeg",
+    ]
+    assert stored_files(f"{directory}/9") == ["0_0.jpeg", "1_0.jpeg"]
+    assert sum(len(stored_files(f"{directory}/{level}")) for level in range(9)) == 9
+    assert image.tile_pyramid.level_tiles(10) == pyramid.level_tiles(10)
+
+    with storage.open(image.tile_path(10, 2, 1)) as f:
+        tile = PILImage.open(f)
+        tile.load()
+
+    assert tile.format == "JPEG"
+    assert tile.size == (88, 144)
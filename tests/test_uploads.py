@@ -0,0 +1,154 @@
+import os
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from starlette_files.constants import KB
+from starlette_files.exceptions import (
+    ContentTypeValidationError,
+    MaximumAllowedFileLengthError,
+    MultipartParseError,
+)
+from starlette_files.fields import FileAttachment
+from starlette_files.uploads import UploadParser, parse_upload
+
+BOUNDARY = "boundary"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+PDF_CONTENT = b"%PDF-1.4\n" + os.urandom(8 * KB)
+PNG_CONTENT = b"\x89PNG\r\n\x1a\n" + bytes(KB)
+
+
+class PDF(FileAttachment):
+    directory = "pdfs"
+    allowed_content_types = ["application/pdf"]
+    max_length = 16 * KB
+
+
+attachment_classes = [PDF]
+
+
+def encode(*parts):
+    body = b""
+    for name, value, filename in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += (
+            f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n".encode()
+            + value
+            + b"\r\n"
+        )
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def parse(body, chunk_size=KB, **kwargs):
+    parser = UploadParser(CONTENT_TYPE, {"file": PDF, "other": PDF}, **kwargs)
+    for start in range(0, len(body), chunk_size):
+        parser.write(body[start : start + chunk_size])
+    parser.finalize()
+    return parser
+
+
+def test_parse_fields_and_files(stored_files):
+    body = encode(
+        ("title", b"A report", None),
+        ("file", PDF_CONTENT, "report.pdf"),
+        ("ignored", b"not an attachment", "notes.txt"),
+    )
+
+    parser = parse(body)
+
+    assert parser.form["title"] == "A report"
+    assert "ignored" not in parser.form
+
+    attachment = parser.form["file"]
+    assert attachment.original_filename == "report.pdf"
+    assert attachment.content_type == "application/pdf"
+    with attachment.open as f:
+        assert f.read() == PDF_CONTENT
+    assert len(stored_files("pdfs")) == 1
+
+
+def test_empty_file_input_is_skipped(stored_files):
+    parser = parse(encode(("file", b"", "")))
+
+    assert "file" not in parser.form
+    assert stored_files("pdfs") == []
+
+
+def test_missing_boundary():
+    with pytest.raises(MultipartParseError):
+        UploadParser("multipart/form-data", {})
+
+
+def test_field_too_large(storage):
+    with pytest.raises(MultipartParseError):
+        parse(encode(("title", b"x" * 2 * KB, None)), max_field_size=KB)
+
+
+def test_abort_deletes_stored_files(stored_files):
+    parser = UploadParser(CONTENT_TYPE, {"file": PDF, "other": PDF})
+    body = encode(("file", PDF_CONTENT, "a.pdf"), ("other", PDF_CONTENT, "b.pdf"))
+
+    # the first file is stored and the second is part way through
+    parser.write(body[: len(body) - 2 * KB])
+    assert len(stored_files("pdfs")) == 2
+
+    parser.abort()
+
+    assert parser.stored == []
+    assert stored_files("pdfs") == []
+
+
+def test_invalid_file_raises_before_the_rest_is_read(stored_files):
+    parser = UploadParser(CONTENT_TYPE, {"file": PDF})
+    body = encode(("file", PNG_CONTENT, "image.png"))
+
+    with pytest.raises(ContentTypeValidationError):
+        # the content type is known once enough of the file has arrived
+        for start in range(0, len(body), 256):
+            parser.write(body[start : start + 256])
+
+    parser.abort()
+    assert stored_files("pdfs") == []
+
+
+async def upload(request):
+    try:
+        form = await parse_upload(request, {"file": PDF, "other": PDF}, write_size=KB)
+    except (ContentTypeValidationError, MaximumAllowedFileLengthError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    return JSONResponse(
+        {"title": form["title"], "filename": form["file"].original_filename}
+    )
+
+
+@pytest.fixture
+def client(storage):
+    return TestClient(Starlette(routes=[Route("/", upload, methods=["POST"])]))
+
+
+def test_parse_upload(client, stored_files):
+    body = encode(("title", b"A report", None), ("file", PDF_CONTENT, "report.pdf"))
+
+    response = client.post("/", content=body, headers={"Content-Type": CONTENT_TYPE})
+
+    assert response.json() == {"title": "A report", "filename": "report.pdf"}
+    assert len(stored_files("pdfs")) == 1
+
+
+def test_parse_upload_aborts(client, stored_files):
+    # the first file is stored before the second is found to be too large
+    body = encode(
+        ("other", PDF_CONTENT, "a.pdf"),
+        ("file", PDF_CONTENT * 3, "report.pdf"),
+    )
+
+    response = client.post("/", content=body, headers={"Content-Type": CONTENT_TYPE})
+
+    assert response.status_code == 400
+    assert stored_files("pdfs") == []